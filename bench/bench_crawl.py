@@ -0,0 +1,105 @@
+"""
+Годовой обход calend.ru против локальной подставки вместо сайта.
+
+Подставка отвечает с задержкой --latency и иногда отдаёт 503, чтобы
+проверить повторы. Сравниваются старый последовательный обход
+(requests.get на каждую страницу) и общий движок common.crawl.
+    python -m bench.bench_crawl --latency 0.1
+"""
+import argparse
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from common.crawl import Crawler, date_range
+from parsers import calend_ru
+
+PAGE = """<html><body><h1>{day}</h1>
+<a href="/holidays/">Праздники</a>
+<a href="/holidays/a">Праздник {day}</a>
+<a href="/holidays/b">Всемирный день {day}</a>
+<a href="/names/">Именины</a>
+</body></html>"""
+
+
+def make_handler(latency: float, flaky_every: int):
+    seen = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            with lock:
+                seen[self.path] = seen.get(self.path, 0) + 1
+                first_try = seen[self.path] == 1
+            if flaky_every and first_try and hash(self.path) % flaky_every == 0:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = PAGE.format(day=self.path.strip("/").split("/")[-1]).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class PlainGet:
+    """Как было до движка: отдельный requests.get без Session и без повторов."""
+
+    def get_text(self, url: str) -> str:
+        r = requests.get(url, timeout=25, headers={"User-Agent": "Mozilla/5.0"})
+        r.raise_for_status()
+        return r.text
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--latency", type=float, default=0.1)
+    ap.add_argument("--flaky-every", type=int, default=20, help="каждая N-я страница сначала отвечает 503")
+    ap.add_argument("--skip-sequential", action="store_true")
+    args = ap.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency, args.flaky_every))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    def local_url(d: date) -> str:
+        return f"{base}/day/{d.isoformat()}/"
+
+    start, end = date(2025, 1, 1), date(2025, 12, 31)
+
+    if not args.skip_sequential:
+        t0 = time.perf_counter()
+        plain = PlainGet()
+        n_seq, errors = 0, 0
+        for d in date_range(start, end):
+            try:
+                n_seq += len(calend_ru.parse_day(d, plain, local_url(d)))
+            except Exception:
+                errors += 1
+        print(f"sequential: {n_seq} items, {errors} failed days in {time.perf_counter() - t0:.1f}s")
+
+    t0 = time.perf_counter()
+    with Crawler() as crawler:
+        items = list(calend_ru.crawl(start, end, crawler, url_fn=local_url))
+    dates = [it["date"] for it in items]
+    print(f"crawler:    {len(items)} items in {time.perf_counter() - t0:.1f}s, "
+          f"date order kept: {dates == sorted(dates)}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Нагрузочный замер /date: запросов в секунду с пулом соединений и без него.
+
+Запуск из корня проекта (нужна собранная db/holidays.sqlite):
+    python -m bench.bench_date --requests 5000 --threads 8
+"""
+import argparse
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from webapp import main as app_main
+from webapp.db import DB_PATH, pool
+
+
+def connect_per_query(sql: str, params=()):
+    # Поведение до пула: новое соединение на каждый запрос.
+    con = sqlite3.connect(DB_PATH)
+    con.row_factory = sqlite3.Row
+    rows = con.execute(sql, params).fetchall()
+    con.close()
+    return rows
+
+
+def run(n_requests: int, threads: int) -> float:
+    start = date(2025, 1, 1)
+    dates = [(start + timedelta(days=i % 365)).isoformat() for i in range(n_requests)]
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        for _ in ex.map(app_main.render_date, dates):
+            pass
+    return n_requests / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=3000)
+    ap.add_argument("--threads", type=int, default=8)
+    args = ap.parse_args()
+
+    original = app_main.db_fetchall
+    app_main.db_fetchall = connect_per_query
+    before = run(args.requests, args.threads)
+    app_main.db_fetchall = original
+
+    run(args.threads * 4, args.threads)  # прогрев соединений пула
+    after = run(args.requests, args.threads)
+    pool.close()
+
+    print(f"/date connect-per-query: {before:8.1f} req/s")
+    print(f"/date pooled:            {after:8.1f} req/s  (x{after / before:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Время нечёткого поиска на большом словаре названий.
+
+Словарь раздувается до --titles записей из реальных названий из базы
+(с суффиксами-вариациями), затем замеряется среднее и p99 на запрос.
+    python -m bench.bench_fuzzy --titles 100000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from webapp.db import pool
+from webapp.fuzzy import FuzzyIndex
+
+QUERIES = [
+    "новы год", "valentins", "день учителй", "масленица", "день побуды",
+    "helloween", "independance day", "день космонавтики", "рождиство", "earth dya",
+]
+
+SUFFIXES = ["", " в россии", " в казахстане", " (world)", " international", " день памяти", " 2"]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--titles", type=int, default=100_000)
+    args = ap.parse_args()
+
+    base = pool.fetchall("SELECT canonical_title_norm, canonical_title, lang FROM holidays")
+    pool.close()
+
+    rnd = random.Random(1)
+    rows = []
+    for i in range(args.titles):
+        norm, title, lang = base[i % len(base)]
+        suffix = rnd.choice(SUFFIXES) if i >= len(base) else ""
+        rows.append((i, norm + suffix, title + suffix, lang))
+
+    t0 = time.perf_counter()
+    index = FuzzyIndex()
+    index.build(rows)
+    print(f"build: {len(index)} titles in {time.perf_counter() - t0:.2f}s")
+
+    timings = []
+    for _ in range(20):
+        for q in QUERIES:
+            t = time.perf_counter()
+            index.search(q)
+            timings.append((time.perf_counter() - t) * 1000)
+    timings.sort()
+    print(f"search: mean {statistics.mean(timings):.2f} ms, "
+          f"p99 {timings[int(len(timings) * 0.99) - 1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
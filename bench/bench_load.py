@@ -0,0 +1,77 @@
+"""
+Скорость загрузчика на синтетическом корпусе.
+
+Генерирует JSONL на --mentions упоминаний в трёх «источниках» и собирает
+из него базу построчным и пакетным (--bulk) режимом load_and_dedupe.py.
+    python -m bench.bench_load --mentions 1000000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from db import load_and_dedupe
+
+SOURCES = ("calend.ru", "my-calend.ru", "wikipedia.org")
+RU_WORDS = ["день", "праздник", "международный", "всемирный", "народный", "памяти",
+            "работника", "учителя", "космонавтики", "урожая", "матери", "моря"]
+EN_WORDS = ["day", "festival", "international", "world", "national", "memorial",
+            "workers", "teachers", "harvest", "mothers", "ocean", "independence"]
+
+
+def generate(dir_path: str, mentions: int, seed: int = 1):
+    rnd = random.Random(seed)
+    n_titles = max(100, mentions // 20)
+    titles = []
+    for i in range(n_titles):
+        words = RU_WORDS if i % 3 else EN_WORDS
+        titles.append(" ".join(rnd.sample(words, 3)) + f" {i}")
+
+    start = date(2015, 1, 1)
+    files = []
+    per_source = mentions // len(SOURCES)
+    for source in SOURCES:
+        path = os.path.join(dir_path, f"raw_{source}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for _ in range(per_source):
+                title = rnd.choice(titles)
+                d = start + timedelta(days=rnd.randrange(3650))
+                f.write(json.dumps({
+                    "date": d.isoformat(),
+                    "title_raw": title,
+                    "source": source,
+                    "url": f"https://{source}/{d.isoformat()}",
+                    "description": "описание " * rnd.randrange(0, 30),
+                }, ensure_ascii=False) + "\n")
+        files.append((path, source))
+    return files
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mentions", type=int, default=1_000_000)
+    ap.add_argument("--modes", default="bulk,rows", help="через запятую: bulk, rows")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        files = generate(tmp, args.mentions)
+        print(f"generated {args.mentions} mentions in {time.perf_counter() - t0:.1f}s")
+
+        results = {}
+        for mode in args.modes.split(","):
+            db_path = os.path.join(tmp, f"{mode}.sqlite")
+            t0 = time.perf_counter()
+            load_and_dedupe.load(db_path, files, bulk=(mode == "bulk"))
+            results[mode] = time.perf_counter() - t0
+
+        print()
+        for mode, dt in results.items():
+            print(f"{mode:>4}: {dt:7.1f}s  {args.mentions / dt:10,.0f} mentions/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Разбор годовой страницы my-calend.ru: старый проход find_all(True) с
+get_text() на каждом теге против однопроходного parsers.my_calend_2025.iter_items.
+
+Страница берётся из --html (сохранённая копия), иначе собирается похожая
+на настоящую из data/my-calend.ru/2025.raw.jsonl. Каждый вариант запускается в
+отдельном процессе, чтобы пиковая память (ru_maxrss) не смешивалась.
+    python -m bench.bench_my_calend --html saved_2025.html
+"""
+import argparse
+import html as html_lib
+import json
+import resource
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from bs4 import BeautifulSoup
+
+from common.partitions import partition_path
+from parsers import my_calend_2025 as mc
+
+YEAR = 2025
+WEEKDAYS = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+MONTHS = {v: k for k, v in mc.MONTH_MAP.items()}
+
+
+def synthetic_page(src: str = partition_path("my-calend.ru", YEAR, "raw")) -> str:
+    by_date = defaultdict(list)
+    with open(src, encoding="utf-8") as f:
+        for line in f:
+            it = json.loads(line)
+            by_date[it["date"]].append(it)
+
+    parts = ["<html><head><title>Праздники 2025</title><script>var x = 1;</script></head><body>",
+             "<div class='header'><a href='/holidays/'>Праздники</a> <a href='/names/'>Именины</a></div>",
+             "<div class='wrapper'><div class='content'>"]
+    month = None
+    for i, d in enumerate(sorted(by_date)):
+        _, mm, dd = d.split("-")
+        if mm != month:
+            if month:
+                parts.append("</div>")
+            parts.append(f"<div class='holidays-month'><h2>{MONTHS[mm].capitalize()}</h2>")
+            month = mm
+        parts.append("<div class='holidays-day'>")
+        parts.append(f"<div class='holidays-day-date'><span>{int(dd)} {MONTHS[mm]}</span> "
+                     f"<span class='wd'>{WEEKDAYS[i % 7]}</span></div><ul>")
+        for it in by_date[d]:
+            href = it["holiday_url"].replace("https://my-calend.ru", "")
+            parts.append(f"<li><a href='{html_lib.escape(href)}'>{html_lib.escape(it['title_raw'])}</a>"
+                         f" <span class='note'>праздник</span></li>")
+        parts.append("</ul></div>")
+    parts.append("</div></div></div><div class='footer'><a href='/holidays/2025'>2025</a></div></body></html>")
+    return "".join(parts)
+
+
+def old_items(html: str):
+    """Прежний main() без сети и записи в файл."""
+    soup = BeautifulSoup(html, "lxml")
+    body = soup.body or soup
+    items = []
+    current_date = None
+    for tag in body.find_all(True):
+        ds = mc.date_from_text(tag.get_text(" ", strip=True), YEAR)
+        if ds:
+            current_date = ds
+            continue
+        if not current_date:
+            continue
+        if tag.name == "a" and tag.get("href"):
+            title = tag.get_text(" ", strip=True)
+            href = tag.get("href", "").strip()
+            if not title or len(title) < 3 or len(title) > 140:
+                continue
+            if "/holidays/" not in href:
+                continue
+            holiday_url = href if href.startswith("http") else "https://my-calend.ru" + href
+            if holiday_url.rstrip("/") == mc.year_url(YEAR).rstrip("/"):
+                continue
+            items.append({
+                "date": current_date,
+                "title_raw": title,
+                "title_norm": mc.normalize_title(title),
+                "source": "my-calend.ru",
+                "url": mc.year_url(YEAR),
+                "holiday_url": holiday_url
+            })
+    seen = set()
+    uniq = []
+    for it in items:
+        key = (it["date"], it["title_norm"], it["holiday_url"])
+        if key not in seen:
+            seen.add(key)
+            uniq.append(it)
+    return uniq
+
+
+VARIANTS = {
+    "old": old_items,
+    "new": lambda html: list(mc.iter_items(html, YEAR)),
+}
+
+
+def run_child(variant: str, path: str):
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    items = VARIANTS[variant](html)
+    elapsed = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base
+    print(json.dumps({"items": items, "seconds": elapsed, "peak_kib": peak}, ensure_ascii=False))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--html", help="сохранённая страница my-calend.ru/holidays/2025")
+    ap.add_argument("--child", choices=VARIANTS, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        run_child(args.child, args.html)
+        return
+
+    path = args.html
+    if not path:
+        path = "/tmp/my_calend_synthetic.html"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(synthetic_page())
+
+    results = {}
+    for variant in VARIANTS:
+        out = subprocess.run(
+            [sys.executable, "-m", "bench.bench_my_calend", "--child", variant, "--html", path],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results[variant] = json.loads(out)
+        r = results[variant]
+        print(f"{variant}: {len(r['items'])} items in {r['seconds'] * 1000:.0f} ms, "
+              f"peak +{r['peak_kib'] / 1024:.1f} MiB")
+
+    print("same output:", results["old"]["items"] == results["new"]["items"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Наносекунды на название: прежний normalize_title загрузчика (re.sub без
+предкомпиляции) против common.normalize — холодного (translate + split) и
+тёплого (из LRU-кэша, как при повторной встрече названия).
+
+Названия берутся из всех разделов data/<источник>/<год>.jsonl.
+    python -m bench.bench_normalize --repeat 20
+"""
+import argparse
+import json
+import re
+import time
+
+from common import normalize
+from common.partitions import discover
+
+
+def old_normalize_title(s: str) -> str:
+    """Как было в db/load_and_dedupe.py."""
+    s = (s or "").lower().strip().replace("ё", "е")
+    s = re.sub(r"[^a-zа-я0-9\s\-]", " ", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+
+def load_titles() -> list[str]:
+    titles = []
+    for path, _source, _year in discover():
+        with open(path, encoding="utf-8") as f:
+            titles.extend(json.loads(line).get("title_raw") or "" for line in f)
+    return titles
+
+
+def ns_per_title(fn, titles, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter_ns()
+        for t in titles:
+            fn(t)
+        best = min(best, time.perf_counter_ns() - t0)
+    return best / len(titles)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    titles = load_titles()
+    unique = len(set(titles))
+    mismatched = sum(old_normalize_title(t) != normalize.normalize_title(t) for t in titles)
+    print(f"{len(titles)} titles ({unique} unique), keys differ from the old loader: {mismatched}")
+
+    results = {
+        "old re.sub": ns_per_title(old_normalize_title, titles, args.repeat),
+        "translate (cold)": ns_per_title(normalize._normalize, titles, args.repeat),
+    }
+    normalize._normalize_cached.cache_clear()
+    for t in titles:
+        normalize.normalize_title(t)
+    results["translate + LRU (warm)"] = ns_per_title(normalize.normalize_title, titles, args.repeat)
+
+    base = results["old re.sub"]
+    for name, ns in results.items():
+        print(f"{name:>24}: {ns:7.0f} ns/title  x{base / ns:4.1f}")
+    print("cache:", normalize.cache_info())
+
+
+if __name__ == "__main__":
+    main()
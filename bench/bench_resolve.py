@@ -0,0 +1,136 @@
+"""
+Сопоставление праздников (db/resolve.py) на синтетических данных: время
+и качество при росте числа упоминаний.
+
+Берутся настоящие русские названия из базы, каждому назначается день года,
+и три «источника» пишут его за N лет: как есть, с опечаткой и с уточнением
+(«Международный …», «… в России»). У части праздников в тот же день есть
+праздник другой страны («… в Беларуси»): его склейка с российским через
+общее название — ложная. Правильный ответ известен, поэтому считаются
+и недосклеенные праздники, и ложные склейки.
+    python -m bench.bench_resolve --mentions 100000,300000,1000000
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+from db import load_and_dedupe
+from db.resolve import resolve
+from webapp.db import pool
+
+SOURCES = ("my-calend.ru", "calend.ru", "wikipedia.org")
+QUALIFIERS = ("Международный {}", "Всемирный {}", "{} в России")   # тот же праздник
+OTHER_COUNTRIES = ("{} в Беларуси", "{} в Казахстане", "{} на Украине")  # другой праздник того же дня
+OTHER_SHARE = 0.2       # доля праздников, у которых есть такой «сосед»
+
+
+def typo(title: str, rnd: random.Random) -> str:
+    words = title.split()
+    long = [i for i, w in enumerate(words) if len(w) > 6]
+    if not long:
+        return title.upper()
+    i = rnd.choice(long)
+    w = words[i]
+    k = rnd.randrange(1, len(w) - 1)
+    words[i] = w[:k] + w[k + 1:]
+    return " ".join(words)
+
+
+def qualify(template: str, title: str) -> str:
+    qualified = template.format(title[0].lower() + title[1:] if title[0].isupper() else title)
+    return qualified[0].upper() + qualified[1:]
+
+
+def variants(title: str, rnd: random.Random) -> tuple:
+    return title, typo(title, rnd), qualify(rnd.choice(QUALIFIERS), title)
+
+
+def bases(titles: list, rnd: random.Random) -> tuple[list, list]:
+    """(названия трёх источников, день года) для каждого исходного праздника, включая «соседей»."""
+    names, days = [], []
+    for title in titles:
+        day = rnd.randrange(365)
+        names.append(variants(title, rnd))
+        days.append(day)
+        if rnd.random() < OTHER_SHARE:
+            # Соседу «… в России» у исходного праздника тоже нужен: иначе его не с чем путать.
+            names[-1] = names[-1][:2] + (qualify("{} в России", title),)
+            other = qualify(rnd.choice(OTHER_COUNTRIES), title)
+            names.append((other, typo(other, rnd), other))
+            days.append(day)
+    return names, days
+
+
+def generate(dir_path: str, titles: list, mentions: int, seed: int = 1):
+    rnd = random.Random(seed)
+    names, days = bases(titles, rnd)
+    per_year = len(names) * len(SOURCES)
+    years = max(1, -(-mentions // per_year))
+
+    files = []
+    for s, source in enumerate(SOURCES):
+        path = os.path.join(dir_path, f"{source}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for y in range(2025 - years + 1, 2026):
+                start = date(y, 1, 1)
+                for b, day in enumerate(days):
+                    f.write(json.dumps({
+                        "date": (start + timedelta(days=day)).isoformat(),
+                        "title_raw": names[b][s],
+                        "url": f"https://bench/{b}",
+                    }, ensure_ascii=False) + "\n")
+        files.append((path, source))
+    return files, years
+
+
+def quality(conn) -> tuple[int, int]:
+    """(лишние праздники у одного исходного, ложно склеенные исходные)."""
+    by_base = defaultdict(set)
+    by_holiday = defaultdict(set)
+    for url, hid in conn.execute("""
+        SELECT DISTINCT m.url, o.holiday_id FROM mentions m JOIN occurrences o ON o.id = m.occurrence_id
+    """):
+        by_base[url].add(hid)
+        by_holiday[hid].add(url)
+    split = sum(len(h) - 1 for h in by_base.values())
+    merged = sum(len(b) - 1 for b in by_holiday.values())
+    return split, merged
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mentions", default="100000,300000,1000000", help="размеры через запятую")
+    args = ap.parse_args()
+
+    titles = [r[0] for r in pool.fetchall("SELECT canonical_title FROM holidays WHERE lang = 'ru'")]
+    pool.close()
+    print(f"{len(titles)} base titles")
+
+    for n in (int(x) for x in args.mentions.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            files, years = generate(tmp, titles, n)
+            conn = sqlite3.connect(os.path.join(tmp, "bench.sqlite"))
+            with open(load_and_dedupe.SCHEMA_PATH, encoding="utf-8") as f:
+                conn.executescript(f.read())
+            load_and_dedupe.load_bulk(conn, files, "bench")
+            before = conn.execute("SELECT count(*) FROM holidays").fetchone()[0]
+
+            t0 = time.perf_counter()
+            merged = resolve(conn)
+            dt = time.perf_counter() - t0
+            split, false_merges = quality(conn)
+            loaded = conn.execute("SELECT count(*) FROM mentions").fetchone()[0]
+            conn.close()
+
+        print(f"{loaded:>9,} mentions ({years} years): {before} -> {before - merged} holidays in {dt:.1f}s "
+              f"({loaded / dt:,.0f} mentions/s); not merged {split}, false merges {false_merges}")
+
+
+if __name__ == "__main__":
+    main()
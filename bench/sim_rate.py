@@ -0,0 +1,121 @@
+"""
+Симуляция адаптивного окна запросов (common.rate) против сайта, который
+троттлит: больше --capacity одновременных запросов — 429 с Retry-After,
+и задержка растёт с нагрузкой.
+
+Сравниваются постоянные окна (как раньше — «сколько потоков не жалко»)
+и AIMD-окно, которое само нащупывает ёмкость сайта. Последний прогон — тот же
+сайт, который вдобавок случайно отвечает 503 без Retry-After (--flaky):
+такие сбои повторяются и не должны ужимать окно.
+    python -m bench.sim_rate --capacity 6 --pages 400 --flaky 0.05
+"""
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common.crawl import Crawler, crawl_ordered
+from common.rate import RateController
+
+
+class Site:
+    def __init__(self, capacity: int, service: float, retry_after: int):
+        self.flaky = 0.0        # доля случайных 503 без Retry-After
+        self.failed = 0
+        self.capacity = capacity
+        self.service = service
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.served = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    def handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with site.lock:
+                    site.in_flight += 1
+                    load = site.in_flight
+                try:
+                    if load > site.capacity:
+                        with site.lock:
+                            site.throttled += 1
+                        self.send_response(429)
+                        self.send_header("Retry-After", str(site.retry_after))
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    if random.random() < site.flaky:
+                        with site.lock:
+                            site.failed += 1
+                        self.send_response(503)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    time.sleep(site.service * (1 + load / site.capacity))
+                    body = b"<html><body><p>ok</p></body></html>"
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    with site.lock:
+                        site.served += 1
+                finally:
+                    with site.lock:
+                        site.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def run(name: str, rate: RateController, site: Site, base: str, pages: int, workers: int):
+    site.served = site.throttled = site.failed = 0
+    crawler = Crawler(rate=rate, retries=8)
+    t0 = time.perf_counter()
+    errors = 0
+    for _, _, err in crawl_ordered(range(pages), lambda i: crawler.get_text(f"{base}/p/{i}"), workers):
+        errors += err is not None
+    elapsed = time.perf_counter() - t0
+    crawler.close()
+    limit = next(iter(rate.stats().values()))["limit"]
+    print(f"{name:>16}: {pages / elapsed:6.1f} pages/s, {site.throttled:4d} × 429, {site.failed:4d} × 503, "
+          f"{errors} failed, final window {limit}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--capacity", type=int, default=6)
+    ap.add_argument("--service", type=float, default=0.05, help="секунд на ответ без нагрузки")
+    ap.add_argument("--retry-after", type=int, default=1)
+    ap.add_argument("--pages", type=int, default=400)
+    ap.add_argument("--workers", type=int, default=32)
+    ap.add_argument("--flaky", type=float, default=0.05, help="доля случайных 503 в последнем прогоне")
+    args = ap.parse_args()
+
+    site = Site(args.capacity, args.service, args.retry_after)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), site.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    def fixed(n):
+        return RateController(initial=n, min_limit=n, max_limit=n)
+
+    run("fixed 2", fixed(2), site, base, args.pages, args.workers)
+    run("fixed 16", fixed(16), site, base, args.pages, args.workers)
+    run("adaptive", RateController(), site, base, args.pages, args.workers)
+    site.flaky = args.flaky
+    run(f"adaptive, {args.flaky:.0%} 503", RateController(), site, base, args.pages, args.workers)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CHECKPOINT_DIR = "data/checkpoints"
+
+
+class CrawlJournal:
+    """
+    Журнал обхода: для каждой страницы — статус, хэш тела и выданные записи.
+
+    Пишется после каждой страницы, поэтому упавший обход можно продолжить
+    (resume: страницы, готовые в текущем прогоне, не скачиваются заново),
+    а плановое обновление — ограничить изменившимися страницами
+    (changed-only: страница с тем же хэшем тела не разбирается повторно).
+    """
+
+    def __init__(self, name: str, resume: bool = False, root: str = CHECKPOINT_DIR):
+        os.makedirs(root, exist_ok=True)
+        self._con = sqlite3.connect(os.path.join(root, f"{name}.sqlite"), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._con.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              started_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+              url TEXT PRIMARY KEY,
+              run_id INTEGER NOT NULL,
+              status TEXT NOT NULL,          -- ok | error
+              body_hash TEXT,                -- хэш последнего успешно разобранного тела
+              items TEXT,                    -- JSON-список выданных записей
+              error TEXT,
+              updated_at REAL NOT NULL
+            );
+        """)
+
+        last = self._con.execute("SELECT max(id) FROM runs").fetchone()[0]
+        if resume and last is not None:
+            self.run_id = last
+        else:
+            self.run_id = self._con.execute(
+                "INSERT INTO runs(started_at) VALUES (?)", (time.time(),)
+            ).lastrowid
+        self._con.commit()
+
+    def get(self, url: str):
+        """(run_id, status, body_hash, items) последней записи по url или None."""
+        with self._lock:
+            row = self._con.execute(
+                "SELECT run_id, status, body_hash, items FROM pages WHERE url=?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        run_id, status, body_hash, items = row
+        return run_id, status, body_hash, json.loads(items) if items else []
+
+    def done_in_this_run(self, entry) -> bool:
+        return bool(entry) and entry[0] == self.run_id and entry[1] == "ok"
+
+    def record_ok(self, url: str, body_hash: str, items: list):
+        with self._lock:
+            self._con.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?,?,?,?,?,?,?)",
+                (url, self.run_id, "ok", body_hash, json.dumps(items, ensure_ascii=False), None, time.time()),
+            )
+            self._con.commit()
+
+    def record_error(self, url: str, error: str):
+        # Хэш и записи прошлого удачного разбора сохраняем: они нужны changed-only.
+        with self._lock:
+            self._con.execute("""
+                INSERT INTO pages(url, run_id, status, error, updated_at) VALUES (?,?,?,?,?)
+                ON CONFLICT(url) DO UPDATE SET
+                  run_id=excluded.run_id, status='error', error=excluded.error, updated_at=excluded.updated_at
+            """, (url, self.run_id, "error", error, time.time()))
+            self._con.commit()
+
+    def close(self):
+        with self._lock:
+            self._con.close()
@@ -0,0 +1,291 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.http_cache import HttpCache, Tee, declared_encoding, iter_chunks, sniff_charset
+from common.rate import MAX_PER_HOST, RateController, controller, parse_retry_after
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+WORKERS = 16          # потоков на разбор страниц
+TIMEOUT = 25
+RETRIES = 3
+BACKOFF = 0.5         # 0.5, 1, 2 сек между повторами
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+CHUNK = 16 * 1024     # кусок потокового чтения
+
+
+class Crawler:
+    """
+    Общий HTTP-клиент для парсеров и обогатителей: один requests.Session
+    с keep-alive, число одновременных запросов к хосту подбирает
+    RateController (по умолчанию общий на процесс, см. common.rate),
+    повторы с экспоненциальной паузой (или по Retry-After) на сетевые
+    ошибки и 429/5xx. С cache=HttpCache(...) get_text() сначала смотрит
+    в дисковый кэш.
+    """
+
+    def __init__(self, timeout: float = TIMEOUT, retries: int = RETRIES, backoff: float = BACKOFF,
+                 headers=HEADERS, cache: HttpCache | None = None, rate: RateController = controller):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = cache
+        self.rate = rate
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+
+        # Повторы делаем сами, чтобы каждую попытку видел RateController.
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=MAX_PER_HOST, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _send(self, url: str, **kwargs):
+        """
+        Запрос с повторами. Возвращает (ответ, limiter, задержка) с ещё занятым
+        слотом хоста — вызывающий освобождает его через _done().
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        host = self.rate.host(url)
+        attempt = 0
+        while True:
+            host.acquire()
+            t0 = time.perf_counter()
+            try:
+                r = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                host.release(time.perf_counter() - t0, error=True)
+                if attempt >= self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+                attempt += 1
+                continue
+
+            latency = time.perf_counter() - t0
+            if r.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                return r, host, latency
+
+            retry_after = parse_retry_after(r.headers.get("Retry-After"))
+            throttled = r.status_code == 429 or retry_after is not None
+            host.release(latency, throttled=throttled, error=not throttled, retry_after=retry_after)
+            r.close()
+            if retry_after is None:
+                # С Retry-After пауза уже стоит на всём хосте.
+                time.sleep(self.backoff * 2 ** attempt)
+            attempt += 1
+
+    @staticmethod
+    def _done(host, r: requests.Response, latency: float):
+        failed = r.status_code in RETRY_STATUSES
+        retry_after = parse_retry_after(r.headers.get("Retry-After")) if failed else None
+        throttled = failed and (r.status_code == 429 or retry_after is not None)
+        host.release(latency, throttled=throttled, error=failed and not throttled, retry_after=retry_after)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        r, host, latency = self._send(url, **kwargs)
+        self._done(host, r, latency)
+        r.raise_for_status()
+        return r
+
+    def get_text(self, url: str) -> str:
+        if self.cache is None:
+            return self.get(url).text
+        return self.cache.get_text(url, lambda u, headers: self.get(u, headers=headers))
+
+    @contextmanager
+    def _open(self, url: str, headers=None):
+        """Потоковый ответ; 304 на условный запрос — не ошибка."""
+        r, host, latency = self._send(url, stream=True, headers=headers)
+        try:
+            if r.status_code != 304:
+                r.raise_for_status()
+            yield r
+        finally:
+            r.close()
+            self._done(host, r, latency)
+
+    @contextmanager
+    def stream(self, url: str, chunk_size: int = CHUNK):
+        """
+        Тело ответа по кускам: with crawler.stream(url) as (encoding, chunks).
+        Выход из with до конца тела закрывает соединение и дальше сокет не читается.
+        encoding — кодировка из заголовка, None — пусть её определит парсер.
+        Свежая копия из кэша отдаётся оттуда; тело, прочитанное до конца,
+        сохраняется в кэш, недочитанное — нет (для него см. extract).
+        """
+        text = self.cache.peek(url) if self.cache is not None else None
+        if text is not None:
+            yield "utf-8", iter_chunks(text.encode("utf-8"), chunk_size)
+            return
+
+        with self._open(url) as r:
+            encoding = declared_encoding(r)
+            tee = Tee(r.iter_content(chunk_size))
+            yield encoding, tee
+            if tee.complete and self.cache is not None:
+                self.cache.fetched += 1
+                body = bytes(tee.body)
+                self.cache.store(url, body, encoding or sniff_charset(body),
+                                 r.headers.get("ETag"), r.headers.get("Last-Modified"))
+
+    def extract(self, url: str, key: str, read, chunk_size: int = CHUNK):
+        """
+        read(encoding, chunks) по телу страницы, как со stream(); read может
+        бросить чтение на середине. С кэшем результат запоминается по
+        (url, key) и повторно сеть не нужна (см. HttpCache.extract).
+        """
+        if self.cache is None:
+            with self.stream(url, chunk_size) as (encoding, chunks):
+                return read(encoding, chunks)
+        return self.cache.extract(url, key, read, lambda headers: self._open(url, headers), chunk_size)
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_crawler() -> Crawler:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Crawler(cache=HttpCache.from_env())
+        return _default
+
+
+def date_range(start: date, end: date):
+    d = start
+    while d <= end:
+        yield d
+        d += timedelta(days=1)
+
+
+def crawl_ordered(jobs, work, workers: int = WORKERS):
+    """
+    Выполняет work(job) в пуле потоков и отдаёт (job, result, error)
+    строго в порядке jobs. Вперёд забегает не больше workers * 2 заданий,
+    поэтому результаты можно сразу писать в файл, не копя их в памяти.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        window = deque()
+        for job in jobs:
+            window.append((job, ex.submit(work, job)))
+            if len(window) >= workers * 2:
+                yield _settle(*window.popleft())
+        while window:
+            yield _settle(*window.popleft())
+
+
+def _settle(job, future):
+    try:
+        return job, future.result(), None
+    except Exception as e:
+        return job, None, e
+
+
+def body_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def crawl_pages(jobs, url_fn, parse_html, crawler=None, journal=None,
+                changed_only: bool = False, workers: int = WORKERS):
+    """
+    Обход страниц с журналом (common.checkpoint.CrawlJournal).
+
+    Отдаёт (job, state, items, error) в порядке jobs, state — одно из:
+      done      — страница уже готова в этом прогоне (resume), записи из журнала;
+      unchanged — тело не изменилось с прошлого разбора (changed_only), записи из журнала;
+      parsed    — скачана и разобрана заново;
+      stale     — ошибка (error заполнен), но записи — последнего удачного разбора из журнала;
+      error     — ошибка, а удачного разбора в журнале нет: записей нет.
+    Журнал пишется здесь, в потоке-потребителе, после каждой страницы.
+    """
+    crawler = crawler or default_crawler()
+
+    def work(job):
+        url = url_fn(job)
+        entry = journal.get(url) if journal else None
+        if journal and journal.done_in_this_run(entry):
+            return url, "done", None, entry[3]
+        text = crawler.get_text(url)
+        h = body_hash(text)
+        if changed_only and entry and entry[2] == h:
+            return url, "unchanged", h, entry[3]
+        return url, "parsed", h, parse_html(job, url, text)
+
+    for job, result, err in crawl_ordered(jobs, work, workers):
+        if err:
+            entry = None
+            if journal:
+                entry = journal.get(url_fn(job))
+                journal.record_error(url_fn(job), repr(err))
+            # Без записей дня раздел потерял бы их, а --incremental удалил бы их из базы.
+            if entry and entry[2] is not None:
+                yield job, "stale", entry[3], err
+            else:
+                yield job, "error", [], err
+            continue
+        url, state, h, items = result
+        if journal and state != "done":
+            journal.record_ok(url, h, items)
+        yield job, state, items, None
+
+
+def day_items(pages):
+    """
+    Записи из crawl_pages по порядку дней, с печатью хода обхода. День с ошибкой
+    берёт записи прошлого удачного разбора; если их нет, после всех дней
+    поднимается RuntimeError — и write_jsonl не подменяет раздел неполным.
+    """
+    failed = []
+    for d, state, items, err in pages:
+        if err:
+            print("Error:", d.isoformat(), err)
+            if state == "error":
+                failed.append(d.isoformat())
+                continue
+            print(f"Kept {len(items)} records of {d.isoformat()} from the last good crawl")
+        else:
+            print("Parsing:" if state == "parsed" else f"Skipped ({state}):", d.isoformat())
+        yield from items
+    if failed:
+        raise RuntimeError(f"{len(failed)} days failed with nothing to fall back on: {', '.join(failed)}")
+
+
+def write_jsonl(path: str, items) -> int:
+    """
+    Пишет во временный файл и подменяет им path целиком: загрузчик никогда
+    не увидит недописанный раздел, а упавший обход не затрёт прежний.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    n = 0
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            for it in items:
+                f.write(json.dumps(it, ensure_ascii=False) + "\n")
+                n += 1
+    except BaseException:
+        os.remove(tmp)
+        raise
+    os.replace(tmp, path)
+    return n
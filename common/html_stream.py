@@ -0,0 +1,147 @@
+import re
+
+from lxml import etree
+
+from common.crawl import default_crawler
+from common.http_cache import sniff_charset
+
+# Версия разбора в ключе кэша абзацев: поднять, если FirstParagraph стал
+# находить другое, — иначе из кэша будут отдаваться старые абзацы.
+EXTRACT_VERSION = 1
+
+# Разделы страницы, текст которых в описание не попадает.
+SKIP_TAGS = {"script", "style", "noscript", "header", "footer", "nav", "aside"}
+
+SPACE_RE = re.compile(r"\s+")
+SELECTOR_RE = re.compile(r"^(?P<tag>[a-z0-9]+)?(?:#(?P<id>[\w-]+))?(?:\.(?P<cls>[\w-]+))?"
+                         r"(?:\[(?P<attr>[\w-]+)=['\"]?(?P<value>[^'\"\]]*)['\"]?\])?$")
+
+
+def parse_selector(sel: str) -> dict:
+    """Простые селекторы: tag, #id, .class, tag.class, [attr='value']."""
+    m = SELECTOR_RE.match(sel.strip())
+    if not m:
+        raise ValueError(f"unsupported selector: {sel}")
+    return {k: v for k, v in m.groupdict().items() if v}
+
+
+def matches(sel: dict, tag: str, attrib) -> bool:
+    if "tag" in sel and sel["tag"] != tag:
+        return False
+    if "id" in sel and attrib.get("id") != sel["id"]:
+        return False
+    if "cls" in sel and sel["cls"] not in (attrib.get("class") or "").split():
+        return False
+    if "attr" in sel and attrib.get(sel["attr"]) != sel["value"]:
+        return False
+    return True
+
+
+class FirstParagraph:
+    """
+    Цель для lxml-парсера: ищет первый <p> не короче min_len внутри одного
+    из контейнеров статьи. Как только он найден, done = True и дальше страницу
+    можно не читать.
+
+    Если ни в одном контейнере такого <p> нет, с fallback=True берётся
+    первый подходящий <p> где угодно, а за ним — первая длинная строка
+    текста (так делал разбор целой страницы через BeautifulSoup).
+    """
+
+    def __init__(self, containers, min_len: int, fallback: bool = False):
+        self.containers = [parse_selector(s) for s in containers]
+        self.min_len = min_len
+        self.fallback = fallback
+        self.done = False
+        self.text = None
+        self.any_p = None
+        self.any_line = None
+        self._stack = []          # (контейнер?, пропуск?) для открытых тегов
+        self._in_container = 0
+        self._in_skip = 0
+        self._p_parts = None
+        self._buf = []
+
+    def _flush(self):
+        if not self._buf:
+            return
+        s = "".join(self._buf).strip()
+        self._buf = []
+        if not s or self._in_skip:
+            return
+        if self._p_parts is not None:
+            self._p_parts.append(s)
+        if self.fallback and self.any_line is None:
+            line = SPACE_RE.sub(" ", s)
+            if len(line) >= self.min_len:
+                self.any_line = line
+
+    def start(self, tag, attrib):
+        self._flush()
+        container = any(matches(c, tag, attrib) for c in self.containers)
+        skip = tag in SKIP_TAGS
+        self._stack.append((container, skip))
+        self._in_container += container
+        self._in_skip += skip
+        if tag == "p" and not self._in_skip:
+            self._p_parts = []
+
+    def end(self, tag):
+        self._flush()
+        if tag == "p" and self._p_parts is not None:
+            self._paragraph(SPACE_RE.sub(" ", " ".join(self._p_parts)).strip())
+            self._p_parts = None
+        if self._stack:
+            container, skip = self._stack.pop()
+            self._in_container -= container
+            self._in_skip -= skip
+
+    def _paragraph(self, txt: str):
+        if len(txt) < self.min_len:
+            return
+        if self._in_container:
+            self.text = txt
+            self.done = True
+        elif self.fallback and self.any_p is None:
+            self.any_p = txt
+
+    def data(self, data):
+        self._buf.append(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        if self.text is not None:
+            return self.text
+        if self.fallback:
+            return self.any_p or self.any_line or ""
+        return ""
+
+
+def first_paragraph(url: str, containers, min_len: int, fallback: bool = False, crawler=None) -> str:
+    """
+    Первый абзац статьи, читая страницу потоком и бросая чтение, как только
+    абзац найден. Контейнеры — простые селекторы (см. parse_selector); если их
+    на странице несколько, выигрывает первый по документу, в котором есть
+    подходящий абзац. Найденный абзац кэшируется по url и параметрам разбора
+    (Crawler.extract), так что повторный запуск страницу не качает.
+    """
+    def read(encoding, chunks):
+        target = FirstParagraph(containers, min_len, fallback)
+        parser = None
+        for chunk in chunks:
+            if parser is None:
+                parser = etree.HTMLParser(target=target, encoding=encoding or sniff_charset(chunk))
+            parser.feed(chunk)
+            if target.done:
+                return target.text
+        if parser is None:
+            return target.close()
+        try:
+            return parser.close()
+        except etree.XMLSyntaxError:
+            return target.close()
+
+    key = f"first_paragraph/{EXTRACT_VERSION}:{min_len}:{int(fallback)}:{'|'.join(containers)}"
+    return (crawler or default_crawler()).extract(url, key, read)
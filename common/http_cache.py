@@ -0,0 +1,289 @@
+import gzip
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+
+CACHE_DIR = "data/http_cache"
+MODE_ENV = "HOLIDAY_HTTP_CACHE"   # normal | offline | refresh | off
+
+DAY = 24 * 60 * 60
+# Сколько ответ считается свежим без обращения к сайту, по хосту (и его поддоменам).
+SOURCE_TTL = {
+    "calend.ru": 7 * DAY,
+    "my-calend.ru": 7 * DAY,
+    "wikipedia.org": 1 * DAY,
+}
+DEFAULT_TTL = 1 * DAY
+
+META_CHARSET_RE = re.compile(rb"<meta[^>]+charset=['\"]?([\w-]+)", re.I)
+
+
+class CacheMiss(Exception):
+    """В режиме offline страницы нет в кэше."""
+
+
+def ttl_for(url: str) -> int:
+    host = urlsplit(url).hostname or ""
+    for domain, ttl in SOURCE_TTL.items():
+        if host == domain or host.endswith("." + domain):
+            return ttl
+    return DEFAULT_TTL
+
+
+def sniff_charset(head: bytes) -> str:
+    """Кодировка из <meta charset> в начале страницы, иначе utf-8."""
+    m = META_CHARSET_RE.search(head[:4096])
+    return m.group(1).decode("ascii") if m else "utf-8"
+
+
+def declared_encoding(r) -> str | None:
+    """Кодировка из Content-Type ответа, None — если сайт её не указал."""
+    declared = "charset" in r.headers.get("Content-Type", "").lower()
+    return r.encoding if declared else None
+
+
+def conditional_headers(etag, last_modified) -> dict:
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+def iter_chunks(data: bytes, size: int):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+class Tee:
+    """Куски тела ответа с копией в body; complete — тело прочитано до конца."""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self.body = bytearray()
+        self.complete = False
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            self.body.extend(chunk)
+            yield chunk
+        self.complete = True
+
+
+class HttpCache:
+    """
+    Дисковый кэш HTTP-ответов для парсеров и обогатителей.
+
+    Тела хранятся сжатыми и адресуются по sha256 содержимого (одинаковые
+    страницы лежат на диске один раз), индекс url -> тело с ETag/Last-Modified
+    лежит в SQLite. Свежий ответ отдаётся с диска, устаревший перепроверяется
+    условным запросом (If-None-Match / If-Modified-Since), и на 304 тело
+    снова берётся с диска.
+
+    Для страниц, которые читаются потоком и бросаются на середине (см.
+    extract), вместо тела хранится извлечённое значение — с ETag/Last-Modified
+    ответа, из которого оно получено.
+
+    Режимы: normal — как описано; offline — только кэш, без сети
+    (промах — CacheMiss); refresh — всегда перепроверять.
+    """
+
+    def __init__(self, root: str = CACHE_DIR, mode: str = "normal"):
+        self.root = root
+        self.mode = mode
+        os.makedirs(os.path.join(root, "bodies"), exist_ok=True)
+        self._con = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+              url TEXT PRIMARY KEY,
+              body_hash TEXT NOT NULL,
+              encoding TEXT,
+              etag TEXT,
+              last_modified TEXT,
+              checked_at REAL NOT NULL
+            )
+        """)
+        self._con.execute("""
+            CREATE TABLE IF NOT EXISTS extracts (
+              url TEXT NOT NULL,
+              key TEXT NOT NULL,
+              value TEXT NOT NULL,
+              etag TEXT,
+              last_modified TEXT,
+              checked_at REAL NOT NULL,
+              PRIMARY KEY (url, key)
+            )
+        """)
+        self._con.commit()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.fetched = 0
+
+    @classmethod
+    def from_env(cls):
+        mode = os.environ.get(MODE_ENV, "normal").lower()
+        if mode == "off":
+            return None
+        return cls(mode=mode)
+
+    def _body_path(self, body_hash: str) -> str:
+        return os.path.join(self.root, "bodies", body_hash[:2], body_hash + ".gz")
+
+    def _lookup(self, url: str):
+        with self._lock:
+            return self._con.execute(
+                "SELECT body_hash, encoding, etag, last_modified, checked_at FROM responses WHERE url=?",
+                (url,),
+            ).fetchone()
+
+    def _lookup_extract(self, url: str, key: str):
+        with self._lock:
+            return self._con.execute(
+                "SELECT value, etag, last_modified, checked_at FROM extracts WHERE url=? AND key=?",
+                (url, key),
+            ).fetchone()
+
+    def _usable(self, url: str, checked_at: float) -> bool:
+        """Можно ли отдать запись без обращения к сайту."""
+        fresh = time.time() - checked_at < ttl_for(url)
+        return self.mode == "offline" or (fresh and self.mode != "refresh")
+
+    def _read(self, body_hash: str, encoding: str | None) -> str:
+        with gzip.open(self._body_path(body_hash), "rb") as f:
+            return f.read().decode(encoding or "utf-8", errors="replace")
+
+    def store(self, url: str, body: bytes, encoding, etag, last_modified):
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._body_path(body_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)
+        with self._lock:
+            self._con.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?,?,?,?,?,?)",
+                (url, body_hash, encoding, etag, last_modified, time.time()),
+            )
+            self._con.commit()
+
+    def _touch(self, url: str):
+        with self._lock:
+            self._con.execute("UPDATE responses SET checked_at=? WHERE url=?", (time.time(), url))
+            self._con.commit()
+
+    def store_extract(self, url: str, key: str, value: str, etag, last_modified, checked_at=None):
+        with self._lock:
+            self._con.execute(
+                "INSERT OR REPLACE INTO extracts VALUES (?,?,?,?,?,?)",
+                (url, key, value, etag, last_modified, checked_at or time.time()),
+            )
+            self._con.commit()
+
+    def _touch_extract(self, url: str, key: str):
+        with self._lock:
+            self._con.execute("UPDATE extracts SET checked_at=? WHERE url=? AND key=?",
+                              (time.time(), url, key))
+            self._con.commit()
+
+    def peek(self, url: str) -> str | None:
+        """
+        Тело из кэша, если его можно отдать без обращения к сайту, иначе None
+        (для потокового чтения: дочитанное тело оно сохраняет само через store).
+        """
+        entry = self._lookup(url)
+        if not entry:
+            if self.mode == "offline":
+                raise CacheMiss(url)
+            return None
+        body_hash, encoding, _, _, checked_at = entry
+        if self._usable(url, checked_at):
+            self.hits += 1
+            return self._read(body_hash, encoding)
+        return None
+
+    def get_text(self, url: str, fetch) -> str:
+        """
+        fetch(url, headers) -> requests.Response; вызывается, только если
+        кэш не может ответить сам. На ошибочный статус fetch должен бросать.
+        """
+        entry = self._lookup(url)
+        if entry:
+            body_hash, encoding, etag, last_modified, checked_at = entry
+            if self._usable(url, checked_at):
+                self.hits += 1
+                return self._read(body_hash, encoding)
+        elif self.mode == "offline":
+            raise CacheMiss(url)
+
+        r = fetch(url, conditional_headers(etag, last_modified) if entry else {})
+        if r.status_code == 304 and entry:
+            self.revalidated += 1
+            self._touch(url)
+            return self._read(body_hash, encoding)
+
+        self.fetched += 1
+        encoding = r.encoding or r.apparent_encoding
+        self.store(url, r.content, encoding, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+        return r.content.decode(encoding or "utf-8", errors="replace")
+
+    def extract(self, url: str, key: str, read, open_stream, chunk_size: int):
+        """
+        Значение read(encoding, chunks), извлечённое из страницы, с кэшем
+        самого значения по (url, key). read может бросить чтение на середине
+        тела: такое тело не сохранить, и в кэш ложится только значение с
+        ETag/Last-Modified ответа; дочитанное до конца тело сохраняется как
+        обычно. open_stream(headers) -> контекстный менеджер с потоковым
+        requests.Response, на 304 он не бросает.
+        """
+        saved = self._lookup_extract(url, key)
+        if saved and self._usable(url, saved[3]):
+            self.hits += 1
+            return saved[0]
+        entry = self._lookup(url)
+        if entry and self._usable(url, entry[4]):
+            self.hits += 1
+            return self._extract_body(url, key, read, entry, chunk_size)
+        if self.mode == "offline":
+            raise CacheMiss(url)
+
+        # Перепроверяем значение по его валидаторам, а если его нет — тело.
+        validators = saved[1:3] if saved else entry[2:4] if entry else (None, None)
+        with open_stream(conditional_headers(*validators)) as r:
+            if r.status_code == 304 and (saved or entry):
+                self.revalidated += 1
+                if saved:
+                    self._touch_extract(url, key)
+                    return saved[0]
+                self._touch(url)
+                return self._extract_body(url, key, read, entry, chunk_size)
+
+            self.fetched += 1
+            encoding = declared_encoding(r)
+            tee = Tee(r.iter_content(chunk_size))
+            value = read(encoding, tee)
+            etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+            if tee.complete:
+                body = bytes(tee.body)
+                self.store(url, body, encoding or sniff_charset(body), etag, last_modified)
+        self.store_extract(url, key, value, etag, last_modified)
+        return value
+
+    def _extract_body(self, url: str, key: str, read, entry, chunk_size: int):
+        """read по телу из кэша; значение запоминается с валидаторами тела."""
+        body_hash, encoding, etag, last_modified, checked_at = entry
+        data = self._read(body_hash, encoding).encode("utf-8")
+        value = read("utf-8", iter_chunks(data, chunk_size))
+        self.store_extract(url, key, value, etag, last_modified, checked_at)
+        return value
+
+    def close(self):
+        with self._lock:
+            self._con.close()
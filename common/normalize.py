@@ -0,0 +1,85 @@
+"""
+Нормализация названий праздников — одна на парсеры, обогатители, загрузчик и сайт.
+
+title_norm — ключ, по которому склеиваются упоминания одного праздника,
+поэтому считать его везде нужно одинаково: нижний регистр, ё -> е, всё,
+кроме латиницы, кириллицы, цифр и дефиса, — пробел, пробелы схлопнуты.
+
+NORM_VERSION пишется в meta сборки. Поменялись правила — поднимите версию:
+загрузчик увидит расхождение и пересоберёт базу с нуля, пересчитав все ключи.
+"""
+import re
+import string
+from functools import lru_cache
+
+NORM_VERSION = 1
+CACHE_SIZE = 1 << 16   # названий в памяти: повторяются из года в год и между источниками
+
+KEEP = set(string.ascii_lowercase + string.digits + "-" + "абвгдежзийклмнопрстуфхцчшщъыьэюя")
+
+CYRILLIC_RE = re.compile(r"[а-яёА-ЯЁ]")
+
+
+class _TitleTable(dict):
+    """
+    Таблица для str.translate: разрешённый символ остаётся, ё -> е,
+    остальное -> пробел. Кодовые точки заполняются при первой встрече,
+    так что таблица покрывает весь Unicode и не растёт больше нужного.
+    """
+
+    def __missing__(self, code: int) -> str:
+        ch = chr(code)
+        out = ch if ch in KEEP else " "
+        self[code] = out
+        return out
+
+
+TITLE_TABLE = _TitleTable({ord("ё"): "е"})
+YO_TABLE = str.maketrans("ёЁ", "еЕ")
+
+
+# Русские буквы -> латиница (упрощённая BGN/PCGN): для сравнения имён в названиях.
+TRANSLIT_TABLE = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh", "з": "z",
+    "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r",
+    "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh",
+    "щ": "shch", "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+})
+
+
+def transliterate(s: str) -> str:
+    """Кириллица нормализованного названия -> латиница: «валентина» -> «valentina»."""
+    return s.translate(TRANSLIT_TABLE)
+
+
+def collapse_spaces(s: str) -> str:
+    """Любые пробельные символы -> один пробел, по краям — без пробелов."""
+    return " ".join(s.split())
+
+
+def fold_yo(s: str) -> str:
+    return s.translate(YO_TABLE)
+
+
+def _normalize(s: str) -> str:
+    return " ".join(s.lower().translate(TITLE_TABLE).split())
+
+
+_normalize_cached = lru_cache(maxsize=CACHE_SIZE)(_normalize)
+
+
+def normalize_title(s: str | None) -> str:
+    """Ключ title_norm. Короткие названия берутся из LRU-кэша, длинные считаются сразу."""
+    if not s:
+        return ""
+    if len(s) > 200:
+        return _normalize(s)
+    return _normalize_cached(s)
+
+
+def detect_lang(text: str) -> str:
+    return "ru" if CYRILLIC_RE.search(text or "") else "en"
+
+
+def cache_info():
+    return _normalize_cached.cache_info()
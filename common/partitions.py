@@ -0,0 +1,119 @@
+"""
+Раскладка сырых данных по годам: data/<источник>/<год>.jsonl.
+
+Каждый парсер пишет отдельный файл на год, загрузчик по отпечатку файла
+понимает, какие годы изменились, и перечитывает только их.
+Промежуточные стадии лежат рядом с суффиксом: <год>.raw.jsonl (до обогащения).
+
+Перенести старые data/raw_*.jsonl в эту раскладку:
+    python -m common.partitions migrate
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+DATA_DIR = "data"
+SOURCES = ("calend.ru", "my-calend.ru", "wikipedia.org", "ru.wikipedia.org")
+YEAR_WORKERS = 4       # лет, которые обходятся одновременно
+
+PARTITION_RE = re.compile(r"^(\d{4})\.jsonl$")
+
+# Файлы до разбиения по годам: (путь, источник, стадия).
+LEGACY_FILES = [
+    ("data/raw_calend.jsonl", "calend.ru", ""),
+    ("data/raw_my_calend_2025.jsonl", "my-calend.ru", "raw"),
+    ("data/raw_my_calend_2025_enriched.jsonl", "my-calend.ru", ""),
+    ("data/raw_wiki_2025.jsonl", "wikipedia.org", ""),
+]
+
+
+def parse_years(spec: str) -> list[int]:
+    """'2025', '2016-2025', '2016,2020-2022' -> список лет по возрастанию."""
+    years = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            a, b = (int(x) for x in part.split("-", 1))
+            years.update(range(min(a, b), max(a, b) + 1))
+        else:
+            years.add(int(part))
+    return sorted(years)
+
+
+def default_years() -> str:
+    return str(date.today().year)
+
+
+def partition_path(source: str, year: int, stage: str = "", data_dir: str = DATA_DIR) -> str:
+    name = f"{year}.{stage}.jsonl" if stage else f"{year}.jsonl"
+    return os.path.join(data_dir, source, name)
+
+
+def discover(data_dir: str = DATA_DIR, sources=SOURCES) -> list[tuple[str, str, int]]:
+    """Готовые к загрузке разделы: (путь, источник, год), по источнику и году."""
+    found = []
+    for source in sources:
+        folder = os.path.join(data_dir, source)
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            m = PARTITION_RE.match(name)
+            if m:
+                found.append((os.path.join(folder, name), source, int(m.group(1))))
+    return sorted(found, key=lambda p: (sources.index(p[1]), p[2]))
+
+
+def fingerprint(path: str) -> tuple[int, int]:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def digest(path: str) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def for_years(years, fn, workers: int = YEAR_WORKERS) -> list:
+    """fn(year) для каждого года параллельно; результаты в порядке years."""
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(years)))) as ex:
+        return list(ex.map(fn, years))
+
+
+def migrate(data_dir: str = DATA_DIR):
+    """Раскладывает старые файлы по годам из поля date каждой строки."""
+    for path, source, stage in LEGACY_FILES:
+        if not os.path.exists(path):
+            continue
+        outs = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    year = int(json.loads(line)["date"][:4])
+                    if year not in outs:
+                        out_path = partition_path(source, year, stage, data_dir)
+                        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                        outs[year] = open(out_path + ".tmp", "w", encoding="utf-8")
+                    outs[year].write(line)
+        finally:
+            for f in outs.values():
+                f.close()
+        for year in outs:
+            out_path = partition_path(source, year, stage, data_dir)
+            os.replace(out_path + ".tmp", out_path)
+            print(f"{path} -> {out_path}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["migrate"]:
+        migrate()
+    else:
+        print(__doc__)
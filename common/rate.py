@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+INITIAL_PER_HOST = 4    # одновременных запросов к сайту на старте
+MIN_PER_HOST = 1
+MAX_PER_HOST = 16
+INCREASE = 0.25         # прирост окна за одно «окно» успешных ответов
+DECREASE = 0.5          # во сколько раз ужимать окно при перегрузке
+HOLD = 30.0             # секунд не подниматься выше окна, на котором был троттлинг
+ERROR_WINDOW = 20       # последних ответов, по которым считается доля ошибок
+ERROR_RATE = 0.25       # доля 5xx/сетевых ошибок в этом окне, при которой окно ужимается
+LATENCY_FACTOR = 2.0    # задержка выше базовой во столько раз — сайт не успевает
+LATENCY_ALPHA = 0.2     # сглаживание задержки (EWMA)
+BASE_DRIFT = 1.01       # базовая задержка медленно «забывает» старый минимум
+MAX_PAUSE = 120.0       # больше этого Retry-After не ждём
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Retry-After в секундах: число или HTTP-дата."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(float(value), MAX_PAUSE)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return min(max(0.0, when.timestamp() - time.time()), MAX_PAUSE)
+
+
+class HostLimiter:
+    """
+    AIMD-окно одновременных запросов к одному хосту.
+
+    Пока ответы приходят без ошибок и задержка держится около базовой,
+    окно растёт на INCREASE за каждое «окно» успешных ответов. На троттлинг
+    (429 или Retry-After) и выросшую задержку окно ужимается в DECREASE раз,
+    не чаще раза за время одного ответа (пачка одновременных отказов — это
+    одна перегрузка). Retry-After ставит на паузу весь хост.
+
+    Одиночные 5xx и сетевые ошибки — не перегрузка: их повторяют, а окно
+    ужимается, только если таких ответов среди последних ERROR_WINDOW
+    набралось не меньше ERROR_RATE. Иначе 5% случайных 503 держали бы окно
+    на единице весь обход.
+
+    После троттлинга окно HOLD секунд не поднимается до того размера, на
+    котором он случился: троттлинг с Retry-After стоит секунды простоя,
+    поэтому ёмкость сайта перепроверяется редко, а не каждые пару десятков
+    ответов.
+    """
+
+    def __init__(self, initial: float = INITIAL_PER_HOST, min_limit: int = MIN_PER_HOST,
+                 max_limit: int = MAX_PER_HOST, increase: float = INCREASE, decrease: float = DECREASE):
+        self.limit = float(initial)
+        self.increase = increase
+        self.decrease = decrease
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.in_flight = 0
+        self.latency = None
+        self.base_latency = None
+        self.pause_until = 0.0
+        self.last_decrease = 0.0
+        self.ceiling = float(max_limit)
+        self.ceiling_until = 0.0
+        self.recent = deque(maxlen=ERROR_WINDOW)    # True — ответ с ошибкой
+        self.ok = 0
+        self.overloaded = 0
+        self.errors = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now < self.pause_until:
+                    self._cond.wait(self.pause_until - now)
+                elif self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                else:
+                    self._cond.wait()
+
+    def release(self, latency: float, throttled: bool = False, error: bool = False,
+                retry_after: float | None = None):
+        """
+        throttled — сайт просит сбавить темп (429 или Retry-After);
+        error — 5xx без Retry-After или сетевая ошибка, которую повторят.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            self.recent.append(error)
+            if throttled:
+                self.overloaded += 1
+                self._decrease(now)
+                if retry_after:
+                    self.pause_until = max(self.pause_until, now + retry_after)
+            elif error:
+                self.errors += 1
+                if len(self.recent) == self.recent.maxlen and \
+                        sum(self.recent) >= ERROR_RATE * self.recent.maxlen:
+                    self.recent.clear()
+                    self._decrease(now, hold=False)
+            else:
+                self.ok += 1
+                self.latency = latency if self.latency is None else \
+                    LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * self.latency
+                self.base_latency = latency if self.base_latency is None else \
+                    min(latency, self.base_latency * BASE_DRIFT)
+                if self.latency > LATENCY_FACTOR * self.base_latency:
+                    self._decrease(now)
+                else:
+                    top = self.ceiling if now < self.ceiling_until else self.max_limit
+                    self.limit = max(self.limit, min(top, self.limit + self.increase / self.limit))
+            self._cond.notify_all()
+
+    def _decrease(self, now: float, hold: bool = True):
+        if now - self.last_decrease < (self.latency or 0.0):
+            return
+        if hold:
+            self.ceiling = max(self.min_limit, int(self.limit) - 1)
+            self.ceiling_until = now + HOLD
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+        self.last_decrease = now
+
+
+class RateController:
+    """Окна по хостам. Один на процесс (controller ниже), общий для всех Crawler."""
+
+    def __init__(self, **limiter_kwargs):
+        self._kwargs = limiter_kwargs
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def host(self, url: str) -> HostLimiter:
+        netloc = urlsplit(url).netloc
+        with self._lock:
+            limiter = self._hosts.get(netloc)
+            if limiter is None:
+                limiter = self._hosts[netloc] = HostLimiter(**self._kwargs)
+            return limiter
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                host: {"limit": round(h.limit, 1), "ok": h.ok, "overloaded": h.overloaded, "errors": h.errors,
+                       "latency_ms": round((h.latency or 0.0) * 1000, 1)}
+                for host, h in self._hosts.items()
+            }
+
+
+controller = RateController()
@@ -0,0 +1,150 @@
+"""
+Правила повторения праздников вместо копии на каждый год.
+
+Правило — короткая строка, она же хранится в holiday_rules.rule:
+    fixed:03-08             каждый год 8 марта
+    nth:07:3:6              третье воскресенье июля (день недели 0 — понедельник)
+    nth:07:-1:6             последнее воскресенье июля
+    easter:orthodox:+49     Троица: православная Пасха + 49 дней
+    easter:western:-2       Страстная пятница по григорианской Пасхе
+
+Загрузчик выводит правило по датам праздника из разных лет (infer),
+сайт разворачивает его в дату любого года из YEARS (expand).
+"""
+import calendar
+from datetime import date, timedelta
+from functools import lru_cache
+
+YEARS = range(1900, 2101)   # годы, для которых верны формулы Пасхи ниже
+MIN_YEARS = 2               # по одному году правило не угадать: подходит всё сразу
+EASTER_SPAN = 100           # дальше этого от Пасхи привязку к ней не ищем
+
+# При нескольких подходящих правилах берётся первое по этому порядку.
+KIND_ORDER = ("fixed", "last", "nth", "easter:western", "easter:orthodox")
+
+MONTHS_GEN = ("января", "февраля", "марта", "апреля", "мая", "июня", "июля",
+              "августа", "сентября", "октября", "ноября", "декабря")
+MONTHS_PREP = ("январе", "феврале", "марте", "апреле", "мае", "июне", "июле",
+               "августе", "сентябре", "октябре", "ноябре", "декабре")
+WEEKDAYS = ("понедельник", "вторник", "среда", "четверг", "пятница", "суббота", "воскресенье")
+# Порядковые числительные по родам: понедельник, среда, воскресенье.
+ORDINALS = {
+    1: ("первый", "первая", "первое"), 2: ("второй", "вторая", "второе"),
+    3: ("третий", "третья", "третье"), 4: ("четвёртый", "четвёртая", "четвёртое"),
+    5: ("пятый", "пятая", "пятое"), -1: ("последний", "последняя", "последнее"),
+}
+WEEKDAY_GENDER = (0, 0, 1, 0, 1, 1, 2)
+
+
+@lru_cache(maxsize=None)
+def western_easter(year: int) -> date:
+    """Григорианская Пасха (алгоритм Миза — Джонса — Бутчера)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+@lru_cache(maxsize=None)
+def orthodox_easter(year: int) -> date:
+    """Православная Пасха по юлианскому календарю, переведённая в григорианский."""
+    a, b, c = year % 4, year % 7, year % 19
+    d = (19 * c + 15) % 30
+    e = (2 * a + 4 * b - d + 34) % 7
+    month, day = divmod(d + e + 114, 31)
+    julian_shift = year // 100 - year // 400 - 2   # 13 дней в 1900–2099, 14 в 2100
+    return date(year, month, day + 1) + timedelta(days=julian_shift)
+
+
+EASTER = {"western": western_easter, "orthodox": orthodox_easter}
+
+
+def kind(rule: str) -> str:
+    if rule.startswith("easter:"):
+        return rule.rsplit(":", 1)[0]
+    if rule.startswith("nth:") and rule.split(":")[2] == "-1":
+        return "last"
+    return rule.split(":", 1)[0]
+
+
+def candidates(d: date) -> set[str]:
+    """Все правила, которые дают дату d в её году."""
+    last_day = calendar.monthrange(d.year, d.month)[1]
+    wd = d.weekday()
+    out = {
+        f"fixed:{d.month:02d}-{d.day:02d}",
+        f"nth:{d.month:02d}:{(d.day - 1) // 7 + 1}:{wd}",
+    }
+    if d.day + 7 > last_day:
+        out.add(f"nth:{d.month:02d}:-1:{wd}")
+    for name, easter in EASTER.items():
+        offset = (d - easter(d.year)).days
+        if abs(offset) <= EASTER_SPAN:
+            out.add(f"easter:{name}:{offset:+d}")
+    return out
+
+
+def infer(dates) -> str | None:
+    """
+    Правило, которое даёт ровно эти даты в их годах, или None: лет меньше
+    MIN_YEARS, две даты в одном году или ни одно правило не сходится со всеми.
+    """
+    dates = sorted(set(dates))
+    years = {d.year for d in dates}
+    if len(years) < MIN_YEARS or len(years) != len(dates) or not years <= set(YEARS):
+        return None
+    common = candidates(dates[0])
+    for d in dates[1:]:
+        common &= candidates(d)
+        if not common:
+            return None
+    return min(common, key=lambda r: (KIND_ORDER.index(kind(r)), r))
+
+
+@lru_cache(maxsize=1 << 16)
+def expand(rule: str, year: int) -> date | None:
+    """Дата праздника по правилу в году year; None, если в этом году его нет (29 февраля)."""
+    if year not in YEARS:
+        return None
+    parts = rule.split(":")
+    if parts[0] == "fixed":
+        month, day = (int(x) for x in parts[1].split("-"))
+        if day > calendar.monthrange(year, month)[1]:
+            return None
+        return date(year, month, day)
+    if parts[0] == "nth":
+        month, n, wd = int(parts[1]), int(parts[2]), int(parts[3])
+        if n < 0:
+            last = date(year, month, calendar.monthrange(year, month)[1])
+            return last - timedelta(days=(last.weekday() - wd) % 7)
+        first = date(year, month, 1)
+        d = first + timedelta(days=(wd - first.weekday()) % 7 + 7 * (n - 1))
+        return d if d.month == month else None
+    if parts[0] == "easter":
+        return EASTER[parts[1]](year) + timedelta(days=int(parts[2]))
+    raise ValueError(f"unknown recurrence rule: {rule}")
+
+
+def describe(rule: str) -> str:
+    """Правило по-русски для страницы праздника."""
+    parts = rule.split(":")
+    if parts[0] == "fixed":
+        month, day = (int(x) for x in parts[1].split("-"))
+        return f"каждый год {day} {MONTHS_GEN[month - 1]}"
+    if parts[0] == "nth":
+        month, n, wd = int(parts[1]), int(parts[2]), int(parts[3])
+        ordinal = ORDINALS[n][WEEKDAY_GENDER[wd]]
+        return f"{ordinal} {WEEKDAYS[wd]} в {MONTHS_PREP[month - 1]}"
+    if parts[0] == "easter":
+        name = "православной" if parts[1] == "orthodox" else "католической"
+        offset = int(parts[2])
+        if not offset:
+            return f"в день {name} Пасхи"
+        return f"{abs(offset)} дн. {'после' if offset > 0 else 'до'} {name} Пасхи"
+    return rule
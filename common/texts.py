@@ -0,0 +1,68 @@
+"""
+Описания праздников в таблице texts — по одному экземпляру на текст.
+
+Одно и то же описание my-calend.ru повторяется из года в год и у дублей
+упоминаний, а descriptions_dict хранит ещё копию. Поэтому mentions,
+occurrences и descriptions_dict ссылаются на texts(id), а сама строка texts
+адресуется по blake2b текста (как тела страниц в common/http_cache.py).
+
+Текст длиннее COMPRESS_FROM байт лежит сжатым zlib в BLOB, короче — как есть
+в TEXT: тип значения и говорит, нужно ли распаковывать. В SQL распаковывает
+функция text_body(body), которую register() добавляет соединению.
+"""
+import hashlib
+import zlib
+
+COMPRESS_FROM = 256     # байт UTF-8; короче zlib почти ничего не выигрывает
+LEVEL = 6               # уровень zlib: дальше выигрыш меньше процента, а сборка медленнее
+
+
+def text_hash(text: str | None) -> bytes | None:
+    if not text:
+        return None
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def pack(text: str) -> str | bytes:
+    """Значение texts.body: сжатые байты, если это короче, иначе сам текст."""
+    raw = text.encode("utf-8")
+    if len(raw) >= COMPRESS_FROM:
+        packed = zlib.compress(raw, LEVEL)
+        if len(packed) < len(raw):
+            return packed
+    return text
+
+
+def unpack(body: str | bytes | None) -> str | None:
+    if isinstance(body, bytes):
+        return zlib.decompress(body).decode("utf-8")
+    return body
+
+
+def register(conn):
+    """SQL-функции text_body(body) и text_pack(text) для запросов к texts."""
+    conn.create_function("text_body", 1, unpack, deterministic=True)
+    conn.create_function("text_pack", 1, pack, deterministic=True)
+
+
+def intern(cur, text: str | None) -> int | None:
+    """id текста в texts (добавляет, если его ещё нет); пустой текст — None."""
+    h = text_hash(text)
+    if h is None:
+        return None
+    row = cur.execute("SELECT id FROM texts WHERE hash = ?", (h,)).fetchone()
+    if row:
+        return row[0]
+    cur.execute("INSERT INTO texts(hash, body) VALUES (?,?)", (h, pack(text)))
+    return cur.lastrowid
+
+
+def sweep(cur) -> int:
+    """Удаляет тексты, на которые больше никто не ссылается. Возвращает их число."""
+    cur.execute("""
+        DELETE FROM texts
+        WHERE id NOT IN (SELECT description_id FROM mentions WHERE description_id IS NOT NULL)
+          AND id NOT IN (SELECT description_id FROM descriptions_dict)
+          AND id NOT IN (SELECT best_description_id FROM occurrences WHERE best_description_id IS NOT NULL)
+    """)
+    return cur.rowcount
@@ -0,0 +1,174 @@
+"""
+Связи между русскими и английскими праздниками: «День святого Валентина»
+с calend.ru и «Valentine's Day» из английской Википедии — разные строки
+holidays (язык определяется по названию), но один праздник для читателя.
+
+Связи считаются при сборке и лежат в таблице aliases, так что /search и
+/occurrence достают их одним соединением по индексу, а не сравнивают языки
+на каждый запрос. Кандидаты — праздники разных языков в один день. Русское
+название переводится пословно по словарю основ db/alias_dict.tsv (таблица
+alias_dict), а чего в словаре нет — транслитерируется: имена и страны
+(«португалии» -> «portugalii») узнаются по похожему написанию. Перевод
+и английское название без служебных слов сравниваются rapidfuzz.process.cdist
+сразу для всех пар дня, а похожие пары проверяются по словам: каждому слову
+одной стороны должно найтись слово другой (db.resolve.same_word), иначе
+«День Конституции Японии» связался бы с «Constitution Day (Poland)».
+"""
+import hashlib
+import time
+from itertools import groupby
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from common.normalize import transliterate
+from db.resolve import same_word
+
+DICT_PATH = "db/alias_dict.tsv"
+
+SIMILAR = 85            # token_set_ratio перевода и английского названия: отбор кандидатов
+STEM_SLACK = 4          # основа «валентин» подходит к «валентина», но не к словам длиннее на 5+ букв
+MIN_STEM = 3            # основы короче совпадают только со словом целиком («в», «и», «чай»)
+# Слова, которые есть почти в каждом названии и ничего не говорят о празднике.
+EN_STOP = frozenset(("day", "days", "of", "the", "and", "in", "on", "for", "a", "an", "to",
+                     "international", "world", "national", "see", "also", "saint", "st",
+                     "united", "nations", "un", "unesco", "observance"))
+# Уточнения, которые часто есть только на одном языке («Constitution Memorial Day (Japan)»
+# / «День Конституции Японии», «День Конституции Республики Беларусь»): им пара не нужна.
+SOFT = frozenset(("republic", "memorial", "victims", "feast"))
+
+
+class Dictionary:
+    """Основы русских слов -> английское слово; пустое слово — выбросить."""
+
+    def __init__(self, stems: dict):
+        self.stems = stems
+        self.words = {}     # слово -> перевод: названия повторяют одни и те же слова
+
+    @classmethod
+    def read(cls, path: str = DICT_PATH) -> "Dictionary":
+        stems = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line.strip() or line.startswith("#"):
+                    continue
+                ru, _, en = line.partition("\t")
+                stems[ru.strip()] = en.strip()
+        return cls(stems)
+
+    def word(self, w: str) -> str:
+        out = self.words.get(w)
+        if out is None:
+            out = transliterate(w)
+            for k in range(len(w), max(min(MIN_STEM, len(w)), len(w) - STEM_SLACK) - 1, -1):
+                en = self.stems.get(w[:k])
+                if en is not None:
+                    out = en
+                    break
+            self.words[w] = out
+        return out
+
+    def translate(self, title_norm: str) -> str:
+        """Нормализованное русское название -> английские слова для сравнения."""
+        return english_words(" ".join(self.word(w) for w in title_norm.split()))
+
+
+def english_words(title_norm: str) -> str:
+    """Без служебных слов, однобуквенных остатков («valentine s») и чисел."""
+    return " ".join(w for w in title_norm.split() if len(w) > 1 and w not in EN_STOP and not w.isdigit())
+
+
+def dict_digest(path: str = DICT_PATH) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def covers(a: str, b: str) -> bool:
+    """Каждое слово a, кроме SOFT, есть в b с точностью до опечатки или окончания."""
+    words = set(b.split())
+    return all(w in words or any(same_word(w, v) for v in words) for w in set(a.split()) - SOFT)
+
+
+def match_block(ru: list[str], en: list[str]):
+    """Пары индексов (i в ru, j в en, оценка) названий одного дня с одинаковыми словами."""
+    scores = process.cdist(ru, en, scorer=fuzz.token_set_ratio, score_cutoff=SIMILAR, dtype=np.uint8)
+    # token_set_ratio даёт 100 любому подмножеству («Новый год» ⊂ «Japanese New Year»),
+    # поэтому лишних слов не должно остаться ни с одной стороны.
+    for i, j in zip(*np.nonzero(scores)):
+        if covers(ru[i], en[j]) and covers(en[j], ru[i]):
+            yield int(i), int(j), int(scores[i, j])
+
+
+def build_aliases(conn, scoped: bool = False, path: str = DICT_PATH) -> int:
+    """
+    Пересчитывает aliases. scoped=True — только связи праздников
+    из temp.touched_holidays; если словарь поменялся с прошлой сборки,
+    всё равно пересчитывается всё. Возвращает число связанных пар.
+    """
+    t0 = time.perf_counter()
+    cur = conn.cursor()
+    digest = dict_digest(path)
+    row = cur.execute("SELECT value FROM meta WHERE key = 'alias_dict'").fetchone()
+    scoped = scoped and row is not None and row[0] == digest
+
+    dictionary = Dictionary.read(path)
+    cur.execute("DELETE FROM alias_dict")
+    cur.executemany("INSERT INTO alias_dict(ru, en) VALUES (?,?)", dictionary.stems.items())
+
+    if scoped:
+        cur.execute("""
+            DELETE FROM aliases
+            WHERE holiday_id IN (SELECT id FROM temp.touched_holidays)
+               OR alias_id IN (SELECT id FROM temp.touched_holidays)
+               OR holiday_id NOT IN (SELECT id FROM holidays)
+               OR alias_id NOT IN (SELECT id FROM holidays)
+        """)
+        where = """
+            WHERE o.date IN (
+                SELECT t.date FROM occurrences t WHERE t.holiday_id IN (SELECT id FROM temp.touched_holidays)
+            )
+        """
+        touched = {r[0] for r in cur.execute("SELECT id FROM temp.touched_holidays")}
+    else:
+        cur.execute("DELETE FROM aliases")
+        where = ""
+        touched = None
+
+    rows = cur.execute(f"""
+        SELECT o.date, h.lang, h.id, h.canonical_title_norm
+        FROM occurrences o JOIN holidays h ON h.id = o.holiday_id
+        {where}
+        ORDER BY o.date, h.lang, h.id
+    """).fetchall()
+
+    pairs = {}
+    seen = set()   # фиксированные даты из года в год дают тот же день: считаем его один раз
+    blocks = 0
+    for _, day in groupby(rows, key=lambda r: r[0]):
+        by_lang = {"ru": [], "en": []}
+        for _, lang, hid, title_norm in day:
+            if lang in by_lang:
+                by_lang[lang].append((hid, title_norm))
+        ru, en = by_lang["ru"], by_lang["en"]
+        key = (tuple(h for h, _ in ru), tuple(h for h, _ in en))
+        if not ru or not en or key in seen:
+            continue
+        seen.add(key)
+        blocks += 1
+        ru = [(h, dictionary.translate(t)) for h, t in ru]
+        en = [(h, english_words(t)) for h, t in en]
+        ru = [r for r in ru if r[1]]
+        en = [e for e in en if e[1]]
+        if not ru or not en:
+            continue
+        for i, j, score in match_block([t for _, t in ru], [t for _, t in en]):
+            a, b = ru[i][0], en[j][0]
+            if touched is None or a in touched or b in touched:
+                pairs[a, b] = max(score, pairs.get((a, b), 0))
+
+    cur.executemany("INSERT OR REPLACE INTO aliases(holiday_id, alias_id, score) VALUES (?,?,?)",
+                    [(a, b, s) for (a, b), s in pairs.items()] + [(b, a, s) for (a, b), s in pairs.items()])
+    cur.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('alias_dict', ?)", (digest,))
+    print(f"Aliases: {blocks} days, {len(pairs)} ru/en pairs in {time.perf_counter() - t0:.1f}s")
+    return len(pairs)
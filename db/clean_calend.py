@@ -1,5 +1,7 @@
 import json
-import re
+
+from common.normalize import collapse_spaces, normalize_title
+from common.partitions import discover
 
 def is_probably_menu(text: str) -> bool:
     t = text.lower()
@@ -12,7 +14,7 @@ def is_probably_menu(text: str) -> bool:
 
 def split_title_description(text: str):
 
-    text = re.sub(r"\s+", " ", text).strip()
+    text = collapse_spaces(text)
 
     if " — " in text:
         left, right = text.split(" — ", 1)
@@ -27,19 +29,17 @@ def split_title_description(text: str):
     desc = text
     return title, desc
 
-def normalize_title(s: str) -> str:
-    s = s.lower().strip().replace("ё", "е")
-    s = re.sub(r"[^a-zа-я0-9\s\-]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+def iter_lines():
+    for path, _, _ in discover(sources=("calend.ru",)):
+        with open(path, "r", encoding="utf-8") as f_in:
+            yield from f_in
 
 def main():
-    inp = "data/raw_calend.jsonl"
     out = "data/clean_calend.jsonl"
 
     cleaned = 0
-    with open(inp, "r", encoding="utf-8") as f_in, open(out, "w", encoding="utf-8") as f_out:
-        for line in f_in:
+    with open(out, "w", encoding="utf-8") as f_out:
+        for line in iter_lines():
             item = json.loads(line)
             raw = item.get("title_raw", "").strip()
             if not raw:
@@ -0,0 +1,343 @@
+"""
+Обогащение описаниями: один движок для calend.ru и my-calend.ru.
+
+Страницы скачиваются параллельно, каждая ссылка — один раз, даже если на неё
+ссылается много записей. Результаты пишет один поток-писатель пачками
+в транзакциях: в копию базы (UPDATE mentions), которая в конце подменяет
+рабочую, или в JSONL.
+
+    python -m db.enrich --target db [--db db/holidays.sqlite] [--source calend.ru]
+    python -m db.enrich --target jsonl --years 2016-2025   # data/my-calend.ru/<год>.raw.jsonl -> <год>.jsonl
+    python -m db.enrich --target jsonl --in raw.jsonl --out enriched.jsonl
+"""
+import argparse
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from itertools import groupby
+
+from common import texts
+from common.crawl import crawl_ordered
+from common.html_stream import first_paragraph
+from common.normalize import collapse_spaces
+from common.partitions import default_years, parse_years, partition_path
+from db.load_and_dedupe import DB_PATH, create_touched_tables, open_build, publish, refresh_descriptions
+
+WORKERS = 10
+BATCH = 200            # записей на транзакцию писателя
+FLUSH_EVERY = 2.0      # секунд; неполная пачка тоже пишется
+PROGRESS_EVERY = 200   # ссылок между строками прогресса
+
+MY_CALEND_CONTAINERS = ("[itemprop='articleBody']", ".entry-content", ".post-content", ".content", "article")
+
+BAD_TAIL = (
+    "Календарь праздников", "Календарь народных праздников",
+    "Даты международных знаменательных событий",
+    "Краткая история и традиции праздника",
+    "Краткая история и значение события",
+)
+DATE_PREFIX_RE = re.compile(r"^\d{1,2}\s+[а-яё]+\s+\d{4}\s*[-–—]\s*", re.I)
+BAD_TAIL_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, BAD_TAIL)) + r")\b\.?", re.I)
+
+
+def clean_description(desc: str, title: str = "") -> str:
+    d = collapse_spaces(desc or "")
+
+    d = DATE_PREFIX_RE.sub("", d)
+
+    if title:
+        t = collapse_spaces(title)
+        if t and d.lower().startswith(t.lower()):
+            d = d[len(t):].lstrip(" .:-–—")
+
+    d = collapse_spaces(BAD_TAIL_RE.sub("", d))
+
+    if len(d) < 60:
+        return ""
+    return d
+
+
+def extract_calend(url: str, title: str, crawler=None) -> str:
+    return first_paragraph(url, ("div#article", "div.content"), 81, crawler=crawler)
+
+
+def extract_my_calend(url: str, title: str, crawler=None) -> str:
+    desc = first_paragraph(url, MY_CALEND_CONTAINERS, 80, fallback=True, crawler=crawler)
+    return clean_description(desc, title=title)
+
+
+# Источник -> extractor(url, title, crawler) -> описание или "".
+EXTRACTORS = {
+    "calend.ru": extract_calend,
+    "my-calend.ru": extract_my_calend,
+}
+
+
+class Job:
+    """Одна ссылка и все записи (ключи цели), которым нужно её описание."""
+
+    __slots__ = ("url", "source", "title", "keys")
+
+    def __init__(self, url: str, source: str, title: str, keys: list):
+        self.url = url
+        self.source = source
+        self.title = title
+        self.keys = keys
+
+
+class DbTarget:
+    """
+    mentions без описания -> описание в texts, ссылка на него в mentions.description_id.
+
+    Пишет не в рабочую базу, а в её копию (load_and_dedupe.open_build); в конце
+    пересобирает зависящие от описаний таблицы для затронутых дат и подменяет
+    рабочую базу копией, так что веб-приложение видит обогащение целиком.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, sources=tuple(EXTRACTORS)):
+        self.db_path = db_path
+        self.sources = tuple(sources)
+        self.rows_written = 0
+        self.build_path = None
+        self.base = None    # build_id рабочей базы, с которой снята копия
+        self._con = None
+
+    def jobs(self):
+        con, self.build_path = open_build(self.db_path, copy=True)
+        # Читаем всё заранее и закрываем соединение: писатель живёт в своём потоке.
+        with con:
+            self.base = (con.execute("SELECT value FROM meta WHERE key = 'build_id'").fetchone() or (None,))[0]
+            rows = con.execute(f"""
+                SELECT m.url, s.name, m.title_raw, m.id
+                FROM mentions m
+                JOIN sources s ON s.id = m.source_id
+                WHERE m.description_id IS NULL
+                  AND m.url != ''
+                  AND s.name IN ({",".join("?" * len(self.sources))})
+                ORDER BY m.url, m.id
+            """, self.sources).fetchall()
+        con.close()
+        for (url, source), group in groupby(rows, key=lambda r: (r[0], r[1])):
+            group = list(group)
+            yield Job(url, source, group[0][2], [r[3] for r in group])
+
+    def write(self, batch):
+        if self._con is None:
+            self._con = sqlite3.connect(self.build_path)
+            create_touched_tables(self._con.cursor())
+        with self._con:
+            cur = self._con.cursor()
+            rows = []
+            for job, desc in batch:
+                if desc:
+                    text_id = texts.intern(cur, desc)
+                    rows.extend((text_id, key) for key in job.keys)
+            cur.executemany("UPDATE mentions SET description_id=? WHERE id=?", rows)
+            cur.executemany("""
+                INSERT OR IGNORE INTO touched_occ(id) SELECT occurrence_id FROM mentions WHERE id = ?
+            """, [(key,) for _, key in rows])
+        self.rows_written += len(rows)
+
+    def close(self):
+        if not self.rows_written:
+            if self._con is not None:
+                self._con.close()
+            os.remove(self.build_path)
+            return
+        with self._con:
+            refresh_descriptions(self._con.cursor())
+        publish(self._con, self.build_path, self.db_path, vacuum=False, base=self.base)
+
+
+class JsonlTarget:
+    """
+    JSONL -> тот же JSONL с description; пар (вход, выход) может быть
+    несколько (по файлу на год), ссылки общие для всех. Входные файлы
+    читаются дважды: сначала за ссылками, потом при записи результата,
+    так что в памяти только найденные описания по ссылкам, а не все строки.
+    """
+
+    def __init__(self, pairs):
+        self.pairs = list(pairs)
+        self.rows_written = 0
+        self._found = {}
+
+    @staticmethod
+    def _rows(path: str):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    @staticmethod
+    def _url(obj) -> str:
+        return (obj.get("holiday_url") or "").strip()
+
+    def jobs(self):
+        jobs = {}
+        for n, (in_path, _) in enumerate(self.pairs):
+            for i, obj in enumerate(self._rows(in_path)):
+                url = self._url(obj)
+                source = obj.get("source")
+                if not url or source not in EXTRACTORS:
+                    continue
+                if url not in jobs:
+                    jobs[url] = Job(url, source, (obj.get("title_raw") or "").strip(), [])
+                jobs[url].keys.append((n, i))
+        return iter(jobs.values())
+
+    def write(self, batch):
+        for job, desc in batch:
+            if desc:
+                self._found[job.url] = desc
+
+    def close(self):
+        for in_path, out_path in self.pairs:
+            tmp = out_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as out:
+                for obj in self._rows(in_path):
+                    obj["description"] = self._found.get(self._url(obj), "")
+                    self.rows_written += bool(obj["description"])
+                    out.write(json.dumps(obj, ensure_ascii=False) + "\n")
+            os.replace(tmp, out_path)
+
+
+def year_pairs(source: str, years) -> list[tuple[str, str]]:
+    """(сырой раздел, обогащённый раздел) для каждого года, где сырой есть."""
+    pairs = [(partition_path(source, y, "raw"), partition_path(source, y)) for y in years]
+    return [(a, b) for a, b in pairs if os.path.exists(a)]
+
+
+class Progress:
+    def __init__(self, every: int = PROGRESS_EVERY):
+        self.every = every
+        self.started = time.perf_counter()
+        self.done = 0
+        self.ok = 0
+        self.empty = 0
+        self.errors = 0
+
+    def add(self, desc, err):
+        self.done += 1
+        if err:
+            self.errors += 1
+        elif desc:
+            self.ok += 1
+        else:
+            self.empty += 1
+        if self.done % self.every == 0:
+            self.report()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed else 0.0
+        print(f"[{self.done} urls] ok={self.ok} empty={self.empty} errors={self.errors} "
+              f"({rate:.1f} urls/s)")
+
+
+class Writer(threading.Thread):
+    """
+    Единственный поток, который пишет в цель: пачки по BATCH или раз
+    в FLUSH_EVERY. Он же в конце закрывает цель (соединение SQLite живёт
+    в одном потоке).
+    """
+
+    _STOP = object()
+
+    def __init__(self, target, batch: int = BATCH, flush_every: float = FLUSH_EVERY):
+        super().__init__(name="enrich-writer", daemon=True)
+        self.target = target
+        self.batch = batch
+        self.flush_every = flush_every
+        self.queue = queue.Queue(maxsize=batch * 4)
+        self.error = None
+
+    def put(self, job, desc):
+        self.queue.put((job, desc))
+
+    def finish(self):
+        self.queue.put(self._STOP)
+        self.join()
+        if self.error:
+            raise self.error
+
+    def run(self):
+        pending = []
+        stopped = False
+        deadline = time.monotonic() + self.flush_every
+        try:
+            while not stopped:
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    item = None
+                if item is self._STOP:
+                    stopped = True
+                elif item is not None:
+                    pending.append(item)
+                now = time.monotonic()
+                if pending and (stopped or len(pending) >= self.batch or now >= deadline):
+                    self.target.write(pending)
+                    pending = []
+                if now >= deadline:
+                    deadline = now + self.flush_every
+            self.target.close()
+        except Exception as e:
+            self.error = e
+            # Не даём производителю повиснуть на полной очереди.
+            while not stopped:
+                stopped = self.queue.get() is self._STOP
+
+
+def enrich(target, workers: int = WORKERS, crawler=None):
+    jobs = list(target.jobs())
+    print("Need to enrich:", sum(len(j.keys) for j in jobs), "records,", len(jobs), "unique urls")
+
+    def fetch(job):
+        return EXTRACTORS[job.source](job.url, job.title, crawler)
+
+    progress = Progress()
+    writer = Writer(target)
+    writer.start()
+    try:
+        for job, desc, err in crawl_ordered(jobs, fetch, workers):
+            if err:
+                print(f"[ERROR] {job.source} -> {job.url} :: {err}")
+            progress.add(desc, err)
+            writer.put(job, desc or "")
+    finally:
+        writer.finish()
+
+    progress.report()
+    print("Records updated:", target.rows_written)
+    return progress
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--target", choices=("db", "jsonl"), required=True)
+    ap.add_argument("--db", default=DB_PATH)
+    ap.add_argument("--source", action="append", choices=sorted(EXTRACTORS),
+                    help="только этот источник (можно несколько раз)")
+    ap.add_argument("--years", default=default_years(), help="годы разделов my-calend.ru для --target jsonl")
+    ap.add_argument("--in", dest="in_path", help="вместо разделов: один входной JSONL")
+    ap.add_argument("--out", dest="out_path")
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    args = ap.parse_args()
+
+    if args.target == "db":
+        target = DbTarget(args.db, args.source or tuple(EXTRACTORS))
+    elif args.in_path:
+        if not args.out_path:
+            ap.error("--in needs --out")
+        target = JsonlTarget([(args.in_path, args.out_path)])
+    else:
+        target = JsonlTarget(year_pairs("my-calend.ru", parse_years(args.years)))
+    enrich(target, args.workers)
+
+
+if __name__ == "__main__":
+    main()
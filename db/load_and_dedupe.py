@@ -1,57 +1,294 @@
+import argparse
+import fcntl
+import hashlib
 import json
 import os
 import re
+import secrets
 import sqlite3
-from datetime import datetime
+import time
+from datetime import date, datetime
+from itertools import groupby
+
+from common import texts
+from common.normalize import NORM_VERSION, detect_lang, normalize_title
+from common.partitions import digest, discover, fingerprint
+from common.recurrence import infer
+from db.aliases import build_aliases, dict_digest
+from db.load_my_calend_dict import load_dict
+from db.propagate import propagate
+from db.resolve import resolve
 
 DB_PATH = "db/holidays.sqlite"
 SCHEMA_PATH = "db/schema.sql"
+# Версия схемы в meta: --incremental поверх базы другой версии пересобирает её с нуля.
+SCHEMA_VERSION = 3
 
-FILES = [
-    ("data/raw_calend.jsonl", "calend.ru"),
-    ("data/raw_my_calend_2025_enriched.jsonl", "my-calend.ru"),
-    ("data/raw_wiki_2025.jsonl", "wikipedia.org"),
-]
 
-def normalize_title(s: str) -> str:
-    s = (s or "").lower().strip().replace("ё", "е")
-    s = re.sub(r"[^a-zа-я0-9\s\-]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+# Порядок источников при выборе описания: первый — самый приоритетный.
+SOURCE_PRIORITY = ("my-calend.ru", "calend.ru", "wikipedia.org", "ru.wikipedia.org")
 
-def detect_lang(text: str) -> str:
-    return "ru" if re.search(r"[а-яё]", (text or "").lower()) else "en"
+BULK_BATCH = 50_000
+# Индексы, которые в bulk-режиме создаются уже после заливки данных.
+BULK_DEFERRED_INDEXES = ("idx_occurrences_date", "idx_mentions_occurrence", "idx_mentions_source", "idx_mentions_hash")
 
-def main():
-    os.makedirs("db", exist_ok=True)
+REF_RE = re.compile(r"\[\s*\d+\s*\]")
+LANG_SUFFIX_RE = re.compile(r"\s*\((ru|en)\)\s*$", re.I)
+DAY_NUMBER_RE = re.compile(r"\d+\s*день")
+BAD_STARTS = ("именины", "народный календарь", "хроника", "персоны", "ближайшие дни")
+BAD_EXACT = {"праздники", "международные праздники", "католические праздники", "православные праздники"}
 
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+def fold_sql(expr: str) -> str:
+    return f"replace(replace({expr}, 'ё', 'е'), 'Ё', 'Е')"
 
-    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
-        cur.executescript(f.read())
-    conn.commit()
+def build_search_index(cur, scoped: bool = False):
+    """scoped=True — пересобрать только праздники из temp.touched_holidays."""
+    texts.register(cur.connection)
+    if scoped:
+        cur.execute("DELETE FROM holidays_fts WHERE rowid IN (SELECT id FROM temp.touched_holidays)")
+        where = "WHERE h.id IN (SELECT id FROM temp.touched_holidays)"
+    else:
+        cur.execute("DELETE FROM holidays_fts")
+        where = ""
+    cur.execute(f"""
+        INSERT INTO holidays_fts(rowid, title, descriptions)
+        SELECT h.id,
+               {fold_sql("h.canonical_title")},
+               {fold_sql("coalesce(d.descriptions, '')")}
+        FROM holidays h
+        LEFT JOIN (
+            SELECT u.holiday_id, group_concat(text_body(t.body), ' … ') AS descriptions
+            FROM (
+                SELECT DISTINCT o.holiday_id, m.description_id
+                FROM mentions m
+                JOIN occurrences o ON o.id = m.occurrence_id
+                WHERE m.description_id IS NOT NULL
+            ) AS u
+            JOIN texts t ON t.id = u.description_id
+            GROUP BY u.holiday_id
+        ) AS d ON d.holiday_id = h.id
+        {where}
+    """)
+    if not scoped:
+        cur.execute("INSERT INTO holidays_fts(holidays_fts) VALUES ('optimize')")
+
+DATE_SUMMARY_QUERY = """
+    SELECT occ_id, title, lang, has_desc
+    FROM date_summary
+    WHERE date = ?
+    ORDER BY sort_key
+    LIMIT 700
+"""
+
+def build_best_descriptions(cur, scoped: bool = False):
+    where = "WHERE id IN (SELECT id FROM temp.touched_occ)" if scoped else ""
+    cur.execute(f"""
+        UPDATE occurrences SET (best_source, best_description_id) = (
+            SELECT s.name, m.description_id
+            FROM mentions m
+            JOIN sources s ON s.id = m.source_id
+            WHERE m.occurrence_id = occurrences.id
+              AND m.description_id IS NOT NULL
+            ORDER BY s.priority, m.id
+            LIMIT 1
+        )
+        {where}
+    """)
+
+def build_date_summary(cur, scoped: bool = False):
+    if scoped:
+        cur.execute("DELETE FROM date_summary WHERE date IN (SELECT date FROM temp.touched_dates)")
+        where = "AND o.date IN (SELECT date FROM temp.touched_dates)"
+    else:
+        cur.execute("DELETE FROM date_summary")
+        where = ""
+    cur.execute(f"""
+        INSERT INTO date_summary(date, sort_key, occ_id, title, lang, has_desc)
+        SELECT
+            date,
+            ROW_NUMBER() OVER (
+                PARTITION BY date
+                ORDER BY CASE WHEN lang='ru' THEN 0 ELSE 1 END, has_desc DESC, title
+            ),
+            occ_id, title, lang, has_desc
+        FROM (
+            SELECT
+                o.date,
+                o.id AS occ_id,
+                h.canonical_title AS title,
+                h.lang,
+                o.best_description_id IS NOT NULL AS has_desc
+            FROM occurrences o
+            JOIN holidays h ON h.id = o.holiday_id
+            WHERE EXISTS (SELECT 1 FROM mentions m WHERE m.occurrence_id = o.id)
+            {where}
+        )
+    """)
+
+def build_rules(cur, scoped: bool = False) -> int:
+    """
+    Выводит правило повторения для каждого праздника по его датам.
+    Образцом для ссылки берётся последняя дата с описанием, иначе просто последняя.
+    """
+    if scoped:
+        cur.execute("DELETE FROM holiday_rules WHERE holiday_id IN (SELECT id FROM temp.touched_holidays)")
+        where = "AND o.holiday_id IN (SELECT id FROM temp.touched_holidays)"
+    else:
+        cur.execute("DELETE FROM holiday_rules")
+        where = ""
+    rows = cur.execute(f"""
+        SELECT o.holiday_id, o.date, o.id, o.best_description_id IS NOT NULL
+        FROM occurrences o
+        WHERE EXISTS (SELECT 1 FROM mentions m WHERE m.occurrence_id = o.id)
+        {where}
+        ORDER BY o.holiday_id, o.date
+    """).fetchall()
+
+    rules = []
+    for hid, group in groupby(rows, key=lambda r: r[0]):
+        group = list(group)
+        rule = infer(date.fromisoformat(r[1]) for r in group)
+        if rule:
+            sample = max(group, key=lambda r: (r[3], r[1]))
+            rules.append((hid, rule, sample[2], len({r[1][:4] for r in group})))
+    cur.executemany("INSERT INTO holiday_rules(holiday_id, rule, occ_id, years) VALUES (?,?,?,?)", rules)
+    return len(rules)
+
+def check_date_summary_plan(cur):
+    """/date должен читать date_summary одним диапазоном индекса, без сортировки."""
+    plan = [row[-1] for row in cur.execute("EXPLAIN QUERY PLAN " + DATE_SUMMARY_QUERY, ("2025-01-01",))]
+    if any("TEMP B-TREE" in step or step.startswith("SCAN") for step in plan):
+        raise RuntimeError(f"date_summary query plan regressed: {plan}")
+    return plan
+
+def clean_record(obj: dict):
+    """
+    Приводит строку JSONL к (date, title_raw, title_norm, lang, url, description)
+    или возвращает None, если это не праздник, у него нет ссылки или дата
+    не настоящая («2025-02-30» из заголовка дня парсеры не проверяют).
+    """
+    date_str = obj.get("date")
+    title_raw = (obj.get("title_raw") or "").strip()
+    if not date_str or not title_raw:
+        return None
+    try:
+        date_str = date.fromisoformat(date_str).isoformat()
+    except (TypeError, ValueError):
+        return None
+
+    title_raw = REF_RE.sub("", title_raw).strip()
+    title_raw = LANG_SUFFIX_RE.sub("", title_raw).strip()
+
+    low = title_raw.lower()
+
+    if DAY_NUMBER_RE.fullmatch(low):
+        return None
+    if low.startswith(BAD_STARTS) or low in BAD_EXACT:
+        return None
+
+    # title_norm из файла не берём: ключ считается здесь, одной версией нормализации.
+    title_norm = normalize_title(title_raw)
+    if not title_norm:
+        return None
+
+    url = obj.get("holiday_url") or obj.get("url") or ""
+    if not url:
+        return None
+
+    description = (obj.get("description") or "").strip()
+    return date_str, title_raw, title_norm, detect_lang(title_raw), url, description
+
+def content_hash(source: str, date_str: str, title_norm: str, url: str, description: str) -> bytes:
+    """Отпечаток упоминания: совпадает, только если источник отдал ту же строку."""
+    key = "\x1f".join((source, date_str, title_norm, url, description))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
 
-    source_cache = {}
+def iter_records(path: str, year: int | None = None):
+    """Записи файла; для раздела года — только даты этого года."""
+    prefix = f"{year}-" if year is not None else ""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            rec = clean_record(json.loads(line))
+            if rec and rec[0].startswith(prefix):
+                yield rec
+
+def get_source_id(cur, name: str) -> int:
+    priority = SOURCE_PRIORITY.index(name) if name in SOURCE_PRIORITY else 9
+    cur.execute("INSERT OR IGNORE INTO sources(name, priority) VALUES (?,?)", (name, priority))
+    cur.execute("UPDATE sources SET priority=? WHERE name=?", (priority, name))
+    cur.execute("SELECT id FROM sources WHERE name=?", (name,))
+    return cur.fetchone()[0]
+
+def as_partitions(files) -> list:
+    """(путь, источник[, год]) -> (путь, источник, год или None)."""
+    return [(f[0], f[1], f[2] if len(f) > 2 else None) for f in files]
+
+def read_built(db_path: str, sql: str, params=()) -> list:
+    """Строки запроса к рабочей базе только на чтение; нет базы или таблицы — пусто."""
+    if not os.path.exists(db_path):
+        return []
+    con = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    try:
+        return con.execute(sql, params).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        con.close()
+
+def read_partitions(db_path: str) -> dict:
+    """Разделы, из которых собрана рабочая база: путь -> (источник, год, size, mtime_ns, digest)."""
+    rows = read_built(db_path, "SELECT path, source, year, size, mtime_ns, digest FROM partitions")
+    return {r[0]: r[1:] for r in rows}
+
+def read_meta(db_path: str, key: str) -> str | None:
+    rows = read_built(db_path, "SELECT value FROM meta WHERE key = ?", (key,))
+    return rows[0][0] if rows else None
+
+def read_norm_version(db_path: str) -> int | None:
+    value = read_meta(db_path, "norm_version")
+    return int(value) if value else None
+
+def diff_partitions(files, known: dict):
+    """
+    Сравнивает разделы на диске с записанными в базе. Совпали размер и
+    mtime — файл не читаем; иначе сверяем хэш содержимого.
+    Возвращает (изменённые, все текущие с отпечатками, удалённые).
+    """
+    changed, current = [], []
+    for path, source, year in as_partitions(files):
+        size, mtime_ns = fingerprint(path)
+        old = known.get(path)
+        if old and old[2] == size and old[3] == mtime_ns:
+            dg = old[4]
+        else:
+            dg = digest(path)
+            if not old or old[4] != dg:
+                changed.append((path, source, year))
+        current.append((path, source, year, size, mtime_ns, dg))
+    present = {c[0] for c in current}
+    removed = [(path, v[0], v[1]) for path, v in known.items() if path not in present]
+    return changed, current, removed
+
+def record_partitions(cur, current):
+    cur.execute("DELETE FROM partitions")
+    cur.executemany("INSERT INTO partitions(path, source, year, size, mtime_ns, digest) VALUES (?,?,?,?,?,?)",
+                    current)
+
+def load_rows(conn, files, now: str) -> int:
+    """Построчная загрузка: по запросу на каждую строку, годится для небольших файлов."""
+    cur = conn.cursor()
     holiday_cache = {}
     occurrence_cache = {}
-    now = datetime.utcnow().isoformat(timespec="seconds")
-
-    def get_source_id(name: str) -> int:
-        if name in source_cache:
-            return source_cache[name]
-        cur.execute("INSERT OR IGNORE INTO sources(name) VALUES (?)", (name,))
-        cur.execute("SELECT id FROM sources WHERE name=?", (name,))
-        sid = cur.fetchone()[0]
-        source_cache[name] = sid
-        return sid
 
     def get_holiday_id(title_raw: str, title_norm: str, lang: str) -> int:
         key = (lang, title_norm)
         if key in holiday_cache:
             return holiday_cache[key]
-        cur.execute("SELECT id FROM holidays WHERE canonical_title_norm=? AND lang=?", (title_norm, lang))
+        cur.execute("SELECT holiday_id FROM title_map WHERE lang=? AND title_norm=?", (lang, title_norm))
         row = cur.fetchone()
+        if not row:
+            cur.execute("SELECT id FROM holidays WHERE canonical_title_norm=? AND lang=?", (title_norm, lang))
+            row = cur.fetchone()
         if row:
             hid = row[0]
         else:
@@ -73,69 +310,424 @@ def main():
         occurrence_cache[key] = oid
         return oid
 
-    for path, source_name in FILES:
-        sid = get_source_id(source_name)
+    total = 0
+    for path, source_name, year in as_partitions(files):
+        sid = get_source_id(cur, source_name)
         loaded_here = 0
 
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                obj = json.loads(line)
+        for date_str, title_raw, title_norm, lang, url, description in iter_records(path, year):
+            hid = get_holiday_id(title_raw, title_norm, lang)
+            oid = get_occurrence_id(hid, date_str)
 
-                date_str = obj.get("date")
-                title_raw = (obj.get("title_raw") or "").strip()
-                if not date_str or not title_raw:
-                    continue
+            cur.execute(
+                """INSERT OR IGNORE INTO mentions(occurrence_id, source_id, title_raw, title_norm, description_id, url,
+                                                  date_parsed, content_hash)
+                   VALUES (?,?,?,?,?,?,?,?)""",
+                (oid, sid, title_raw, title_norm, texts.intern(cur, description), url, now,
+                 content_hash(source_name, date_str, title_norm, url, description))
+            )
 
-                title_raw = re.sub(r"\[\s*\d+\s*\]", "", title_raw).strip()
-                title_raw = re.sub(r"\s*\((ru|en)\)\s*$", "", title_raw, flags=re.I).strip()
+            loaded_here += cur.rowcount
+            if cur.rowcount and loaded_here % 2000 == 0:
+                print(f"{source_name}: loaded {loaded_here}")
 
-                low = title_raw.lower()
+        conn.commit()
+        print(f"Loaded {source_name}: {loaded_here} mentions")
+        total += loaded_here
+    return total
 
-                if re.fullmatch(r"\d+\s*день", low):
-                    continue
+def stage_files(cur, files) -> list:
+    """Потоково складывает JSONL в temp.staging пачками executemany. Возвращает id источников."""
+    cur.execute("DROP TABLE IF EXISTS temp.staging")
+    cur.execute("""
+        CREATE TEMP TABLE staging (
+          source_id INTEGER NOT NULL,
+          date TEXT NOT NULL,
+          title_raw TEXT NOT NULL,
+          title_norm TEXT NOT NULL,
+          lang TEXT NOT NULL,
+          url TEXT NOT NULL,
+          description TEXT NOT NULL,
+          description_hash BLOB,
+          content_hash BLOB NOT NULL,
+          holiday_id INTEGER
+        )
+    """)
+    insert = "INSERT INTO staging VALUES (?,?,?,?,?,?,?,?,?,NULL)"
 
-                bad_starts = ("именины", "народный календарь", "хроника", "персоны", "ближайшие дни")
-                if low.startswith(bad_starts):
-                    continue
-                if low in {"праздники", "международные праздники", "католические праздники", "православные праздники"}:
-                    continue
+    t0 = time.perf_counter()
+    staged = 0
+    source_ids = []
+    for path, source_name, year in as_partitions(files):
+        sid = get_source_id(cur, source_name)
+        source_ids.append(sid)
+        batch = []
+        for rec in iter_records(path, year):
+            date_str, _title_raw, title_norm, _lang, url, description = rec
+            batch.append((sid, *rec, texts.text_hash(description),
+                          content_hash(source_name, date_str, title_norm, url, description)))
+            if len(batch) >= BULK_BATCH:
+                cur.executemany(insert, batch)
+                staged += len(batch)
+                batch = []
+        if batch:
+            cur.executemany(insert, batch)
+            staged += len(batch)
+        print(f"Staged {source_name}: {staged} rows so far")
+    dt = time.perf_counter() - t0
+    print(f"Parsed and staged {staged} rows in {dt:.1f}s ({staged / max(dt, 1e-9):,.0f} rows/s)")
+    return source_ids
 
-                title_norm = obj.get("title_norm") or normalize_title(title_raw)
-                if not title_norm:
-                    continue
+def apply_staging(cur, now: str, track: bool = False) -> int:
+    """
+    Добавляет из staging упоминания, которых ещё нет в базе (по content_hash),
+    вместе с их праздниками и датами. Всё делается несколькими INSERT ... SELECT.
+    С track=True затронутые даты попадают в temp.touched_occ.
+    """
+    texts.register(cur.connection)
+    # Дубли внутри снимка и строки, уже лежащие в базе, сразу отбрасываем.
+    cur.execute("""
+        DELETE FROM staging
+        WHERE rowid NOT IN (SELECT MIN(rowid) FROM staging GROUP BY content_hash)
+           OR content_hash IN (SELECT content_hash FROM mentions)
+    """)
 
-                lang = detect_lang(title_raw)
+    # Новый праздник получает заголовок из первой по порядку строки, как и при построчной загрузке.
+    cur.execute("""
+        INSERT INTO holidays(canonical_title, canonical_title_norm, lang)
+        SELECT s.title_raw, s.title_norm, s.lang
+        FROM staging s
+        JOIN (SELECT MIN(rowid) AS rid FROM staging GROUP BY lang, title_norm) AS first ON first.rid = s.rowid
+        WHERE NOT EXISTS (
+            SELECT 1 FROM holidays h WHERE h.canonical_title_norm = s.title_norm AND h.lang = s.lang
+        )
+          AND NOT EXISTS (
+            SELECT 1 FROM title_map t WHERE t.title_norm = s.title_norm AND t.lang = s.lang
+        )
+        ORDER BY s.rowid
+    """)
+    # Ключи, слитые сопоставлением с другим праздником, идут в него (title_map).
+    cur.execute("""
+        UPDATE staging SET holiday_id = coalesce(
+            (SELECT t.holiday_id FROM title_map t
+             WHERE t.title_norm = staging.title_norm AND t.lang = staging.lang),
+            (SELECT h.id FROM holidays h
+             WHERE h.canonical_title_norm = staging.title_norm AND h.lang = staging.lang)
+        )
+    """)
+    cur.execute("""
+        INSERT OR IGNORE INTO occurrences(holiday_id, date)
+        SELECT holiday_id, date FROM staging
+        GROUP BY holiday_id, date
+        ORDER BY MIN(rowid)
+    """)
+    # Каждое новое описание сжимается и кладётся в texts один раз, упоминания ссылаются на него.
+    cur.execute("""
+        INSERT INTO texts(hash, body)
+        SELECT description_hash, text_pack(MIN(description))
+        FROM staging
+        WHERE description_hash IS NOT NULL
+          AND description_hash NOT IN (SELECT hash FROM texts)
+        GROUP BY description_hash
+        ORDER BY MIN(rowid)
+    """)
+    cur.execute("""
+        INSERT INTO mentions(occurrence_id, source_id, title_raw, title_norm, description_id, url,
+                             date_parsed, content_hash)
+        SELECT o.id, s.source_id, s.title_raw, s.title_norm, t.id, s.url, ?, s.content_hash
+        FROM staging s
+        JOIN occurrences o ON o.holiday_id = s.holiday_id AND o.date = s.date
+        LEFT JOIN texts t ON t.hash = s.description_hash
+        ORDER BY s.rowid
+    """, (now,))
+    inserted = cur.rowcount
+    if track:
+        cur.execute("""
+            INSERT OR IGNORE INTO touched_occ(id)
+            SELECT o.id FROM staging s JOIN occurrences o ON o.holiday_id = s.holiday_id AND o.date = s.date
+        """)
+    return inserted
 
-                hid = get_holiday_id(title_raw, title_norm, lang)
-                oid = get_occurrence_id(hid, date_str)
+def create_touched_tables(cur):
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS touched_occ (id INTEGER PRIMARY KEY)")
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS touched_dates (date TEXT PRIMARY KEY)")
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS touched_holidays (id INTEGER PRIMARY KEY)")
 
-                url = obj.get("holiday_url") or obj.get("url") or ""
-                if not url:
-                    continue
+def touch_occurrences(cur):
+    """Даты и праздники затронутых дат из temp.touched_occ — в touched_dates и touched_holidays."""
+    cur.execute("""
+        INSERT OR IGNORE INTO touched_dates(date)
+        SELECT date FROM occurrences WHERE id IN (SELECT id FROM touched_occ)
+    """)
+    cur.execute("""
+        INSERT OR IGNORE INTO touched_holidays(id)
+        SELECT holiday_id FROM occurrences WHERE id IN (SELECT id FROM touched_occ)
+    """)
 
-                description = (obj.get("description") or "").strip()
+def refresh_descriptions(cur):
+    """
+    После смены описаний упоминаний из temp.touched_occ: лучшее описание даты,
+    отметка «есть описание» в /date, образец правила повторения и поиск.
+    """
+    touch_occurrences(cur)
+    build_best_descriptions(cur, scoped=True)
+    build_date_summary(cur, scoped=True)
+    build_rules(cur, scoped=True)
+    build_search_index(cur, scoped=True)
 
-                cur.execute(
-                    """INSERT INTO mentions(occurrence_id, source_id, title_raw, title_norm, description, url, date_parsed)
-                       VALUES (?,?,?,?,?,?,?)""",
-                    (oid, sid, title_raw, title_norm, description, url, now)
-                )
+def load_bulk(conn, files, now: str) -> int:
+    """
+    Пакетная загрузка для сборки с нуля: JSONL потоково складывается в staging,
+    а id праздников, дат и упоминаний разрешаются несколькими INSERT ... SELECT
+    вместо запроса на каждую строку. Индексы строятся после заливки.
+    """
+    cur = conn.cursor()
+    cur.execute("PRAGMA journal_mode=OFF")
+    cur.execute("PRAGMA synchronous=OFF")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA cache_size=-262144")
+    for name in BULK_DEFERRED_INDEXES:
+        cur.execute(f"DROP INDEX IF EXISTS {name}")
 
-                loaded_here += 1
-                if loaded_here % 2000 == 0:
-                    print(f"{source_name}: loaded {loaded_here}")
+    stage_files(cur, files)
 
-        conn.commit()
-        print(f"Loaded {source_name}: {loaded_here} mentions")
+    t0 = time.perf_counter()
+    loaded = apply_staging(cur, now)
+    cur.execute("DROP TABLE temp.staging")
+
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+        cur.executescript(f.read())
+    conn.commit()
+    dt = time.perf_counter() - t0
+    print(f"Resolved and inserted {loaded} mentions in {dt:.1f}s ({loaded / max(dt, 1e-9):,.0f} rows/s)")
+    return loaded
+
+def load_incremental(conn, files, now: str, scopes=None) -> int:
+    """
+    Применяет к копии рабочей базы разницу со свежими снимками источников:
+    новые и изменённые упоминания добавляются, пропавшие из снимка своего
+    источника удаляются. Производные таблицы пересобираются только для
+    затронутых дат и праздников.
+
+    files — только изменившиеся разделы; scopes — (источник, год или None)
+    всех разделов, которые надо сверить (изменённые и удалённые). Упоминания
+    других лет и источников не трогаются.
+    """
+    cur = conn.cursor()
+    cur.execute("PRAGMA foreign_keys=ON")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    create_touched_tables(cur)
+
+    files = as_partitions(files)
+    if scopes is None:
+        scopes = [(source, year) for _, source, year in files]
+    stage_files(cur, files)
+    cur.execute("CREATE INDEX temp.idx_staging_hash ON staging(content_hash)")
+
+    cur.execute("CREATE TEMP TABLE reload_scope (source_id INTEGER NOT NULL, year TEXT)")
+    cur.executemany("INSERT INTO reload_scope VALUES (?,?)",
+                    [(get_source_id(cur, source), None if year is None else str(year))
+                     for source, year in scopes])
+
+    stale = """
+        FROM mentions
+        WHERE source_id IN (SELECT source_id FROM reload_scope)
+          AND content_hash NOT IN (SELECT content_hash FROM staging)
+          AND EXISTS (
+              SELECT 1 FROM reload_scope r JOIN occurrences o ON o.id = mentions.occurrence_id
+              WHERE r.source_id = mentions.source_id
+                AND (r.year IS NULL OR r.year = substr(o.date, 1, 4))
+          )
+    """
+    cur.execute(f"INSERT OR IGNORE INTO touched_occ(id) SELECT occurrence_id {stale}")
+    cur.execute(f"DELETE {stale}")
+    deleted = cur.rowcount
+
+    inserted = apply_staging(cur, now, track=True)
+    cur.execute("DROP TABLE temp.staging")
+    cur.execute("DROP TABLE temp.reload_scope")
+
+    touch_occurrences(cur)
+    cur.execute("""
+        DELETE FROM occurrences
+        WHERE id IN (SELECT id FROM touched_occ)
+          AND NOT EXISTS (SELECT 1 FROM mentions m WHERE m.occurrence_id = occurrences.id)
+    """)
+    cur.execute("""
+        DELETE FROM holidays
+        WHERE id IN (SELECT id FROM touched_holidays)
+          AND NOT EXISTS (SELECT 1 FROM occurrences o WHERE o.holiday_id = holidays.id)
+    """)
+    conn.commit()
+    print(f"Incremental: +{inserted} / -{deleted} mentions, "
+          f"{cur.execute('select count(*) from touched_dates').fetchone()[0]} dates touched")
+    return inserted
+
+def build_derived(conn, scoped: bool = False):
+    cur = conn.cursor()
+    build_best_descriptions(cur, scoped)
+    print("Unused texts removed:", texts.sweep(cur))
+    build_date_summary(cur, scoped)
+    print("Date summary plan:", check_date_summary_plan(cur))
+    print("Recurrence rules:", build_rules(cur, scoped), "holidays")
+    build_aliases(conn, scoped)
+
+    build_search_index(cur, scoped)
+    conn.commit()
+    print("Search index:", cur.execute("select count(*) from holidays_fts").fetchone()[0], "holidays")
+
+def new_build_id() -> str:
+    return datetime.utcnow().strftime("%Y%m%dT%H%M%S") + "-" + secrets.token_hex(3)
+
+def finalize(conn, build_id: str, vacuum: bool = True):
+    cur = conn.cursor()
+    cur.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('build_id', ?)", (build_id,))
+    cur.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('norm_version', ?)", (str(NORM_VERSION),))
+    cur.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+    cur.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('built_at', ?)",
+                (datetime.utcnow().isoformat(timespec="seconds"),))
+    conn.commit()
+    cur.execute("ANALYZE")
+    cur.execute("PRAGMA optimize")
+    conn.commit()
+    if vacuum:
+        cur.execute("VACUUM")
+
+def open_build(db_path: str = DB_PATH, copy: bool = False):
+    """
+    Соединение с файлом сборки рядом с db_path: пустым или, с copy=True,
+    копией рабочей базы. Схема применена. У каждого процесса свой файл, так что
+    сборка и db.enrich --target db не портят друг другу копии. Возвращает
+    (соединение, путь).
+    """
+    if copy and not os.path.exists(db_path):
+        raise FileNotFoundError(db_path)
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    build_path = f"{db_path}.build-{os.getpid()}"
+    for stale in (build_path, build_path + "-journal"):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    conn = sqlite3.connect(build_path)
+    if copy:
+        src = sqlite3.connect(db_path)
+        src.backup(conn)
+        src.close()
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+        conn.executescript(f.read())
+    conn.commit()
+    return conn, build_path
+
+def publish(conn, build_path: str, db_path: str = DB_PATH, vacuum: bool = True, base: str | None = None) -> str:
+    """
+    Закрывает сборку и атомарно подменяет ею рабочую базу. base — build_id
+    базы, с копии которой начали: если её за это время подменили, сборка
+    не публикуется (иначе она затёрла бы чужие изменения) и удаляется.
+    Проверка и подмена идут под блокировкой db_path.lock, общей для всех,
+    кто публикует.
+    """
+    build_id = new_build_id()
+    finalize(conn, build_id, vacuum=vacuum)
+    conn.close()
+    with open(db_path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if base is not None and read_meta(db_path, "build_id") != base:
+            os.remove(build_path)
+            raise RuntimeError(f"{db_path} changed since build {base} was copied, not publishing {build_path}")
+        os.replace(build_path, db_path)
+    print("Published build", build_id, "->", db_path)
+    return build_id
+
+def load(db_path: str = DB_PATH, files=None, bulk: bool = False, incremental: bool = False, fuzzy: bool = False):
+    """
+    Собирает базу во временный файл рядом с db_path и атомарно подменяет им
+    рабочую. Веб-приложение до подмены читает старую базу целиком, после —
+    новую целиком, и никогда не видит наполовину загруженную.
+
+    files — разделы (путь, источник[, год]), по умолчанию все data/<источник>/<год>.jsonl.
+    incremental=True начинает не с пустого файла, а с копии рабочей базы,
+    и перечитывает только разделы, изменившиеся с её сборки. Словарь описаний
+    my-calend.ru (descriptions_dict) и раздача описаний из него другим
+    упоминаниям (db/propagate.py, с fuzzy=True — и по похожим названиям)
+    идут здесь же, в файле сборки.
+    """
+    files = as_partitions(discover() if files is None else files)
+    incremental = incremental and os.path.exists(db_path)
+    if incremental and read_norm_version(db_path) != NORM_VERSION:
+        # Ключи title_norm старой сборки посчитаны другой нормализацией: пересчитываем всё.
+        print(f"Normalization changed ({read_norm_version(db_path)} -> {NORM_VERSION}), rebuilding from scratch")
+        incremental, bulk = False, True
+    if incremental and read_meta(db_path, "schema_version") != str(SCHEMA_VERSION):
+        print(f"Schema changed ({read_meta(db_path, 'schema_version')} -> {SCHEMA_VERSION}), rebuilding from scratch")
+        incremental, bulk = False, True
+    changed, current, removed = diff_partitions(files, read_partitions(db_path) if incremental else {})
+    if incremental:
+        if (not changed and not removed and read_meta(db_path, "alias_dict") == dict_digest()
+                and read_meta(db_path, "fuzzy_descriptions") == str(int(fuzzy))):
+            print("No partitions changed since the current build")
+            return
+        for path, source, year in changed:
+            print("Changed:", path)
+        for path, source, year in removed:
+            print("Removed:", path)
+
+    conn, build_path = open_build(db_path, copy=incremental)
+    cur = conn.cursor()
+    # Сборка поверх копии публикуется, только если рабочую базу за это время
+    # не подменили (db.enrich --target db или другая сборка): иначе затёрли бы их.
+    base = None
+    if incremental:
+        base = (cur.execute("SELECT value FROM meta WHERE key = 'build_id'").fetchone() or (None,))[0]
+
+    now = datetime.utcnow().isoformat(timespec="seconds")
+    t0 = time.perf_counter()
+    if incremental:
+        scopes = [(source, year) for _, source, year in changed + removed]
+        loaded = load_incremental(conn, changed, now, scopes)
+    elif bulk:
+        loaded = load_bulk(conn, files, now)
+    else:
+        loaded = load_rows(conn, files, now)
+    resolve(conn, scoped=incremental)
+    if not incremental or any(source == "my-calend.ru" for _, source, _ in changed + removed):
+        load_dict(cur, files)
+    propagate(cur, scoped=incremental, fuzzy=fuzzy)
+    if incremental:
+        touch_occurrences(cur)
+    conn.commit()
+    build_derived(conn, scoped=incremental)
+    dt = time.perf_counter() - t0
+    print(f"Loaded {loaded} mentions in {dt:.1f}s ({loaded / max(dt, 1e-9):,.0f} rows/s)")
 
     print("DONE")
     print("mentions with desc:",
-          cur.execute("select count(*) from mentions where trim(coalesce(description,''))!=''").fetchone()[0])
+          cur.execute("select count(*) from mentions where description_id is not null").fetchone()[0])
     print("by source desc:",
           cur.execute("""select s.name, count(*) from mentions m join sources s on s.id=m.source_id
-                         where trim(coalesce(m.description,''))!='' group by s.name""").fetchall())
+                         where m.description_id is not null group by s.name""").fetchall())
+    print("unique texts (count, stored bytes, zlib-compressed):",
+          cur.execute("select count(*), sum(length(body)), sum(typeof(body) = 'blob') from texts").fetchone())
 
-    conn.close()
+    record_partitions(cur, current)
+    # С другим --fuzzy описания раздаются иначе: --incremental должен их пересчитать.
+    cur.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('fuzzy_descriptions', ?)", (str(int(fuzzy)),))
+    conn.commit()
+    publish(conn, build_path, db_path, vacuum=not incremental, base=base)
+
+def main():
+    ap = argparse.ArgumentParser(description="Загрузка data/<источник>/<год>.jsonl в SQLite")
+    ap.add_argument("--bulk", action="store_true",
+                    help="пакетная загрузка без журнала (для сборки базы с нуля)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="перечитать только изменившиеся разделы и применить разницу к текущей базе")
+    ap.add_argument("--fuzzy", action="store_true",
+                    help="раздавать описания словаря и по похожим названиям (опечатки, окончания)")
+    ap.add_argument("--db", default=DB_PATH)
+    args = ap.parse_args()
+    files = discover()
+    if not files:
+        ap.error("в data/ нет разделов <источник>/<год>.jsonl (старые файлы: python -m common.partitions migrate)")
+    load(args.db, files, bulk=args.bulk, incremental=args.incremental, fuzzy=args.fuzzy)
 
 if __name__ == "__main__":
     main()
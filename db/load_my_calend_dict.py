@@ -1,31 +1,26 @@
+"""
+Словарь описаний descriptions_dict: нормализованное название my-calend.ru ->
+его описание в texts. Стадия сборки db/load_and_dedupe.py: словарь
+пересобирается в файле сборки до подмены рабочей базы (при --incremental —
+только если изменились разделы my-calend.ru), а неиспользуемые тексты
+убирает общий проход texts.sweep.
+"""
 import json
-import re
-import sqlite3
 
-DB_PATH = "db/holidays.sqlite"
-SRC = "data/raw_my_calend_2025.jsonl"
+from common import texts
+from common.normalize import normalize_title
 
-def normalize_title(s: str) -> str:
-    s = (s or "").lower().strip().replace("ё", "е")
-    s = re.sub(r"[^a-zа-я0-9\s\-]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+SOURCE = "my-calend.ru"
 
-def main():
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
+def iter_lines(files):
+    """Строки обогащённых разделов my-calend.ru из files (путь, источник, год), от старых лет к новым."""
+    for path, _source, _year in sorted((f for f in files if f[1] == SOURCE), key=lambda f: f[2] or 0):
+        with open(path, "r", encoding="utf-8") as f:
+            yield from f
 
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS descriptions_dict (
-      id INTEGER PRIMARY KEY AUTOINCREMENT,
-      title_norm TEXT NOT NULL UNIQUE,
-      title_raw TEXT NOT NULL,
-      description TEXT NOT NULL,
-      url TEXT NOT NULL
-    )
-    """)
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_desc_title_norm ON descriptions_dict(title_norm)")
-    con.commit()
+def load_dict(cur, files) -> int:
+    """Пересобирает descriptions_dict из разделов my-calend.ru. Возвращает число записей."""
+    cur.execute("DELETE FROM descriptions_dict")
 
     total_lines = 0
     ok = 0
@@ -33,62 +28,35 @@ def main():
     missing_url = 0
     missing_title = 0
 
-    first_keys = None
-    first_with_desc = None
-
-    with open(SRC, "r", encoding="utf-8") as f:
-        for line in f:
-            total_lines += 1
-            obj = json.loads(line)
-
-            if first_keys is None:
-                first_keys = list(obj.keys())
-
-            title = (obj.get("title_raw") or "").strip()
-            desc = (obj.get("description") or "").strip()
-            url = (obj.get("holiday_url") or obj.get("url") or "").strip()
-
-            if not title:
-                missing_title += 1
-                continue
-            if not desc:
-                missing_desc += 1
-                continue
-            if not url:
-                missing_url += 1
-                continue
-
-            if first_with_desc is None:
-                first_with_desc = {
-                    "title_raw": title,
-                    "description_preview": desc[:120],
-                    "url": url
-                }
-
-            tn = normalize_title(title)
-            if not tn:
-                continue
-
-            cur.execute("""
-              INSERT OR REPLACE INTO descriptions_dict(title_norm, title_raw, description, url)
-              VALUES (?,?,?,?)
-            """, (tn, title, desc, url))
-            ok += 1
-
-    con.commit()
-
-    print("SRC lines:", total_lines)
-    print("First keys:", first_keys)
-    print("With description example:", first_with_desc)
-    print("Inserted:", ok)
-    print("Skipped missing title:", missing_title)
-    print("Skipped missing desc:", missing_desc)
-    print("Skipped missing url:", missing_url)
+    for line in iter_lines(files):
+        total_lines += 1
+        obj = json.loads(line)
+
+        title = (obj.get("title_raw") or "").strip()
+        desc = (obj.get("description") or "").strip()
+        url = (obj.get("holiday_url") or obj.get("url") or "").strip()
+
+        if not title:
+            missing_title += 1
+            continue
+        if not desc:
+            missing_desc += 1
+            continue
+        if not url:
+            missing_url += 1
+            continue
+
+        tn = normalize_title(title)
+        if not tn:
+            continue
+
+        cur.execute("""
+          INSERT OR REPLACE INTO descriptions_dict(title_norm, title_raw, description_id, url)
+          VALUES (?,?,?,?)
+        """, (tn, title, texts.intern(cur, desc), url))
+        ok += 1
 
     cnt = cur.execute("select count(*) from descriptions_dict").fetchone()[0]
-    print("descriptions_dict count:", cnt)
-
-    con.close()
-
-if __name__ == "__main__":
-    main()
+    print(f"Descriptions dict: {cnt} titles from {ok} of {total_lines} lines "
+          f"(skipped: {missing_title} no title, {missing_desc} no description, {missing_url} no url)")
+    return cnt
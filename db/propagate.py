@@ -0,0 +1,148 @@
+"""
+Описания из descriptions_dict — всем упоминаниям того же праздника.
+
+descriptions_dict (db/load_my_calend_dict.py) знает описание my-calend.ru для
+нормализованного названия, а упоминания calend.ru и Википедии с тем же
+названием остаются без описания. Этот проход заполняет их без единого
+HTTP-запроса: упоминание получает ссылку на тот же текст в texts и отметку
+mentions.from_dict.
+
+Сначала точное совпадение — по title_norm упоминания или по
+canonical_title_norm его праздника (дубли, склеенные db/resolve.py), через
+уникальный индекс descriptions_dict. С --fuzzy оставшиеся русские названия
+сравниваются с ключами словаря rapidfuzz.process.cdist, и совпадение
+принимается, только если названия различаются опечатками и окончаниями
+(db.resolve.same_words).
+
+Это стадия сборки db/load_and_dedupe.py: она идёт в файле сборки после
+сопоставления праздников и перед производными таблицами, поэтому /date,
+правила повторения и поиск сразу видят розданные описания. Розданные раньше
+описания пересчитываются каждый раз (словарь и склейки могли поменяться),
+так что --incremental даёт то же, что сборка с нуля с тем же --fuzzy.
+
+    python -m db.load_and_dedupe [--incremental] [--fuzzy]
+"""
+import time
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from db.resolve import same_words
+
+FUZZY_SCORE = 90        # token_sort_ratio названия и ключа словаря
+
+
+def coverage(cur, own: bool = False) -> list:
+    """
+    (источник, упоминаний, с описанием) по каждому источнику. own=True —
+    только свои описания, без розданных из словаря: покрытие до прохода.
+    """
+    counted = "CASE WHEN NOT m.from_dict THEN m.description_id END" if own else "m.description_id"
+    return cur.execute(f"""
+        SELECT s.name, count(*), count({counted})
+        FROM mentions m JOIN sources s ON s.id = m.source_id
+        GROUP BY s.name
+        ORDER BY s.priority, s.name
+    """).fetchall()
+
+
+def print_coverage(label: str, rows):
+    total = sum(r[1] for r in rows)
+    filled = sum(r[2] for r in rows)
+    print(f"{label}: {filled}/{total} mentions with description ({filled / max(total, 1):.1%})")
+    for name, n, with_desc in rows:
+        print(f"  {name:>18}: {with_desc}/{n} ({with_desc / max(n, 1):.1%})")
+
+
+def fill_exact(cur) -> int:
+    cur.execute("""
+        INSERT INTO fill(mention_id, description_id)
+        SELECT mention_id, description_id
+        FROM (
+            SELECT e.id AS mention_id, coalesce(
+                (SELECT d.description_id FROM descriptions_dict d WHERE d.title_norm = e.title_norm),
+                (SELECT d.description_id FROM descriptions_dict d WHERE d.title_norm = h.canonical_title_norm)
+            ) AS description_id
+            FROM empty e
+            JOIN occurrences o ON o.id = e.occurrence_id
+            JOIN holidays h ON h.id = o.holiday_id
+        )
+        WHERE description_id IS NOT NULL
+    """)
+    return cur.rowcount
+
+
+def fill_fuzzy(cur, min_score: int = FUZZY_SCORE) -> int:
+    """Русские названия без точного совпадения -> ближайший ключ словаря."""
+    keys, ids = [], []
+    for title_norm, description_id in cur.execute("SELECT title_norm, description_id FROM descriptions_dict"):
+        keys.append(title_norm)
+        ids.append(description_id)
+    titles = [r[0] for r in cur.execute("""
+        SELECT DISTINCT e.title_norm
+        FROM empty e
+        JOIN occurrences o ON o.id = e.occurrence_id
+        JOIN holidays h ON h.id = o.holiday_id
+        WHERE h.lang = 'ru' AND e.id NOT IN (SELECT mention_id FROM fill)
+    """)]
+    if not keys or not titles:
+        return 0
+
+    scores = process.cdist(titles, keys, scorer=fuzz.token_sort_ratio, score_cutoff=min_score,
+                           dtype=np.uint8, workers=-1)
+    best = scores.argmax(axis=1)
+    matched = [(titles[i], ids[j]) for i, j in enumerate(best.tolist())
+               if scores[i, j] and same_words(titles[i], keys[j])]
+
+    cur.execute("CREATE TEMP TABLE fuzzy_match (title_norm TEXT PRIMARY KEY, description_id INTEGER NOT NULL)")
+    cur.executemany("INSERT INTO fuzzy_match VALUES (?,?)", matched)
+    cur.execute("""
+        INSERT INTO fill(mention_id, description_id)
+        SELECT e.id, f.description_id
+        FROM empty e JOIN fuzzy_match f ON f.title_norm = e.title_norm
+        WHERE e.id NOT IN (SELECT mention_id FROM fill)
+    """)
+    filled = cur.rowcount
+    cur.execute("DROP TABLE temp.fuzzy_match")
+    return filled
+
+
+def propagate(cur, scoped: bool = False, fuzzy: bool = False, min_score: int = FUZZY_SCORE) -> int:
+    """
+    Раздаёт описания словаря упоминаниям без своего описания и пересчитывает
+    розданные раньше. fuzzy=True — и по похожим названиям (fill_fuzzy).
+    scoped=True — даты упоминаний, у которых описание поменялось, добавляются
+    в temp.touched_occ. Возвращает число таких упоминаний.
+    """
+    print_coverage("Before", coverage(cur, own=True))
+    t0 = time.perf_counter()
+    cur.execute("""
+        CREATE TEMP TABLE empty AS
+        SELECT id, occurrence_id, title_norm, description_id FROM mentions
+        WHERE description_id IS NULL OR from_dict
+    """)
+    cur.execute("CREATE TEMP TABLE fill (mention_id INTEGER PRIMARY KEY, description_id INTEGER NOT NULL)")
+    exact = fill_exact(cur)
+    fuzzy_filled = fill_fuzzy(cur, min_score) if fuzzy else 0
+    cur.execute("""
+        CREATE TEMP TABLE changed AS
+        SELECT e.id, e.occurrence_id, f.description_id
+        FROM empty e LEFT JOIN fill f ON f.mention_id = e.id
+        WHERE f.description_id IS NOT e.description_id
+    """)
+    cur.execute("""
+        UPDATE mentions SET (description_id, from_dict) = (
+            SELECT c.description_id, c.description_id IS NOT NULL FROM changed c WHERE c.id = mentions.id
+        )
+        WHERE id IN (SELECT id FROM changed)
+    """)
+    changed = cur.rowcount
+    if scoped:
+        cur.execute("INSERT OR IGNORE INTO touched_occ(id) SELECT occurrence_id FROM changed")
+    for table in ("fill", "empty", "changed"):
+        cur.execute(f"DROP TABLE temp.{table}")
+
+    print(f"Descriptions from dict: {exact} mentions by exact title, {fuzzy_filled} by fuzzy title, "
+          f"{changed} changed in {time.perf_counter() - t0:.1f}s")
+    print_coverage("After", coverage(cur))
+    return changed
@@ -0,0 +1,341 @@
+"""
+Сопоставление праздников между источниками: «Новый Год» с my-calend.ru,
+«Новый год» с calend.ru и «Всемирный день учителя» рядом с «Днём учителя»
+в тот же день — один праздник, а не несколько строк holidays.
+
+Кандидаты блокируются по (дате, языку): сравниваются только праздники одного
+дня, поэтому работа растёт почти линейно с числом упоминаний, а блок с тем же
+набором праздников, что уже был в другом году, не пересчитывается. Внутри
+блока rapidfuzz.process.cdist за один вызов оценивает все пары, и совпавшие
+пары склеиваются union-find в кластеры: сначала опечатки, потом уточнения,
+при равенстве — по алфавиту названий, а не по id, так что результат не
+зависит от порядка загрузки. Склейка полная, а не по цепочке: кластеры не
+объединяются, если в них окажутся названия с разными значимыми словами
+(«День пограничника в России» и «… в Беларуси» через общий «День
+пограничника»), а общее название, которое уточняют по-разному, не
+достаётся ни одному из уточнений.
+
+Кластер сливается в праздник с наименьшим id, а название праздника — самое
+короткое по словам (наименее уточнённое) из названий его упоминаний, при
+равенстве — самое частое. Остальные ключи (lang, title_norm) упоминаний
+лежат в title_map, так что новые упоминания с этими ключами загрузчик сразу
+относит к этому празднику.
+"""
+import os
+import time
+from collections import defaultdict
+from itertools import groupby
+
+import numpy as np
+from rapidfuzz import fuzz, process
+from rapidfuzz.distance import Levenshtein
+
+SIMILAR = 92            # token_sort_ratio: опечатки, окончания, порядок слов
+MIN_WORDS = 2           # название короче не считается уточняемым («День» ⊂ чего угодно)
+QUALIFIER_WORDS = 2     # «День учителя» ⊂ «Всемирный день учителя»: не больше стольких лишних слов
+STEM_SLACK = 3          # «работника»/«работников», «беларусь»/«беларуси»: разные окончания
+WORKERS = -1            # потоков у cdist: все ядра
+PARALLEL_FROM = 64      # блоки меньше считаются в одном потоке: запуск потоков дороже
+# Слова, которыми названия одного праздника могут различаться, не становясь разными праздниками.
+GENERIC = frozenset(("в", "во", "на", "и", "по", "для", "of", "the", "in", "on", "and", "for",
+                     "международный", "всемирный", "всероссийский", "общероссийский", "национальный",
+                     "international", "world", "national", "global"))
+
+
+class UnionFind:
+    """
+    Кластеры id; корень — наименьший id кластера. members — названия
+    каждого id: кластеры с конфликтующими названиями (conflict) не склеиваются.
+    """
+
+    def __init__(self, members=None):
+        self.parent = {}
+        self.members = members if members is not None else {}
+
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while parent.get(x, x) != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, a, b) -> bool:
+        """Склеивает кластеры a и b; False — если хоть пара их названий конфликтует."""
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return True
+        ma, mb = self.members.get(ra, set()), self.members.get(rb, set())
+        if any(conflict(x, y) for x in ma for y in mb):
+            return False
+        if rb < ra:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.members[ra] = ma | mb
+        self.members.pop(rb, None)
+        return True
+
+    def mapping(self) -> dict:
+        """id -> корень для всех id, которые не сами корни."""
+        out = {}
+        for x in self.parent:
+            root = self.find(x)
+            if root != x:
+                out[x] = root
+        return out
+
+
+def same_word(a: str, b: str) -> bool:
+    """Опечатка или другое окончание того же слова."""
+    if Levenshtein.distance(a, b, score_cutoff=1) <= 1:
+        return True
+    return len(os.path.commonprefix((a, b))) >= max(4, len(a) - STEM_SLACK, len(b) - STEM_SLACK)
+
+
+def same_words(a: str, b: str) -> bool:
+    """
+    Названия различаются только опечатками и окончаниями: каждому отличному
+    слову одного есть пара в другом. Отсекает «World Puppetry Day» /
+    «World Poetry Day» и «… в Кыргызстане» / «… в России», которые
+    token_sort_ratio считает похожими.
+    """
+    only_b = b.split()
+    only_a = []
+    for w in a.split():
+        if w in only_b:
+            only_b.remove(w)
+        else:
+            only_a.append(w)
+    if len(only_a) != len(only_b):
+        return False
+    for w in only_a:
+        match = next((v for v in only_b if same_word(w, v)), None)
+        if match is None:
+            return False
+        only_b.remove(match)
+    return True
+
+
+def conflict(a: str, b: str) -> bool:
+    """
+    У каждого названия есть значимое слово, которого нет в другом даже
+    с точностью до окончания: «… в России» / «… в Беларуси». Уточнение
+    только с одной стороны («День пограничника» / «… в России») не конфликт.
+    """
+    wa, wb = set(a.split()) - GENERIC, set(b.split()) - GENERIC
+    only_a = [w for w in wa - wb if not any(same_word(w, v) for v in wb)]
+    if not only_a:
+        return False
+    return any(not any(same_word(w, v) for v in wa) for w in wb - wa)
+
+
+def match_block(titles: list[str]):
+    """Пары индексов (i < j) названий одного блока, которые считаются одним праздником."""
+    workers = WORKERS if len(titles) >= PARALLEL_FROM else 1
+    similar = process.cdist(titles, titles, scorer=fuzz.token_sort_ratio, score_cutoff=SIMILAR,
+                            dtype=np.uint8, workers=workers)
+    subset = process.cdist(titles, titles, scorer=fuzz.token_set_ratio, score_cutoff=100,
+                           dtype=np.uint8, workers=workers)
+    words = np.array([len(set(t.split())) for t in titles])
+    qualified = (
+        (subset > 0)
+        & (np.minimum.outer(words, words) >= MIN_WORDS)
+        & (np.abs(np.subtract.outer(words, words)) <= QUALIFIER_WORDS)
+    )
+    # Похожих по token_sort_ratio пар в блоке единицы: их проверяем по словам.
+    for i, j in zip(*np.nonzero(np.triu(similar, k=1))):
+        if same_words(titles[i], titles[j]):
+            qualified[i, j] = True
+    i, j = np.nonzero(np.triu(qualified, k=1))
+    return zip(i.tolist(), j.tolist())
+
+
+def merge(cur, merges: dict, scoped: bool = False):
+    """
+    Переносит упоминания слитых праздников в даты канонических и удаляет
+    слитые праздники. scoped=True дописывает затронутое в temp.touched_*.
+    Названия и title_map после этого пересчитывает pick_titles.
+    """
+    cur.execute("CREATE TEMP TABLE merge_map (holiday_id INTEGER PRIMARY KEY, canonical_id INTEGER NOT NULL)")
+    cur.executemany("INSERT INTO merge_map VALUES (?,?)", merges.items())
+
+    cur.execute("""
+        INSERT OR IGNORE INTO occurrences(holiday_id, date)
+        SELECT m.canonical_id, o.date
+        FROM occurrences o JOIN merge_map m ON m.holiday_id = o.holiday_id
+        ORDER BY o.id
+    """)
+    cur.execute("CREATE TEMP TABLE occ_map (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL)")
+    cur.execute("""
+        INSERT INTO occ_map
+        SELECT o.id, c.id
+        FROM occurrences o
+        JOIN merge_map m ON m.holiday_id = o.holiday_id
+        JOIN occurrences c ON c.holiday_id = m.canonical_id AND c.date = o.date
+    """)
+    cur.execute("""
+        UPDATE mentions SET occurrence_id = (SELECT new_id FROM occ_map WHERE old_id = mentions.occurrence_id)
+        WHERE occurrence_id IN (SELECT old_id FROM occ_map)
+    """)
+    if scoped:
+        cur.execute("INSERT OR IGNORE INTO touched_occ(id) SELECT new_id FROM occ_map")
+        cur.execute("""
+            INSERT OR IGNORE INTO touched_dates(date)
+            SELECT date FROM occurrences WHERE id IN (SELECT new_id FROM occ_map)
+        """)
+        cur.execute("""
+            INSERT OR IGNORE INTO touched_holidays(id)
+            SELECT holiday_id FROM merge_map UNION SELECT canonical_id FROM merge_map
+        """)
+    cur.execute("DELETE FROM occurrences WHERE id IN (SELECT old_id FROM occ_map)")
+    cur.execute("DELETE FROM holidays WHERE id IN (SELECT holiday_id FROM merge_map)")
+    cur.execute("DROP TABLE temp.occ_map")
+    cur.execute("DROP TABLE temp.merge_map")
+
+
+def unambiguous(candidates: list) -> list:
+    """
+    Без пар-уточнений у названия, которое уточняют по-разному: «День рыбака»
+    подходит и к «… в России», и к «… на Украине» — и остаётся отдельно,
+    а не достаётся тому, кто раньше по алфавиту. Опечатки (ранг 0) остаются.
+    """
+    partners = defaultdict(set)
+    for rank, a, b, ida, idb in candidates:
+        if rank:
+            partners[ida].add(b)
+            partners[idb].add(a)
+    ambiguous = {hid for hid, titles in partners.items()
+                 if any(conflict(x, y) for x in titles for y in titles if x < y)}
+    return [c for c in candidates if not c[0] or not ambiguous.intersection(c[3:])]
+
+
+def pick_titles(cur, scoped: bool = False) -> int:
+    """
+    Название каждого праздника — из названий его упоминаний: меньше слов,
+    потом больше упоминаний, потом по алфавиту; написание — у источника
+    с высшим приоритетом. Остальные ключи упоминаний записываются в title_map,
+    ключи без упоминаний оттуда уходят. Не зависит от того, какой праздник
+    был создан первым, поэтому --incremental и сборка с нуля дают одно и то же.
+    scoped=True — только temp.touched_holidays; даты праздников, сменивших
+    название, добавляются в touched_*. Возвращает число переименованных.
+    """
+    where = "WHERE o.holiday_id IN (SELECT id FROM temp.touched_holidays)" if scoped else ""
+    rows = cur.execute(f"""
+        SELECT o.holiday_id, m.title_norm, count(*), min(s.priority), min(m.title_raw)
+        FROM mentions m
+        JOIN occurrences o ON o.id = m.occurrence_id
+        JOIN sources s ON s.id = m.source_id
+        {where}
+        GROUP BY o.holiday_id, m.title_norm
+        ORDER BY o.holiday_id
+    """).fetchall()
+    # Написание названия: у источника с наименьшим priority, при равенстве — первое по алфавиту.
+    raw = dict(((hid, title_norm, priority), title_raw) for hid, title_norm, priority, title_raw in cur.execute(f"""
+        SELECT o.holiday_id, m.title_norm, s.priority, min(m.title_raw)
+        FROM mentions m
+        JOIN occurrences o ON o.id = m.occurrence_id
+        JOIN sources s ON s.id = m.source_id
+        {where}
+        GROUP BY o.holiday_id, m.title_norm, s.priority
+    """))
+
+    titles = []
+    for hid, group in groupby(rows, key=lambda r: r[0]):
+        _, title_norm, _, priority, _ = min(group, key=lambda r: (len(r[1].split()), -r[2], r[1]))
+        titles.append((raw[hid, title_norm, priority], title_norm, hid))
+
+    cur.execute("CREATE TEMP TABLE picked (id INTEGER PRIMARY KEY, title TEXT NOT NULL, title_norm TEXT NOT NULL)")
+    cur.executemany("INSERT INTO picked(title, title_norm, id) VALUES (?,?,?)", titles)
+    cur.execute("""
+        DELETE FROM picked WHERE EXISTS (
+            SELECT 1 FROM holidays h
+            WHERE h.id = picked.id AND h.canonical_title = picked.title AND h.canonical_title_norm = picked.title_norm
+        )
+    """)
+    cur.execute("""
+        UPDATE holidays SET (canonical_title, canonical_title_norm) = (
+            SELECT p.title, p.title_norm FROM picked p WHERE p.id = holidays.id
+        )
+        WHERE id IN (SELECT id FROM picked)
+    """)
+    renamed = cur.rowcount
+    if scoped:
+        # Новое название видно на всех датах праздника, а не только на затронутых.
+        cur.execute("INSERT OR IGNORE INTO touched_occ(id) SELECT id FROM occurrences WHERE holiday_id IN (SELECT id FROM picked)")
+        cur.execute("""
+            INSERT OR IGNORE INTO touched_dates(date)
+            SELECT date FROM occurrences WHERE holiday_id IN (SELECT id FROM picked)
+        """)
+    cur.execute("DROP TABLE temp.picked")
+
+    if scoped:
+        cur.execute("DELETE FROM title_map WHERE holiday_id IN (SELECT id FROM temp.touched_holidays)")
+    else:
+        cur.execute("DELETE FROM title_map")
+    cur.execute(f"""
+        INSERT OR REPLACE INTO title_map(lang, title_norm, holiday_id)
+        SELECT DISTINCT h.lang, m.title_norm, h.id
+        FROM mentions m
+        JOIN occurrences o ON o.id = m.occurrence_id
+        JOIN holidays h ON h.id = o.holiday_id
+        WHERE m.title_norm != h.canonical_title_norm
+        {where.replace("WHERE", "AND")}
+    """)
+    return renamed
+
+
+def resolve(conn, scoped: bool = False) -> int:
+    """
+    Ищет и сливает дубли праздников. scoped=True — только блоки дат
+    из temp.touched_dates (инкрементальная сборка). Возвращает число слитых праздников.
+    """
+    t0 = time.perf_counter()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM title_map WHERE holiday_id NOT IN (SELECT id FROM holidays)")
+
+    where = "WHERE o.date IN (SELECT date FROM temp.touched_dates)" if scoped else ""
+    # Названия всех упоминаний каждого праздника: уже слитый праздник — это несколько названий.
+    members = defaultdict(set)
+    for hid, title_norm in conn.execute(f"""
+        SELECT DISTINCT o.holiday_id, m.title_norm
+        FROM mentions m JOIN occurrences o ON o.id = m.occurrence_id
+        {"WHERE o.holiday_id IN (SELECT o.holiday_id FROM occurrences o " + where + ")" if scoped else ""}
+    """):
+        members[hid].add(title_norm)
+
+    rows = conn.execute(f"""
+        SELECT o.date, h.lang, h.id, h.canonical_title_norm
+        FROM occurrences o JOIN holidays h ON h.id = o.holiday_id
+        {where}
+        ORDER BY o.date, h.lang, h.id
+    """)
+    candidates = []
+    seen = set()   # праздники фиксированных дат из года в год дают тот же блок: считаем его один раз
+    blocks = 0
+    for _, block in groupby(rows, key=lambda r: (r[0], r[1])):
+        block = list(block)
+        ids = tuple(r[2] for r in block)
+        if len(block) < 2 or ids in seen:
+            continue
+        seen.add(ids)
+        blocks += 1
+        titles = [r[3] for r in block]
+        for i, j in match_block(titles):
+            (a, ida), (b, idb) = sorted(((titles[i], block[i][2]), (titles[j], block[j][2])))
+            candidates.append((abs(len(a.split()) - len(b.split())), a, b, ida, idb))
+
+    # Сначала опечатки, потом уточнения; при равенстве — по названиям, а не по id.
+    candidates.sort(key=lambda c: c[:3])
+    candidates = unambiguous(candidates)
+    uf = UnionFind(members)
+    pairs = sum(uf.union(a, b) for *_, a, b in candidates)
+
+    merges = uf.mapping()
+    if merges:
+        merge(cur, merges, scoped)
+    renamed = pick_titles(cur, scoped)
+    conn.commit()
+    print(f"Entity resolution: {blocks} blocks, {pairs}/{len(candidates)} matching pairs, "
+          f"{len(merges)} holidays merged, {renamed} renamed in {time.perf_counter() - t0:.1f}s")
+    return len(merges)
@@ -2,7 +2,8 @@ PRAGMA foreign_keys = ON;
 
 CREATE TABLE IF NOT EXISTS sources (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
-  name TEXT NOT NULL UNIQUE
+  name TEXT NOT NULL UNIQUE,
+  priority INTEGER NOT NULL DEFAULT 9   -- чьё описание показывать первым (меньше — важнее)
 );
 
 CREATE TABLE IF NOT EXISTS holidays (
@@ -14,10 +15,32 @@ CREATE TABLE IF NOT EXISTS holidays (
 
 CREATE INDEX IF NOT EXISTS idx_holidays_title_norm ON holidays(canonical_title_norm);
 
+-- Ключи упоминаний (lang, title_norm), которые сопоставление (db/resolve.py)
+-- отнесло к другому празднику: упоминание с таким ключом идёт в holiday_id,
+-- а не в праздник со своим canonical_title_norm.
+CREATE TABLE IF NOT EXISTS title_map (
+  lang TEXT NOT NULL,
+  title_norm TEXT NOT NULL,
+  holiday_id INTEGER NOT NULL,
+  PRIMARY KEY (lang, title_norm)
+) WITHOUT ROWID;
+
+-- Описания, по одному экземпляру на текст (common/texts.py): hash — blake2b
+-- текста, body — сам текст (TEXT) или, если он длинный, сжатый zlib (BLOB).
+-- Ссылки на texts без FOREIGN KEY: осиротевшие тексты удаляет загрузчик
+-- одним запросом, а не проверкой ссылок на каждую удаляемую строку.
+CREATE TABLE IF NOT EXISTS texts (
+  id INTEGER PRIMARY KEY,
+  hash BLOB NOT NULL UNIQUE,
+  body NOT NULL
+);
+
 CREATE TABLE IF NOT EXISTS occurrences (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   holiday_id INTEGER NOT NULL,
   date TEXT NOT NULL, 
+  best_source TEXT,        -- заполняет загрузчик по sources.priority
+  best_description_id INTEGER,  -- texts.id
   UNIQUE(holiday_id, date),
   FOREIGN KEY (holiday_id) REFERENCES holidays(id) ON DELETE CASCADE
 );
@@ -30,9 +53,11 @@ CREATE TABLE IF NOT EXISTS mentions (
   source_id INTEGER NOT NULL,
   title_raw TEXT NOT NULL,
   title_norm TEXT NOT NULL,
-  description TEXT,
+  description_id INTEGER,      -- texts.id, NULL — описания нет
+  from_dict INTEGER NOT NULL DEFAULT 0,  -- 1: описание не своё, а из descriptions_dict (db/propagate.py)
   url TEXT NOT NULL,
   date_parsed TEXT NOT NULL,
+  content_hash BLOB NOT NULL,   -- blake2b(source, date, title_norm, url, description)
   FOREIGN KEY (occurrence_id) REFERENCES occurrences(id) ON DELETE CASCADE,
   FOREIGN KEY (source_id) REFERENCES sources(id) ON DELETE CASCADE
 );
@@ -41,10 +66,79 @@ CREATE TABLE IF NOT EXISTS descriptions_dict (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   title_norm TEXT NOT NULL UNIQUE,
   title_raw TEXT NOT NULL,
-  description TEXT NOT NULL,
+  description_id INTEGER NOT NULL,   -- texts.id
   url TEXT NOT NULL
 );
 
 CREATE INDEX IF NOT EXISTS idx_desc_title_norm ON descriptions_dict(title_norm);
 CREATE INDEX IF NOT EXISTS idx_mentions_occurrence ON mentions(occurrence_id);
 CREATE INDEX IF NOT EXISTS idx_mentions_source ON mentions(source_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mentions_hash ON mentions(content_hash);
+
+-- Полнотекстовый индекс для /search: rowid = holidays.id.
+-- Текст хранится с заменой ё→е, регистр сворачивает unicode61.
+CREATE VIRTUAL TABLE IF NOT EXISTS holidays_fts USING fts5(
+  title,
+  descriptions,
+  tokenize = 'unicode61 remove_diacritics 2'
+);
+
+-- Готовый список праздников на дату для /date, пересобирается загрузчиком.
+-- Первичный ключ (date, sort_key) задаёт порядок выдачи, WITHOUT ROWID
+-- делает его покрывающим: запрос читает один диапазон без сортировки.
+CREATE TABLE IF NOT EXISTS date_summary (
+  date TEXT NOT NULL,
+  sort_key INTEGER NOT NULL,
+  occ_id INTEGER NOT NULL,
+  title TEXT NOT NULL,
+  lang TEXT NOT NULL,
+  has_desc INTEGER NOT NULL,
+  PRIMARY KEY (date, sort_key)
+) WITHOUT ROWID;
+
+-- Правило повторения праздника (common/recurrence.py), выведенное загрузчиком
+-- по его датам в разных годах. /date разворачивает правила в любой год
+-- 1900–2100, так что хранить копию праздника на каждый год не нужно.
+-- occ_id — дата-образец со ссылкой и лучшим описанием.
+CREATE TABLE IF NOT EXISTS holiday_rules (
+  holiday_id INTEGER PRIMARY KEY,
+  rule TEXT NOT NULL,
+  occ_id INTEGER NOT NULL,
+  years INTEGER NOT NULL,       -- по скольким годам выведено
+  FOREIGN KEY (holiday_id) REFERENCES holidays(id) ON DELETE CASCADE
+);
+
+-- Словарь основ русских слов для связей ru/en (копия db/alias_dict.tsv
+-- на момент сборки; пустое en — служебное слово).
+CREATE TABLE IF NOT EXISTS alias_dict (
+  ru TEXT PRIMARY KEY,
+  en TEXT NOT NULL
+) WITHOUT ROWID;
+
+-- Тот же праздник на другом языке (db/aliases.py): пара хранится в обе
+-- стороны, так что /search и /occurrence берут связи одним поиском по ключу.
+CREATE TABLE IF NOT EXISTS aliases (
+  holiday_id INTEGER NOT NULL,
+  alias_id INTEGER NOT NULL,
+  score INTEGER NOT NULL,       -- token_set_ratio перевода, 85–100
+  PRIMARY KEY (holiday_id, alias_id),
+  FOREIGN KEY (holiday_id) REFERENCES holidays(id) ON DELETE CASCADE,
+  FOREIGN KEY (alias_id) REFERENCES holidays(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- Служебные сведения о сборке (build_id, built_at).
+CREATE TABLE IF NOT EXISTS meta (
+  key TEXT PRIMARY KEY,
+  value TEXT NOT NULL
+);
+
+-- Разделы data/<источник>/<год>.jsonl, из которых собрана база, с отпечатками:
+-- --incremental перечитывает только изменившиеся.
+CREATE TABLE IF NOT EXISTS partitions (
+  path TEXT PRIMARY KEY,
+  source TEXT NOT NULL,
+  year INTEGER,
+  size INTEGER NOT NULL,
+  mtime_ns INTEGER NOT NULL,
+  digest BLOB NOT NULL
+);
@@ -1,10 +1,11 @@
-import json
-import re
-import requests
+import argparse
 from bs4 import BeautifulSoup
-from datetime import date, timedelta
+from datetime import date
 
-HEADERS = {"User-Agent": "Mozilla/5.0"}
+from common.checkpoint import CrawlJournal
+from common.crawl import crawl_pages, date_range, day_items, default_crawler, write_jsonl
+from common.normalize import collapse_spaces, normalize_title
+from common.partitions import default_years, for_years, parse_years, partition_path
 
 BAD_EXACT = {
     "праздники",
@@ -22,11 +23,6 @@ STOP_TITLES = {
     "персоны",
 }
 
-def normalize_title(s: str) -> str:
-    s = (s or "").lower().strip().replace("ё", "е")
-    s = re.sub(r"\s+", " ", s)
-    return s
-
 def is_category_like(t: str) -> bool:
     tl = t.lower().strip()
     if tl in BAD_EXACT:
@@ -35,13 +31,16 @@ def is_category_like(t: str) -> bool:
         return True
     return False
 
-def parse_day(d: date):
-    url = f"https://www.calend.ru/day/{d.year}-{d.month:02d}-{d.day:02d}/"
+def day_url(d: date) -> str:
+    return f"https://www.calend.ru/day/{d.year}-{d.month:02d}-{d.day:02d}/"
+
+def parse_day(d: date, crawler=None, url: str | None = None):
+    url = url or day_url(d)
     print("Parsing:", url)
+    return parse_html(d, url, (crawler or default_crawler()).get_text(url))
 
-    r = requests.get(url, timeout=25, headers=HEADERS)
-    r.raise_for_status()
-    soup = BeautifulSoup(r.text, "lxml")
+def parse_html(d: date, url: str, html: str):
+    soup = BeautifulSoup(html, "lxml")
 
     h1 = soup.find("h1")
     if not h1:
@@ -55,7 +54,7 @@ def parse_day(d: date):
 
     for a in start.find_all_next("a", href=True, limit=1500):
         t = a.get_text(" ", strip=True)
-        t = re.sub(r"\s+", " ", (t or "").strip())
+        t = collapse_spaces(t or "")
         if not t:
             continue
 
@@ -99,25 +98,32 @@ def parse_day(d: date):
 
     return out
 
+def crawl(start: date, end: date, crawler=None, url_fn=day_url, journal=None, changed_only=False):
+    """
+    Записи всех дней по порядку дат, страницы скачиваются параллельно. День,
+    не скачавшийся и после повторов, берёт записи из журнала (common.crawl.day_items).
+    """
+    return day_items(crawl_pages(date_range(start, end), url_fn, parse_html, crawler, journal, changed_only))
+
+def crawl_year(year: int, journal=None, changed_only=False) -> int:
+    out_path = partition_path("calend.ru", year)
+    saved = write_jsonl(out_path, crawl(date(year, 1, 1), date(year, 12, 31), journal=journal,
+                                        changed_only=changed_only))
+    print("Saved:", saved, "records to", out_path)
+    return saved
+
 def main():
-    start = date(2025, 1, 1)
-    end = date(2025, 12, 31)
-
-    items = []
-    cur = start
-    while cur <= end:
-        try:
-            items.extend(parse_day(cur))
-        except Exception as e:
-            print("Error:", cur.isoformat(), e)
-        cur += timedelta(days=1)
-
-    out_path = "data/raw_calend.jsonl"
-    with open(out_path, "w", encoding="utf-8") as f:
-        for it in items:
-            f.write(json.dumps(it, ensure_ascii=False) + "\n")
-
-    print("Saved:", len(items), "records to", out_path)
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--years", default=default_years(), help="год или диапазон: 2025, 2016-2025")
+    ap.add_argument("--resume", action="store_true", help="продолжить прерванный обход, готовые дни не скачивать")
+    ap.add_argument("--changed-only", action="store_true", help="разбирать только страницы, изменившиеся с прошлого обхода")
+    args = ap.parse_args()
+
+    journal = CrawlJournal("calend_ru", resume=args.resume)
+    try:
+        for_years(parse_years(args.years), lambda y: crawl_year(y, journal, args.changed_only))
+    finally:
+        journal.close()
 
 if __name__ == "__main__":
     main()
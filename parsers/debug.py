@@ -1,10 +1,9 @@
-import requests
 from bs4 import BeautifulSoup
 
+from common.crawl import default_crawler
+
 url = "https://www.calend.ru/day/2025-1-1/"
-r = requests.get(url, timeout=20, headers={"User-Agent": "Mozilla/5.0"})
-r.raise_for_status()
-soup = BeautifulSoup(r.text, "lxml")
+soup = BeautifulSoup(default_crawler().get_text(url), "lxml")
 
 h1 = soup.find("h1")
 print("H1:", h1.get_text(" ", strip=True) if h1 else "NO H1")
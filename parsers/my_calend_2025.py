@@ -1,11 +1,14 @@
-import json
+import argparse
 import re
-import requests
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 from datetime import date
 
-URL = "https://my-calend.ru/holidays/2025"
-HEADERS = {"User-Agent": "Mozilla/5.0"}
+from common.crawl import default_crawler, write_jsonl
+from common.normalize import normalize_title
+from common.partitions import default_years, for_years, parse_years, partition_path
+
+URL_TEMPLATE = "https://my-calend.ru/holidays/{year}"
 
 MONTH_MAP = {
     "января": "01", "февраля": "02", "марта": "03", "апреля": "04",
@@ -18,35 +21,85 @@ DATE_RE = re.compile(
     re.IGNORECASE
 )
 
-def normalize_title(s: str) -> str:
-    s = (s or "").lower().strip().replace("ё", "е")
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+# Ровно столько начала текста, сколько нужно DATE_RE ("31 сентября" + граница слова).
+DATE_PREFIX_LEN = 32
+SKIP_TEXT = {"script", "style"}
+
+def year_url(year: int) -> str:
+    return URL_TEMPLATE.format(year=year)
 
-def is_date_tag(tag) -> str | None:
+def date_from_text(txt: str, year: int) -> str | None:
     """
-    Возвращает YYYY-MM-DD если tag выглядит как '1 января Ср'
+    Возвращает YYYY-MM-DD если текст выглядит как '1 января Ср'
     """
-    txt = tag.get_text(" ", strip=True)
     m = DATE_RE.match(txt.lower())
     if not m:
         return None
     day = int(m.group(1))
     mm = MONTH_MAP[m.group(2)]
-    return f"2025-{mm}-{day:02d}"
+    return f"{year}-{mm}-{day:02d}"
 
-def main():
-    r = requests.get(URL, timeout=30, headers=HEADERS)
-    r.raise_for_status()
-    soup = BeautifulSoup(r.text, "lxml")
+def text_spans(root):
+    """
+    Один проход по дереву: все непустые строки текста по порядку документа
+    (как их склеивает get_text(" ", strip=True)) и для каждого элемента —
+    диапазон [first, end) его строк. Текст элемента — " ".join(strings[first:end]),
+    так что текст контейнеров не извлекается заново для каждого предка.
+    """
+    strings = []
+    spans = []
+    open_ = {}
+
+    def add(text):
+        if text:
+            text = text.strip()
+            if text:
+                strings.append(text)
+
+    # Комментарии и инструкции приходят своими событиями, а не start/end:
+    # без них терялся бы их хвост («Foo<!-- x -->Bar day» -> «Foo»).
+    for event, el in etree.iterwalk(root, events=("start", "end", "comment", "pi")):
+        if event == "start":
+            if isinstance(el.tag, str):
+                open_[el] = len(spans)
+                spans.append([el, len(strings), None])
+                if el.tag not in SKIP_TEXT:
+                    add(el.text)
+        elif event == "end":
+            if isinstance(el.tag, str):
+                spans[open_.pop(el)][2] = len(strings)
+            add(el.tail)
+        else:
+            add(el.tail)
+    return strings, spans
+
+def text_prefix(strings, first: int, end: int) -> str:
+    parts = []
+    size = 0
+    for i in range(first, end):
+        parts.append(strings[i])
+        size += len(strings[i]) + 1
+        if size > DATE_PREFIX_LEN:
+            break
+    return " ".join(parts)
+
+def iter_items(html: str, year: int, page_url: str | None = None):
+    """
+    Записи годовой страницы по порядку документа, без повторов.
 
-    body = soup.body or soup
-    items = []
-    current_date = None
+    Заголовок дня — любой элемент, чей текст начинается с «1 января …»:
+    дата действует для всех ссылок на праздники после него.
+    """
+    page_url = page_url or year_url(year)
+    root = lxml.html.document_fromstring(html)
+    body = root.find("body")
+    strings, spans = text_spans(body if body is not None else root)
 
-    for tag in body.find_all(True):
+    current_date = None
+    seen = set()
 
-        ds = is_date_tag(tag)
+    for tag, first, end in spans:
+        ds = date_from_text(text_prefix(strings, first, end), year)
         if ds:
             current_date = ds
             continue
@@ -54,9 +107,10 @@ def main():
         if not current_date:
             continue
 
-        if tag.name == "a" and tag.get("href"):
-            title = tag.get_text(" ", strip=True)
-            href = tag.get("href", "").strip()
+        href = tag.get("href")
+        if tag.tag == "a" and href:
+            title = " ".join(strings[first:end])
+            href = href.strip()
 
             if not title or len(title) < 3 or len(title) > 140:
                 continue
@@ -69,35 +123,38 @@ def main():
             else:
                 holiday_url = "https://my-calend.ru" + href
 
-            if holiday_url.rstrip("/") == URL.rstrip("/"):
+            if holiday_url.rstrip("/") == page_url.rstrip("/"):
+                continue
+
+            title_norm = normalize_title(title)
+            key = (current_date, title_norm, holiday_url)
+            if key in seen:
                 continue
+            seen.add(key)
 
-            items.append({
+            yield {
                 "date": current_date,
                 "title_raw": title,
-                "title_norm": normalize_title(title),
+                "title_norm": title_norm,
                 "source": "my-calend.ru",
-                "url": URL,
+                "url": page_url,
                 "holiday_url": holiday_url
-            })
+            }
 
-    seen = set()
-    uniq = []
-    for it in items:
-        key = (it["date"], it["title_norm"], it["holiday_url"])
-        if key in seen:
-            continue
-        seen.add(key)
-        uniq.append(it)
+def crawl_year(year: int) -> int:
+    html = default_crawler().get_text(year_url(year))
 
-    out = "data/raw_my_calend_2025.jsonl"
-    with open(out, "w", encoding="utf-8") as f:
-        for it in uniq:
-            f.write(json.dumps(it, ensure_ascii=False) + "\n")
+    out = partition_path("my-calend.ru", year, "raw")
+    saved = write_jsonl(out, iter_items(html, year))
 
-    print("Saved:", len(uniq), "records to", out)
-    if uniq:
-        print("Example:", uniq[0])
+    print("Saved:", saved, "records to", out)
+    return saved
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--years", default=default_years(), help="год или диапазон: 2025, 2016-2025")
+    args = ap.parse_args()
+    for_years(parse_years(args.years), crawl_year)
 
 if __name__ == "__main__":
     main()
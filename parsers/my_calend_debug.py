@@ -1,18 +1,16 @@
 import re
-import requests
 from bs4 import BeautifulSoup
 
+from common.crawl import default_crawler
+
 URL = "https://my-calend.ru/holidays/2025"
-HEADERS = {"User-Agent": "Mozilla/5.0"}
 
 day_re = re.compile(
     r"^\s*(\d{1,2})\s+(января|февраля|марта|апреля|мая|июня|июля|августа|сентября|октября|ноября|декабря)\b",
     re.I
 )
 
-r = requests.get(URL, timeout=30, headers=HEADERS)
-r.raise_for_status()
-soup = BeautifulSoup(r.text, "lxml")
+soup = BeautifulSoup(default_crawler().get_text(URL), "lxml")
 
 cand = []
 for tag in soup.find_all(True):
@@ -1,12 +1,10 @@
-import requests
 from bs4 import BeautifulSoup
 
+from common.crawl import default_crawler
+
 URL = "https://my-calend.ru/holidays/2025"
-HEADERS = {"User-Agent": "Mozilla/5.0"}
 
-r = requests.get(URL, timeout=30, headers=HEADERS)
-r.raise_for_status()
-soup = BeautifulSoup(r.text, "lxml")
+soup = BeautifulSoup(default_crawler().get_text(URL), "lxml")
 
 span = soup.find("span", string=lambda s: s and s.strip() == "8 марта")
 print("span found:", bool(span))
@@ -1,13 +1,11 @@
 import re
-import requests
 from bs4 import BeautifulSoup
 
+from common.crawl import default_crawler
+
 URL = "https://my-calend.ru/holidays/novyy-god"
-HEADERS = {"User-Agent": "Mozilla/5.0"}
 
-r = requests.get(URL, headers=HEADERS, timeout=30)
-print("status:", r.status_code)
-soup = BeautifulSoup(r.text, "lxml")
+soup = BeautifulSoup(default_crawler().get_text(URL), "lxml")
 
 md = soup.select_one("meta[name='description']")
 og = soup.select_one("meta[property='og:description']")
@@ -1,5 +1,5 @@
 from datetime import date
-from calend_ru import parse_day
+from parsers.calend_ru import parse_day
 
 items = parse_day(date(2025, 1, 1))
 print("Count:", len(items))
@@ -0,0 +1,195 @@
+"""
+Праздники из XML-дампа Википедии вместо обхода 366 страниц сайта.
+
+Дамп (pages-articles*.xml или .xml.bz2) читается потоком через iterparse,
+разобранные <page> сразу выбрасываются, так что память не растёт с размером
+дампа. Берутся только страницы дней («January 1», «1 января»), из вики-текста —
+раздел «Holidays and observances» / «Праздники и памятные дни» со всеми
+вложенными пунктами списков. На выходе те же разделы data/wikipedia.org/<год>.jsonl,
+что у wiki_holidays_2025.
+
+    python -m parsers.wiki_dump enwiki-latest-pages-articles.xml.bz2 --years 2016-2025
+    python -m parsers.wiki_dump ruwiki-latest-pages-articles.xml.bz2 --edition ru   # data/ru.wikipedia.org/
+"""
+import argparse
+import bz2
+import calendar
+import re
+
+from lxml import etree
+
+from common.crawl import write_jsonl
+from common.normalize import normalize_title
+from common.partitions import default_years, parse_years, partition_path
+from parsers.wiki_holidays_2025 import MONTH_NAMES, TEMPLATE_YEAR, year_items
+
+RU_MONTHS = {
+    1: "января", 2: "февраля", 3: "марта", 4: "апреля", 5: "мая", 6: "июня",
+    7: "июля", 8: "августа", 9: "сентября", 10: "октября", 11: "ноября", 12: "декабря",
+}
+
+# Заголовок страницы дня -> (месяц, день), раздел с праздниками, адрес страниц, источник.
+EDITIONS = {
+    "en": {
+        "day_title": {f"{name} {d}": (m, d) for m, name in MONTH_NAMES.items() for d in range(1, 32)},
+        "sections": ("holidays and observances",),
+        "base_url": "https://en.wikipedia.org/wiki/",
+        "source": "wikipedia.org",
+    },
+    "ru": {
+        "day_title": {f"{d} {name}": (m, d) for m, name in RU_MONTHS.items() for d in range(1, 32)},
+        "sections": ("праздники и памятные дни", "праздники"),
+        "base_url": "https://ru.wikipedia.org/wiki/",
+        "source": "ru.wikipedia.org",
+    },
+}
+
+HEADING_RE = re.compile(r"^(={2,6})\s*(.*?)\s*\1\s*$")
+LIST_RE = re.compile(r"^([*#:;]+)\s*(.*)$")
+COMMENT_RE = re.compile(r"<!--.*?-->", re.S)
+REF_RE = re.compile(r"<ref[^>/]*/>|<ref[^>]*>.*?</ref>", re.S | re.I)
+TAG_RE = re.compile(r"</?[a-z][^>]*>", re.I)
+TEMPLATE_RE = re.compile(r"\{\{([^{}]*)\}\}")
+LINK_RE = re.compile(r"\[\[([^\[\]|]*)(?:\|([^\[\]]*))?\]\]")
+EXT_LINK_RE = re.compile(r"\[(?:https?:)?//[^\s\]]+(?:\s+([^\]]*))?\]")
+QUOTES_RE = re.compile(r"'{2,}")
+SPACE_RE = re.compile(r"\s+")
+
+# Шаблоны, которые выводят текст: имя -> номер параметра с этим текстом.
+TEXT_TEMPLATES = {
+    "lang": 2, "transl": 2, "nowrap": 1, "nobr": 1, "ill": 1, "flag": 1, "flagcountry": 1,
+    "flagu": 1, "not a typo": 1, "abbr": 1, "small": 1,
+}
+FILE_PREFIXES = ("file:", "image:", "файл:", "изображение:", "category:", "категория:")
+
+
+def _template(m) -> str:
+    parts = [p.strip() for p in m.group(1).split("|")]
+    name = parts[0].lower()
+    if name == "sortname" and len(parts) >= 3:
+        return f"{parts[1]} {parts[2]}"
+    idx = TEXT_TEMPLATES.get(name)
+    if idx is not None and len(parts) > idx:
+        return parts[idx].split("=", 1)[-1] if "=" in parts[idx] else parts[idx]
+    return ""
+
+
+def _link(m) -> str:
+    target, label = m.group(1), m.group(2)
+    if target.strip().lower().startswith(FILE_PREFIXES):
+        return ""
+    return label if label is not None else target.split("#")[0] or target
+
+
+def wikitext_to_text(s: str) -> str:
+    s = COMMENT_RE.sub("", s)
+    s = REF_RE.sub("", s)
+    while True:
+        s, n = TEMPLATE_RE.subn(_template, s)
+        if not n:
+            break
+    s = LINK_RE.sub(_link, s)
+    s = EXT_LINK_RE.sub(lambda m: m.group(1) or "", s)
+    s = TAG_RE.sub("", s)
+    s = QUOTES_RE.sub("", s)
+    s = s.replace("&nbsp;", " ")
+    return SPACE_RE.sub(" ", s).strip()
+
+
+def holiday_items(wikitext: str, sections) -> list[str]:
+    """
+    Пункты списков раздела праздников (включая подразделы и вложенные
+    списки), каждый — своим текстом. Пункт-заголовок вида «Christian feast day:»,
+    под которым идут вложенные пункты, сам не выдаётся.
+    """
+    out = []
+    in_section = False
+    level = 0
+    lines = wikitext.splitlines()
+    for i, line in enumerate(lines):
+        h = HEADING_RE.match(line)
+        if h:
+            depth, title = len(h.group(1)), wikitext_to_text(h.group(2)).lower()
+            if in_section and depth <= level:
+                break
+            if not in_section and title in sections:
+                in_section, level = True, depth
+            continue
+        if not in_section:
+            continue
+
+        m = LIST_RE.match(line)
+        if not m:
+            continue
+        depth = len(m.group(1))
+        text = wikitext_to_text(m.group(2))
+        if not text:
+            continue
+        if text.endswith(":"):
+            nxt = LIST_RE.match(lines[i + 1]) if i + 1 < len(lines) else None
+            if nxt and len(nxt.group(1)) > depth:
+                continue
+        out.append(text)
+    return out
+
+
+def iter_pages(path: str):
+    """(title, wikitext) основного пространства имён; <page> чистятся по ходу."""
+    opener = bz2.open if path.endswith(".bz2") else open
+    with opener(path, "rb") as f:
+        for _, page in etree.iterparse(f, events=("end",), tag="{*}page", huge_tree=True):
+            ns = page.findtext("{*}ns")
+            if ns in (None, "0") and page.find("{*}redirect") is None:
+                yield page.findtext("{*}title") or "", page.findtext("{*}revision/{*}text") or ""
+            page.clear()
+            while page.getprevious() is not None:
+                del page.getparent()[0]
+
+
+def parse_dump(path: str, year: int = TEMPLATE_YEAR, edition: str = "en"):
+    """Записи в формате wiki_holidays_2025 в порядке страниц дампа."""
+    ed = EDITIONS[edition]
+    for title, text in iter_pages(path):
+        md = ed["day_title"].get(title)
+        if not md:
+            continue
+        month, day = md
+        if day > calendar.monthrange(year, month)[1]:
+            continue
+        url = ed["base_url"] + title.replace(" ", "_")
+        date = f"{year}-{month:02d}-{day:02d}"
+
+        seen = set()
+        for text_item in holiday_items(text, ed["sections"]):
+            if not (3 <= len(text_item) <= 250):
+                continue
+            tn = normalize_title(text_item)
+            if tn in seen:
+                continue
+            seen.add(tn)
+            yield {
+                "date": date,
+                "title_raw": text_item,
+                "title_norm": tn,
+                "source": ed["source"],
+                "url": url
+            }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("dump", help="pages-articles XML, можно .bz2")
+    ap.add_argument("--edition", choices=sorted(EDITIONS), default="en")
+    ap.add_argument("--years", default=default_years(), help="год или диапазон: 2025, 2016-2025")
+    args = ap.parse_args()
+
+    # Дамп читается один раз; дамп идёт по алфавиту заголовков, а разделы — по датам.
+    items = sorted(parse_dump(args.dump, TEMPLATE_YEAR, args.edition), key=lambda it: it["date"])
+    for year in parse_years(args.years):
+        out = partition_path(EDITIONS[args.edition]["source"], year)
+        saved = write_jsonl(out, year_items(items, year))
+        print("Saved:", saved, "records to", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
-import json
-import re
-import requests
+import argparse
+import calendar
 from bs4 import BeautifulSoup
-from datetime import date, timedelta
+from datetime import date
+
+from common.checkpoint import CrawlJournal
+from common.crawl import crawl_pages, date_range, day_items, default_crawler, write_jsonl
+from common.normalize import normalize_title
+from common.partitions import default_years, parse_years, partition_path
 
 MONTH_NAMES = {
     1: "January", 2: "February", 3: "March", 4: "April",
@@ -10,16 +14,17 @@ MONTH_NAMES = {
     9: "September", 10: "October", 11: "November", 12: "December",
 }
 
-def normalize_title(s: str) -> str:
-    s = s.lower().strip()
-    s = re.sub(r"\s+", " ", s)
-    return s
+TEMPLATE_YEAR = 2024   # високосный: есть страница February_29
+
+def day_url(d: date) -> str:
+    return f"https://en.wikipedia.org/wiki/{MONTH_NAMES[d.month]}_{d.day}"
 
-def parse_day(d: date):
-    url = f"https://en.wikipedia.org/wiki/{MONTH_NAMES[d.month]}_{d.day}"
-    r = requests.get(url, timeout=20, headers={"User-Agent": "Mozilla/5.0"})
-    r.raise_for_status()
-    soup = BeautifulSoup(r.text, "lxml")
+def parse_day(d: date, crawler=None, url: str | None = None):
+    url = url or day_url(d)
+    return parse_html(d, url, (crawler or default_crawler()).get_text(url))
+
+def parse_html(d: date, url: str, html: str):
+    soup = BeautifulSoup(html, "lxml")
 
     target_h2 = None
     for h2 in soup.select("#mw-content-text h2"):
@@ -59,27 +64,41 @@ def parse_day(d: date):
 
     return items
 
+def crawl(start: date, end: date, crawler=None, url_fn=day_url, journal=None, changed_only=False):
+    """
+    Записи всех дней по порядку дат, страницы скачиваются параллельно. День,
+    не скачавшийся и после повторов, берёт записи из журнала (common.crawl.day_items).
+    """
+    return day_items(crawl_pages(date_range(start, end), url_fn, parse_html, crawler, journal, changed_only))
+
+def year_items(items, year: int):
+    """Записи шаблонного года с датами нужного года (29 февраля — только в високосный)."""
+    for it in items:
+        md = it["date"][5:]
+        if md == "02-29" and not calendar.isleap(year):
+            continue
+        yield {**it, "date": f"{year}-{md}"}
+
 def main():
-    start = date(2025, 1, 1)
-    end = date(2025, 12, 31)
-
-    out = "data/raw_wiki_2025.jsonl"
-    all_items = []
-
-    d = start
-    while d <= end:
-        print("Parsing:", d.isoformat())
-        try:
-            all_items.extend(parse_day(d))
-        except Exception as e:
-            print("Error:", d.isoformat(), e)
-        d += timedelta(days=1)
-
-    with open(out, "w", encoding="utf-8") as f:
-        for it in all_items:
-            f.write(json.dumps(it, ensure_ascii=False) + "\n")
-
-    print("Saved:", len(all_items), "records to", out)
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--years", default=default_years(), help="год или диапазон: 2025, 2016-2025")
+    ap.add_argument("--resume", action="store_true", help="продолжить прерванный обход, готовые дни не скачивать")
+    ap.add_argument("--changed-only", action="store_true", help="разбирать только страницы, изменившиеся с прошлого обхода")
+    args = ap.parse_args()
+
+    # Страницы дней («January_1») от года не зависят: обходим их один раз
+    # за високосный год и раскладываем записи по всем нужным годам.
+    journal = CrawlJournal("wiki", resume=args.resume)
+    try:
+        items = list(crawl(date(TEMPLATE_YEAR, 1, 1), date(TEMPLATE_YEAR, 12, 31),
+                           journal=journal, changed_only=args.changed_only))
+    finally:
+        journal.close()
+
+    for year in parse_years(args.years):
+        out = partition_path("wikipedia.org", year)
+        saved = write_jsonl(out, year_items(items, year))
+        print("Saved:", saved, "records to", out)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,53 @@
+import json
+from datetime import date
+
+import pytest
+
+from common.checkpoint import CrawlJournal
+from common.crawl import crawl_pages, date_range, day_items, write_jsonl
+
+
+class FakeCrawler:
+    """Отдаёт страницу дня, а для дней из failing — ошибку, как после всех повторов."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+
+    def get_text(self, url):
+        if url in self.failing:
+            raise ConnectionError("503 after retries")
+        return f"<html>{url}</html>"
+
+
+def parse_html(d, url, text):
+    return [{"date": d.isoformat(), "title_raw": f"Праздник {d.day}", "url": url}]
+
+
+def url_fn(d):
+    return f"https://calend.test/{d.isoformat()}"
+
+
+def crawl(crawler, journal):
+    return day_items(crawl_pages(date_range(date(2025, 1, 1), date(2025, 1, 3)), url_fn, parse_html, crawler, journal))
+
+
+def test_failed_day_keeps_last_good_items(tmp_path):
+    journal = CrawlJournal("t", root=str(tmp_path))
+    first = list(crawl(FakeCrawler(), journal))
+    journal.close()
+
+    journal = CrawlJournal("t", root=str(tmp_path))
+    again = list(crawl(FakeCrawler(failing={url_fn(date(2025, 1, 2))}), journal))
+    journal.close()
+    assert again == first
+
+
+def test_failed_day_without_history_keeps_old_partition(tmp_path):
+    out = tmp_path / "2025.jsonl"
+    out.write_text(json.dumps({"old": True}) + "\n", encoding="utf-8")
+    journal = CrawlJournal("t", root=str(tmp_path))
+    with pytest.raises(RuntimeError):
+        write_jsonl(str(out), crawl(FakeCrawler(failing={url_fn(date(2025, 1, 2))}), journal))
+    journal.close()
+    assert out.read_text(encoding="utf-8") == json.dumps({"old": True}) + "\n"
+    assert not (tmp_path / "2025.jsonl.tmp").exists()
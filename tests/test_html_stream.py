@@ -0,0 +1,88 @@
+from common.crawl import Crawler
+from common.html_stream import first_paragraph
+from common.http_cache import HttpCache
+from common.rate import RateController
+
+PARAGRAPH = "Первый абзац статьи о празднике, достаточно длинный для описания."
+PAGE = ("<html><body><article><p>" + PARAGRAPH + "</p>" + "<p>хвост</p>" * 5000
+        + "</article></body></html>").encode("utf-8")
+SHORT = b"<html><body><div class='x'><p>short</p></div></body></html>"
+URL = "https://calend.test/holidays/1/"
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+        self.encoding = "utf-8"
+
+    def iter_content(self, size):
+        for i in range(0, len(self.body), size):
+            yield self.body[i:i + size]
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    """Отдаёт page с ETag "v1"; на If-None-Match: "v1" — 304."""
+
+    def __init__(self, page):
+        self.page = page
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(headers or {})
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            return FakeResponse(304)
+        return FakeResponse(200, self.page, {"Content-Type": "text/html; charset=utf-8", "ETag": '"v1"'})
+
+    def close(self):
+        pass
+
+
+def crawler(tmp_path, page, mode="normal"):
+    c = Crawler(cache=HttpCache(root=str(tmp_path), mode=mode), rate=RateController())
+    c.session = FakeSession(page)
+    return c
+
+
+def test_early_stop_paragraph_served_offline(tmp_path):
+    c = crawler(tmp_path, PAGE)
+    assert first_paragraph(URL, ["article"], 40, crawler=c) == PARAGRAPH
+    assert c.cache.peek(URL) is None      # тело не дочитано и не сохранено
+    c.close()
+
+    c = crawler(tmp_path, PAGE, mode="offline")
+    assert first_paragraph(URL, ["article"], 40, crawler=c) == PARAGRAPH
+    assert c.session.requests == []
+    c.close()
+
+
+def test_stale_paragraph_revalidated_by_etag(tmp_path):
+    c = crawler(tmp_path, PAGE)
+    first_paragraph(URL, ["article"], 40, crawler=c)
+    c.close()
+
+    c = crawler(tmp_path, PAGE, mode="refresh")
+    assert first_paragraph(URL, ["article"], 40, crawler=c) == PARAGRAPH
+    assert c.session.requests == [{"If-None-Match": '"v1"'}]
+    assert c.cache.revalidated == 1
+    c.close()
+
+
+def test_body_read_to_eof_is_cached(tmp_path):
+    c = crawler(tmp_path, SHORT)
+    assert first_paragraph(URL, [".x"], 40, crawler=c) == ""
+    c.close()
+
+    c = crawler(tmp_path, SHORT, mode="offline")
+    assert c.cache.peek(URL) == SHORT.decode("utf-8")
+    # Другие параметры разбора — абзац из сохранённого тела, без сети.
+    assert first_paragraph(URL, [".x"], 5, crawler=c) == "short"
+    assert c.session.requests == []
+    c.close()
@@ -0,0 +1,65 @@
+import json
+import sqlite3
+
+import pytest
+
+from db.load_and_dedupe import clean_record, load
+
+
+def record(date_str: str, title: str = "День рыбака") -> dict:
+    return {"date": date_str, "title_raw": title, "url": "https://example.org/d", "holiday_url": "https://example.org/h"}
+
+
+def test_clean_record_drops_impossible_date():
+    assert clean_record(record("2025-02-30")) is None
+    assert clean_record(record("2025-13-01")) is None
+    assert clean_record(record("not a date")) is None
+
+
+def test_clean_record_keeps_valid_date():
+    assert clean_record(record("2025-02-28"))[0] == "2025-02-28"
+
+
+def test_load_survives_malformed_date(tmp_path):
+    path = tmp_path / "2025.jsonl"
+    rows = [record("2025-02-30"), record("2025-07-13"), record("2024-07-14")]
+    path.write_text("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows), encoding="utf-8")
+    db_path = str(tmp_path / "holidays.sqlite")
+
+    load(db_path, [(str(path), "calend.ru")], bulk=True)
+
+    con = sqlite3.connect(db_path)
+    dates = [r[0] for r in con.execute("SELECT date FROM occurrences ORDER BY date")]
+    con.close()
+    assert dates == ["2024-07-14", "2025-07-13"]
+
+
+def test_incremental_load_does_not_overwrite_newer_build(tmp_path, monkeypatch):
+    from db import load_and_dedupe
+
+    path = tmp_path / "2025.jsonl"
+    path.write_text(json.dumps(record("2025-07-13")) + "\n", encoding="utf-8")
+    db_path = str(tmp_path / "holidays.sqlite")
+    load(db_path, [(str(path), "calend.ru", 2025)], bulk=True)
+
+    # Пока идёт сборка, рабочую базу подменяет кто-то другой (например, db.enrich --target db).
+    resolve = load_and_dedupe.resolve
+
+    def concurrent_publish(conn, scoped=False):
+        con = sqlite3.connect(db_path)
+        con.execute("UPDATE meta SET value = 'newer' WHERE key = 'build_id'")
+        con.commit()
+        con.close()
+        return resolve(conn, scoped)
+
+    monkeypatch.setattr(load_and_dedupe, "resolve", concurrent_publish)
+    path.write_text(json.dumps(record("2025-07-13")) + "\n" + json.dumps(record("2025-07-14", "День моря")) + "\n",
+                    encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        load(db_path, [(str(path), "calend.ru", 2025)], incremental=True)
+
+    con = sqlite3.connect(db_path)
+    assert con.execute("SELECT value FROM meta WHERE key = 'build_id'").fetchone()[0] == "newer"
+    assert con.execute("SELECT count(*) FROM mentions").fetchone()[0] == 1
+    con.close()
+    assert not [p for p in tmp_path.iterdir() if ".build" in p.name]
@@ -0,0 +1,22 @@
+from parsers.my_calend_2025 import iter_items
+
+
+def page(links: str) -> str:
+    return f"<html><body><div>1 января Ср</div>{links}</body></html>"
+
+
+def test_comment_inside_holiday_link_keeps_the_rest_of_the_title():
+    items = list(iter_items(page('<a href="/holidays/x">Foo<!-- x -->Bar day</a>'), 2025))
+    assert [i["title_raw"] for i in items] == ["Foo Bar day"]
+
+
+def test_processing_instruction_tail_is_kept():
+    items = list(iter_items(page('<a href="/holidays/y">Day of<?php echo 1 ?> the Sea</a>'), 2025))
+    assert [i["title_raw"] for i in items] == ["Day of the Sea"]
+
+
+def test_date_header_applies_to_following_links():
+    items = list(iter_items(page('<a href="/holidays/x">Новый год</a><div>2 января Чт</div>'
+                                 '<a href="/holidays/y">День науки</a>'), 2025))
+    assert [(i["date"], i["title_raw"]) for i in items] == [("2025-01-01", "Новый год"),
+                                                            ("2025-01-02", "День науки")]
@@ -0,0 +1,122 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+
+import anyio
+import brotli
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+SRC_DIR = "webapp/static"
+BUILD_DIR = "webapp/static/build"
+URL_PREFIX = "/static"
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# (Content-Encoding, расширение файла) в порядке предпочтения
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class Assets:
+    """
+    Статика с хэшем содержимого в имени файла: style.css -> style.3f9a1c2b.css.
+
+    Имя меняется вместе с содержимым, поэтому файлы можно кэшировать навсегда.
+    Сжатые gzip/brotli-версии готовятся один раз при старте.
+    """
+
+    def __init__(self, src_dir: str = SRC_DIR, build_dir: str = BUILD_DIR):
+        self.src_dir = src_dir
+        self.build_dir = build_dir
+        self._names = {}
+
+    def hashed_name(self, name: str) -> str:
+        if name not in self._names:
+            with open(os.path.join(self.src_dir, name), "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()[:10]
+            stem, ext = os.path.splitext(name)
+            self._names[name] = f"{stem}.{digest}{ext}"
+        return self._names[name]
+
+    def url(self, name: str) -> str:
+        return f"{URL_PREFIX}/{self.hashed_name(name)}"
+
+    def build(self):
+        os.makedirs(self.build_dir, exist_ok=True)
+        expected = set()
+
+        for name in sorted(os.listdir(self.src_dir)):
+            src = os.path.join(self.src_dir, name)
+            if not os.path.isfile(src):
+                continue
+            with open(src, "rb") as f:
+                data = f.read()
+
+            out = self.hashed_name(name)
+            variants = {
+                out: lambda: data,
+                out + ".gz": lambda: gzip.compress(data, 9),
+                out + ".br": lambda: brotli.compress(data, quality=11),
+            }
+            for filename, make in variants.items():
+                expected.add(filename)
+                path = os.path.join(self.build_dir, filename)
+                if not os.path.exists(path):
+                    write_atomic(path, make())
+
+        for filename in os.listdir(self.build_dir):
+            if filename not in expected and not filename.endswith(".tmp"):
+                os.remove(os.path.join(self.build_dir, filename))
+
+
+def write_atomic(path: str, data: bytes):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class AssetFiles(StaticFiles):
+    """StaticFiles, отдающий заранее сжатые варианты по Accept-Encoding."""
+
+    async def get_response(self, path: str, scope):
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+        for encoding, ext in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + ext)
+            except (OSError, ValueError):
+                break
+            if stat_result is None:
+                continue
+            response = FileResponse(full_path, stat_result=stat_result, media_type=media_type)
+            response.headers["Content-Encoding"] = encoding
+            if self.is_not_modified(response.headers, Headers(scope=scope)):
+                response = NotModifiedResponse(response.headers)
+            return self._with_cache_headers(response)
+
+        return self._with_cache_headers(await super().get_response(path, scope))
+
+    @staticmethod
+    def _with_cache_headers(response):
+        response.headers["Cache-Control"] = CACHE_CONTROL
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+assets = Assets()
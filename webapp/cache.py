@@ -0,0 +1,95 @@
+import gzip
+import threading
+from collections import OrderedDict
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from webapp.db import pool
+
+MAX_PAGES = 1024
+GZIP_LEVEL = 6
+HTML_TYPE = "text/html; charset=utf-8"
+
+
+class PageCache:
+    """
+    LRU-кэш готовых HTML-страниц вместе с их gzip-версией.
+
+    Ключ — маршрут и параметры. Весь кэш сбрасывается, как только
+    пул соединений переключается на новую сборку базы.
+    """
+
+    def __init__(self, maxsize: int = MAX_PAGES, fingerprint=lambda: pool.generation):
+        self.maxsize = maxsize
+        self.fingerprint = fingerprint
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_version(self):
+        version = self.fingerprint()
+        if version != self._version:
+            if self._pages:
+                self.invalidations += 1
+            self._pages.clear()
+            self._version = version
+
+    def get_or_render(self, key, render):
+        """Возвращает (html_bytes, gzip_bytes), рендеря страницу при промахе."""
+        with self._lock:
+            self._check_version()
+            entry = self._pages.get(key)
+            if entry is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            version = self._version
+
+        with pool.pinned():
+            body = render().encode("utf-8")
+        entry = (body, gzip.compress(body, GZIP_LEVEL))
+
+        with self._lock:
+            self._check_version()
+            if version == self._version:
+                self._pages[key] = entry
+                self._pages.move_to_end(key)
+                while len(self._pages) > self.maxsize:
+                    self._pages.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self._version = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._pages),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+pages = PageCache()
+
+
+def accepts_gzip(request: Request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+
+def cached_html(request: Request, key, render) -> Response:
+    body, gz = pages.get_or_render(key, render)
+    headers = {"Vary": "Accept-Encoding"}
+    if accepts_gzip(request):
+        headers["Content-Encoding"] = "gzip"
+        return Response(gz, media_type=HTML_TYPE, headers=headers)
+    return Response(body, media_type=HTML_TYPE, headers=headers)
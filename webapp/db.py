@@ -0,0 +1,128 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from common import texts
+
+DB_PATH = "db/holidays.sqlite"
+SCHEMA_PATH = "db/schema.sql"
+
+MMAP_SIZE = 256 * 1024 * 1024      # байт, отображаем файл БД в память целиком
+CACHE_SIZE_KIB = 64 * 1024         # кэш страниц на одно соединение
+STATEMENT_CACHE = 128              # подготовленные запросы на одно соединение
+
+
+def db_fingerprint(path: str = DB_PATH):
+    """Меняется, когда load_and_dedupe.py подменяет или дописывает файл базы."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class ConnectionPool:
+    """
+    Пул read-only соединений с SQLite: по одному соединению на рабочий поток.
+
+    FastAPI выполняет синхронные обработчики в пуле потоков, поэтому
+    размер пула ограничен числом этих потоков. Соединение открывается один раз
+    и переиспользуется: кэш страниц и подготовленные запросы остаются тёплыми.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._generation = 0
+
+    def _open(self) -> sqlite3.Connection:
+        if not os.path.exists(self.path):
+            return self._open_empty()
+        uri = "file:" + quote(os.path.abspath(self.path)) + "?mode=ro"
+        con = sqlite3.connect(
+            uri,
+            uri=True,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE,
+        )
+        con.row_factory = sqlite3.Row
+        texts.register(con)     # text_body(): описания в texts хранятся сжатыми
+        con.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        con.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB}")
+        con.execute("PRAGMA query_only=ON")
+        return con
+
+    def _open_empty(self) -> sqlite3.Connection:
+        """
+        Базы ещё нет (свежий checkout, идёт первая сборка): пустая схема в памяти,
+        чтобы страницы отвечали «ничего не найдено», пока Reloader не увидит файл.
+        """
+        con = sqlite3.connect(":memory:", check_same_thread=False, cached_statements=STATEMENT_CACHE)
+        con.row_factory = sqlite3.Row
+        texts.register(con)
+        with open(SCHEMA_PATH, encoding="utf-8") as f:
+            con.executescript(f.read())
+        return con
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def connection(self) -> sqlite3.Connection:
+        gen, con = getattr(self._local, "slot", (None, None))
+        if con is not None and (gen == self._generation or getattr(self._local, "pinned", False)):
+            return con
+
+        if con is not None:
+            # Соединение со старой сборкой: закрывает его только поток-владелец,
+            # поэтому запросы, начатые до reload(), спокойно дочитывают старый файл.
+            with self._lock:
+                if con in self._connections:
+                    self._connections.remove(con)
+            con.close()
+
+        con = self._open()
+        with self._lock:
+            self._connections.append(con)
+            self._local.slot = (self._generation, con)
+        return con
+
+    @contextmanager
+    def pinned(self):
+        """Все запросы внутри блока читают одну и ту же сборку базы."""
+        self.connection()
+        self._local.pinned = True
+        try:
+            yield
+        finally:
+            self._local.pinned = False
+
+    def fetchall(self, sql: str, params=()):
+        return self.connection().execute(sql, params).fetchall()
+
+    def fetchone(self, sql: str, params=()):
+        return self.connection().execute(sql, params).fetchone()
+
+    def open_detached(self) -> sqlite3.Connection:
+        """Отдельное соединение вне пула, например для прогрева новой сборки."""
+        return self._open()
+
+    def reload(self):
+        """Переключает потоки на текущий файл базы при их следующем запросе."""
+        with self._lock:
+            self._generation += 1
+
+    def close(self):
+        """Закрывает все соединения; потоки откроют новые при следующем запросе."""
+        with self._lock:
+            self._generation += 1
+            connections, self._connections = self._connections, []
+        for con in connections:
+            con.close()
+
+
+pool = ConnectionPool()
@@ -0,0 +1,91 @@
+from collections import Counter, defaultdict
+
+from rapidfuzz import fuzz, process
+
+from common.normalize import normalize_title
+
+GRAM = 3
+MAX_CANDIDATES = 300       # сколько заголовков отдаём в rapidfuzz после блокировки
+COMMON_GRAM_SHARE = 0.02   # триграммы, встречающиеся чаще, считаем стоп-граммами
+MIN_GRAMS = 3              # столько самых редких триграмм учитываем всегда
+SCORE_CUTOFF = 72
+
+
+def normalize(s: str) -> str:
+    """Запрос и названия приводятся к тому же ключу, что title_norm в базе."""
+    return normalize_title(s)
+
+
+def grams(s: str) -> set:
+    padded = f" {s} "
+    return {padded[i:i + GRAM] for i in range(len(padded) - GRAM + 1)}
+
+
+class FuzzyIndex:
+    """
+    Поиск с опечатками по названиям праздников.
+
+    Триграммный инвертированный индекс отбирает небольшой набор кандидатов,
+    и только их rapidfuzz сравнивает с запросом, так что время ответа
+    не растёт линейно с числом названий.
+    """
+
+    def __init__(self):
+        self.titles = {}
+        self.meta = {}
+        self.postings = {}
+
+    def __len__(self):
+        return len(self.titles)
+
+    def build(self, rows):
+        """rows: (id, canonical_title_norm, canonical_title, lang)"""
+        titles = {}
+        meta = {}
+        postings = defaultdict(list)
+        for hid, title_norm, title, lang in rows:
+            norm = normalize(title_norm)
+            if not norm:
+                continue
+            titles[hid] = norm
+            meta[hid] = (title, lang)
+            for g in grams(norm):
+                postings[g].append(hid)
+
+        self.titles = titles
+        self.meta = meta
+        self.postings = {g: tuple(ids) for g, ids in postings.items()}
+
+    def candidates(self, q_norm: str) -> list:
+        lists = sorted((self.postings.get(g, ()) for g in grams(q_norm)), key=len)
+        common = max(MAX_CANDIDATES, int(len(self.titles) * COMMON_GRAM_SHARE))
+
+        counts = Counter()
+        for i, ids in enumerate(lists):
+            if i >= MIN_GRAMS and len(ids) > common:
+                break
+            counts.update(ids)
+        return [hid for hid, _ in counts.most_common(MAX_CANDIDATES)]
+
+    def search(self, q: str, limit: int = 20, score_cutoff: int = SCORE_CUTOFF) -> list:
+        """Возвращает [(id, canonical_title, lang, score)] по убыванию похожести."""
+        q_norm = normalize(q)
+        if len(q_norm) < GRAM:
+            return []
+
+        choices = {hid: self.titles[hid] for hid in self.candidates(q_norm)}
+        hits = process.extract(
+            q_norm, choices, scorer=fuzz.WRatio, limit=limit, score_cutoff=score_cutoff
+        )
+        return [(hid, *self.meta[hid], score) for _, score, hid in hits]
+
+
+index = FuzzyIndex()
+
+
+def load(fetchall):
+    """Строит новый индекс и подменяет им текущий одним присваиванием."""
+    global index
+    fresh = FuzzyIndex()
+    fresh.build(fetchall("SELECT id, canonical_title_norm, canonical_title, lang FROM holidays"))
+    index = fresh
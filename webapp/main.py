@@ -1,24 +1,37 @@
 import html
-import sqlite3
-from fastapi import FastAPI, Query
+import re
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, Request
 from fastapi.responses import HTMLResponse
 
-DB_PATH = "db/holidays.sqlite"
-app = FastAPI()
+from common.normalize import fold_yo
+from webapp import fuzzy, rules
+from webapp.assets import BUILD_DIR, URL_PREFIX, AssetFiles, assets
+from webapp.cache import cached_html, pages
+from webapp.db import pool
+from webapp.reload import reloader
+
+FUZZY_FALLBACK_BELOW = 5
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    assets.build()
+    reloader.start()
+    yield
+    reloader.stop()
+    pool.close()
+
+
+app = FastAPI(lifespan=lifespan)
+app.mount(URL_PREFIX, AssetFiles(directory=BUILD_DIR, check_dir=False), name="static")
 
 def db_fetchall(sql: str, params=()):
-    con = sqlite3.connect(DB_PATH)
-    con.row_factory = sqlite3.Row
-    cur = con.cursor()
-    cur.execute(sql, params)
-    rows = cur.fetchall()
-    con.close()
-    return rows
+    return pool.fetchall(sql, params)
 
 
 def db_fetchone(sql: str, params=()):
-    rows = db_fetchall(sql, params)
-    return rows[0] if rows else None
+    return pool.fetchone(sql, params)
 
 
 def esc(s: str) -> str:
@@ -32,6 +45,23 @@ def short(s: str, n: int = 260) -> str:
     return s[:n].rsplit(" ", 1)[0] + "…"
 
 
+def fts_query(q: str) -> str:
+    """
+    Превращает пользовательский запрос в выражение FTS5:
+    каждое слово ищется как префикс, ё приравнивается к е.
+    """
+    words = re.findall(r"\w+", fold_yo(q))
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def snippet_html(snip: str) -> str:
+    snip = (snip or "").strip()
+    if not snip:
+        return ""
+    marked = esc(snip).replace("\x02", "<b>").replace("\x03", "</b>")
+    return f"<div class='muted' style='margin-top:6px; font-size:13px; line-height:1.35;'>{marked}</div>"
+
+
 def month_from_iso(date_str: str):
     try:
         return int((date_str or "").split("-")[1])
@@ -60,280 +90,7 @@ def page(title: str, body: str, season: str = "neutral") -> str:
   <meta charset="utf-8">
   <meta name="viewport" content="width=device-width, initial-scale=1">
   <title>{esc(title)}</title>
-  <style>
-    :root {{
-      --bg1: #0b1020;
-      --bg2: #161a2b;
-      --card: rgba(255,255,255,0.08);
-      --card2: rgba(255,255,255,0.10);
-      --text: rgba(255,255,255,0.92);
-      --muted: rgba(255,255,255,0.70);
-      --border: rgba(255,255,255,0.12);
-      --shadow: 0 20px 60px rgba(0,0,0,0.35);
-      --accent: #7c5cff;
-      --accent2: #2dd4bf;
-      --ok: #22c55e;
-      --warn: #fbbf24;
-    }}
-
-    body {{
-      margin: 0;
-      font-family: ui-sans-serif, -apple-system, BlinkMacSystemFont, "Segoe UI",
-                   Roboto, "Helvetica Neue", Arial, "Noto Sans", "Apple Color Emoji",
-                   "Segoe UI Emoji", "Segoe UI Symbol";
-      color: var(--text);
-      background:
-        radial-gradient(1200px 800px at 20% 10%, rgba(124,92,255,0.35), transparent 60%),
-        radial-gradient(900px 700px at 80% 30%, rgba(45,212,191,0.25), transparent 60%),
-        linear-gradient(180deg, var(--bg1), var(--bg2));
-      min-height: 100vh;
-      overflow-x: hidden;
-    }}
-
-    /* seasonal tint */
-    body[data-season="winter"] {{
-      background:
-        radial-gradient(1200px 800px at 20% 10%, rgba(99, 179, 237, 0.30), transparent 60%),
-        radial-gradient(900px 700px at 80% 30%, rgba(255,255,255,0.10), transparent 60%),
-        linear-gradient(180deg, #0b132b, #0b1020);
-    }}
-    body[data-season="spring"] {{
-      background:
-        radial-gradient(1200px 800px at 20% 10%, rgba(244,114,182,0.25), transparent 60%),
-        radial-gradient(900px 700px at 80% 30%, rgba(34,197,94,0.18), transparent 60%),
-        linear-gradient(180deg, #0b1020, #121a26);
-    }}
-    body[data-season="summer"] {{
-      background:
-        radial-gradient(1200px 800px at 20% 10%, rgba(250,204,21,0.22), transparent 60%),
-        radial-gradient(900px 700px at 80% 30%, rgba(59,130,246,0.22), transparent 60%),
-        linear-gradient(180deg, #081226, #0b1020);
-    }}
-    body[data-season="autumn"] {{
-      background:
-        radial-gradient(1200px 800px at 20% 10%, rgba(249,115,22,0.22), transparent 60%),
-        radial-gradient(900px 700px at 80% 30%, rgba(245,158,11,0.18), transparent 60%),
-        linear-gradient(180deg, #0b1020, #151725);
-    }}
-
-    a {{ color: inherit; text-decoration: none; }}
-    a:hover {{ text-decoration: underline; }}
-
-    .wrap {{
-      max-width: 980px;
-      margin: 0 auto;
-      padding: 26px 18px 70px;
-    }}
-
-    .topbar {{
-      display: flex;
-      align-items: center;
-      justify-content: space-between;
-      gap: 14px;
-      margin-bottom: 18px;
-    }}
-
-    .nav a {{
-      display: inline-flex;
-      align-items: center;
-      gap: 8px;
-      padding: 10px 12px;
-      border: 1px solid var(--border);
-      border-radius: 14px;
-      background: rgba(255,255,255,0.05);
-      backdrop-filter: blur(8px);
-    }}
-    .nav a:hover {{
-      background: rgba(255,255,255,0.08);
-      text-decoration: none;
-    }}
-
-    .hero {{
-      border: 1px solid var(--border);
-      border-radius: 22px;
-      background: linear-gradient(180deg, rgba(255,255,255,0.10), rgba(255,255,255,0.06));
-      box-shadow: var(--shadow);
-      padding: 18px;
-      overflow: hidden;
-      position: relative;
-      flex: 1;
-      text-align: center; 
-    }}
-
-    .hero::before {{
-      content: "";
-      position: absolute;
-      inset: -120px -80px auto auto;
-      width: 380px;
-      height: 380px;
-      background: radial-gradient(circle at 30% 30%, rgba(124,92,255,0.35), transparent 65%);
-      transform: rotate(15deg);
-      pointer-events: none;
-    }}
-
-    .title h1 {{
-      font-size: 28px;
-      margin: 0;
-      letter-spacing: 0.2px;
-      font-weight: 800;
-    }}
-    .title p {{
-      margin: 6px 0 0;
-      color: var(--muted);
-      font-size: 14px;
-    }}
-
-    .grid {{
-      display: grid;
-      grid-template-columns: 1.1fr 0.9fr;
-      gap: 14px;
-    }}
-    @media (max-width: 840px) {{
-      .grid {{ grid-template-columns: 1fr; }}
-    }}
-
-    .card {{
-      border: 1px solid var(--border);
-      border-radius: 20px;
-      background: var(--card);
-      padding: 16px;
-      backdrop-filter: blur(10px);
-    }}
-
-    .card h2 {{
-      margin: 0 0 10px;
-      font-size: 16px;
-    }}
-    .muted {{ color: var(--muted); }}
-
-    input, button {{
-      font: inherit;
-    }}
-
-    .row {{
-      display: flex;
-      gap: 10px;
-    }}
-
-    .field {{
-      flex: 1;
-      padding: 12px 12px;
-      border-radius: 14px;
-      border: 1px solid var(--border);
-      background: rgba(0,0,0,0.16);
-      color: var(--text);
-      outline: none;
-    }}
-    .field::placeholder {{ color: rgba(255,255,255,0.45); }}
-
-    .btn {{
-      padding: 12px 14px;
-      border-radius: 14px;
-      border: 1px solid rgba(124,92,255,0.40);
-      background: linear-gradient(135deg, rgba(124,92,255,0.90), rgba(45,212,191,0.70));
-      color: #0b1020;
-      font-weight: 700;
-      cursor: pointer;
-      box-shadow: 0 14px 40px rgba(124,92,255,0.18);
-    }}
-    .btn:hover {{
-      filter: brightness(1.03);
-    }}
-
-    .pill {{
-      display: inline-flex;
-      align-items: center;
-      gap: 8px;
-      border: 1px solid var(--border);
-      background: rgba(255,255,255,0.05);
-      border-radius: 999px;
-      padding: 8px 12px;
-      font-size: 13px;
-      color: var(--muted);
-    }}
-
-    .list {{
-      margin: 0;
-      padding: 0;
-      list-style: none;
-      display: grid;
-      gap: 10px;
-    }}
-
-    .item {{
-      border: 1px solid var(--border);
-      background: rgba(255,255,255,0.06);
-      border-radius: 18px;
-      padding: 12px 14px;
-      display: flex;
-      justify-content: space-between;
-      align-items: center;
-      gap: 12px;
-    }}
-
-    .item a {{
-      font-weight: 650;
-    }}
-
-    .tag {{
-      font-size: 12px;
-      padding: 6px 10px;
-      border-radius: 999px;
-      border: 1px solid var(--border);
-      color: var(--muted);
-      background: rgba(0,0,0,0.12);
-      white-space: nowrap;
-    }}
-
-    .tag.ok {{
-      border-color: rgba(34,197,94,0.35);
-      color: rgba(34,197,94,0.95);
-      background: rgba(34,197,94,0.10);
-      font-weight: 700;
-    }}
-
-    .descbox {{
-      border: 1px solid var(--border);
-      background: rgba(255,255,255,0.07);
-      border-radius: 20px;
-      padding: 14px;
-      margin: 14px 0;
-    }}
-    .descbox .src {{
-      color: var(--muted);
-      font-size: 13px;
-      margin-bottom: 6px;
-    }}
-    .descbox .txt {{
-      font-size: 15px;
-      line-height: 1.45;
-      color: rgba(255,255,255,0.92);
-    }}
-
-    /* particles layer */
-    .particles {{
-      position: fixed;
-      inset: 0;
-      pointer-events: none;
-      overflow: hidden;
-      z-index: 0;
-    }}
-    .wrap, .hero {{ position: relative; z-index: 1; }}
-
-    .p {{
-      position: absolute;
-      top: -40px;
-      opacity: 0.85;
-      animation: fall linear infinite;
-      filter: drop-shadow(0 8px 16px rgba(0,0,0,0.25));
-      user-select: none;
-    }}
-    @keyframes fall {{
-      to {{
-        transform: translateY(110vh) translateX(var(--drift));
-      }}
-    }}
-  </style>
+  <link rel="stylesheet" href="{assets.url('style.css')}">
 </head>
 <body data-season="{esc(season)}">
   <div class="particles" id="particles"></div>
@@ -354,37 +111,7 @@ def page(title: str, body: str, season: str = "neutral") -> str:
     {body}
   </div>
 
-<script>
-(function() {{
-  const season = document.body.getAttribute("data-season") || "neutral";
-  const layer = document.getElementById("particles");
-  if (!layer) return;
-
-  let glyphs = ["•"];
-  let count = 0;
-
-  if (season === "winter") {{ glyphs = ["❄","❅","✻"]; count = 26; }}
-  else if (season === "spring") {{ glyphs = ["🌸","💮","🌼"]; count = 20; }}
-  else if (season === "summer") {{ glyphs = ["✨","⭐","🌟"]; count = 18; }}
-  else if (season === "autumn") {{ glyphs = ["🍂","🍁","🍃"]; count = 20; }}
-  else {{ glyphs = ["•"]; count = 0; }}
-
-  function rnd(a,b) {{ return a + Math.random()*(b-a); }}
-
-  for (let i=0; i<count; i++) {{
-    const el = document.createElement("div");
-    el.className = "p";
-    el.textContent = glyphs[Math.floor(Math.random()*glyphs.length)];
-    el.style.left = rnd(0, 100) + "vw";
-    el.style.fontSize = rnd(12, 26) + "px";
-    el.style.animationDuration = rnd(8, 18) + "s";
-    el.style.animationDelay = rnd(0, 6) + "s";
-    el.style.setProperty("--drift", (rnd(-12, 12)) + "vw");
-    el.style.opacity = rnd(0.45, 0.9);
-    layer.appendChild(el);
-  }}
-}})();
-</script>
+<script src="{assets.url('particles.js')}"></script>
 
 </body>
 </html>
@@ -434,24 +161,33 @@ def home():
 
 
 @app.get("/date", response_class=HTMLResponse)
-def by_date(d: str = Query(..., description="YYYY-MM-DD")):
+def by_date(request: Request, d: str = Query(..., description="YYYY-MM-DD")):
+    return cached_html(request, ("date", d), lambda: render_date(d))
+
+
+def with_rule_dates(d: str, rows) -> list:
+    """
+    Добавляет к собранным на дату праздникам те, что приходятся на неё по
+    правилу повторения, и сортирует как date_summary.
+    """
+    merged = [dict(r, rule=False) for r in rows]
+    extra = rules.index.on(d)
+    if extra:
+        seen = {(r["title"], r["lang"]) for r in merged}
+        merged += [e for e in extra if (e["title"], e["lang"]) not in seen]
+        merged.sort(key=lambda r: (r["lang"] != "ru", not r["has_desc"], r["title"]))
+    return merged[:700]
+
+
+def render_date(d: str) -> str:
     rows = db_fetchall("""
-    SELECT
-        o.id AS occ_id,
-        h.canonical_title,
-        h.lang,
-        MAX(CASE WHEN trim(coalesce(m.description,'')) != '' THEN 1 ELSE 0 END) AS has_desc
-    FROM occurrences o
-    JOIN holidays h ON h.id = o.holiday_id
-    JOIN mentions m ON m.occurrence_id = o.id
-    WHERE o.date = ?
-    GROUP BY o.id, h.canonical_title, h.lang
-    ORDER BY
-        CASE WHEN h.lang='ru' THEN 0 ELSE 1 END,
-        has_desc DESC,
-        h.canonical_title
+    SELECT occ_id, title, lang, has_desc
+    FROM date_summary
+    WHERE date = ?
+    ORDER BY sort_key
     LIMIT 700
     """, (d,))
+    rows = with_rule_dates(d, rows)
 
     season = season_by_month(month_from_iso(d))
 
@@ -473,8 +209,9 @@ def by_date(d: str = Query(..., description="YYYY-MM-DD")):
             f"""
             <li class="item">
               <div>
-                <a href="/occurrence/{r['occ_id']}">{esc(r['canonical_title'])}</a>
+                <a href="/occurrence/{r['occ_id']}">{esc(r['title'])}</a>
                 <span class="muted" style="margin-left:8px; font-size:12px;">({esc(r['lang'])})</span>
+                {"<span class='muted' style='margin-left:6px; font-size:12px;' title='дата по правилу повторения'>↻</span>" if r['rule'] else ""}
               </div>
               {icon}
             </li>
@@ -499,45 +236,30 @@ def by_date(d: str = Query(..., description="YYYY-MM-DD")):
 
 
 @app.get("/occurrence/{occ_id}", response_class=HTMLResponse)
-def occurrence(occ_id: int):
+def occurrence(request: Request, occ_id: int):
+    return cached_html(request, ("occurrence", occ_id), lambda: render_occurrence(occ_id))
+
+
+def render_occurrence(occ_id: int) -> str:
     info = db_fetchone("""
-      SELECT o.date, h.canonical_title, h.lang
+      SELECT o.date, h.id AS holiday_id, h.canonical_title, h.lang, o.best_source,
+             text_body(t.body) AS best_description
       FROM occurrences o
       JOIN holidays h ON h.id = o.holiday_id
+      LEFT JOIN texts t ON t.id = o.best_description_id
       WHERE o.id = ?
     """, (occ_id,))
     if not info:
         body = "<div class='hero'><div class='card'><h2>Не найдено</h2></div></div>"
         return page("Не найдено", body)
 
-    mentions = db_fetchall("""
-      SELECT s.name AS source, m.title_raw, m.description, m.url
-      FROM mentions m
-      JOIN sources s ON s.id = m.source_id
-      WHERE m.occurrence_id = ?
-      ORDER BY
-        CASE s.name
-            WHEN 'my-calend.ru' THEN 0
-            WHEN 'calend.ru' THEN 1
-            WHEN 'wikipedia.org' THEN 2
-            ELSE 9
-        END
-    """, (occ_id,))
-
-    best = None
-    for src in ("my-calend.ru", "calend.ru", "wikipedia.org"):
-        for m in mentions:
-            if m["source"] == src and (m["description"] or "").strip():
-                best = m
-                break
-        if best:
-            break
+    best = info["best_source"]
 
     if best:
         best_box = f"""
         <div class="descbox">
-          <div class="src">Описание (источник: <b>{esc(best['source'])}</b>)</div>
-          <div class="txt">{esc(best['description'])}</div>
+          <div class="src">Описание (источник: <b>{esc(best)}</b>)</div>
+          <div class="txt">{esc(info['best_description'])}</div>
         </div>
         """
     else:
@@ -548,9 +270,18 @@ def occurrence(occ_id: int):
         </div>
         """
 
+    mentions = db_fetchall("""
+      SELECT s.name AS source, m.title_raw, text_body(t.body) AS description, m.url
+      FROM mentions m
+      JOIN sources s ON s.id = m.source_id
+      LEFT JOIN texts t ON t.id = m.description_id
+      WHERE m.occurrence_id = ?
+      ORDER BY s.priority, m.id
+    """, (occ_id,))
+
     m_items = []
     for m in mentions:
-        same_as_best = bool(best and m["source"] == best["source"] and (m["description"] or "").strip())
+        same_as_best = bool(best and m["source"] == best and (m["description"] or "").strip())
 
         desc_html = ""
         if not same_as_best:
@@ -573,6 +304,35 @@ def occurrence(occ_id: int):
             """
         )
 
+    rule = rules.index.describe(info["holiday_id"])
+    rule_html = f"<div class='muted'>Повторяется: {esc(rule)}</div>" if rule else ""
+
+    # Ссылка ведёт на дату того же дня, если она есть, иначе на последнюю.
+    aliases = db_fetchall("""
+      SELECT h.canonical_title, h.lang,
+             (SELECT o.id FROM occurrences o WHERE o.holiday_id = h.id
+              ORDER BY o.date = ? DESC, o.date DESC LIMIT 1) AS occ_id
+      FROM aliases a
+      JOIN holidays h ON h.id = a.alias_id
+      WHERE a.holiday_id = ?
+      ORDER BY a.score DESC, h.id
+      LIMIT 10
+    """, (info["date"], info["holiday_id"]))
+    aliases_html = ""
+    if aliases:
+        a_items = "".join(
+            f"""<li class="item"><a href="/occurrence/{a['occ_id']}">{esc(a['canonical_title'])}</a>
+                <span class="tag">{esc(a['lang'])}</span></li>"""
+            for a in aliases
+        )
+        aliases_html = f"""
+      <div class="card">
+        <h2>На других языках</h2>
+        <ul class="list">{a_items}</ul>
+      </div>
+      <div style="height:12px;"></div>
+      """
+
     body = f"""
     <div class="hero">
       <div class="card">
@@ -580,10 +340,12 @@ def occurrence(occ_id: int):
         <div class="muted">
           Дата: <a href="/date?d={esc(info['date'])}" style="text-decoration: underline;">{esc(info['date'])}</a>
         </div>
+        {rule_html}
       </div>
 
       {best_box}
 
+      {aliases_html}
       <div class="card">
         <h2>Упоминания в источниках</h2>
         <ul class="list">{''.join(m_items)}</ul>
@@ -601,6 +363,11 @@ def occurrence(occ_id: int):
     return page(info["canonical_title"], body, season=season)
 
 
+@app.get("/cache-stats")
+def cache_stats():
+    return {"build_id": reloader.build_id, "reloads": reloader.reloads, **pages.stats()}
+
+
 @app.get("/search", response_class=HTMLResponse)
 def search(q: str = Query(...)):
     q = (q or "").strip()
@@ -608,14 +375,36 @@ def search(q: str = Query(...)):
         body = "<div class='hero'><div class='card'><h2>Пустой запрос</h2></div></div>"
         return page("Поиск", body)
 
-    like = f"%{q}%"
+    match = fts_query(q)
+    # Найденное и сразу за ним — тот же праздник на другом языке (таблица aliases).
     rows = db_fetchall("""
-      SELECT h.id, h.canonical_title, h.lang
-      FROM holidays h
-      WHERE h.canonical_title LIKE ?
-      ORDER BY CASE WHEN h.lang='ru' THEN 0 ELSE 1 END, h.canonical_title
-      LIMIT 200
-    """, (like,))
+      WITH hits AS (
+        SELECT f.rowid AS id, bm25(holidays_fts, 10.0, 1.0) AS rank,
+               snippet(holidays_fts, 1, char(2), char(3), '…', 16) AS snip
+        FROM holidays_fts f
+        WHERE holidays_fts MATCH ?
+        ORDER BY rank
+        LIMIT 200
+      )
+      SELECT h.id, h.canonical_title, h.lang, hits.snip, hits.rank, 0 AS alias
+      FROM hits JOIN holidays h ON h.id = hits.id
+      UNION ALL
+      SELECT h.id, h.canonical_title, h.lang, '', min(hits.rank), 1
+      FROM hits
+      JOIN aliases a ON a.holiday_id = hits.id
+      JOIN holidays h ON h.id = a.alias_id
+      WHERE a.alias_id NOT IN (SELECT id FROM hits)
+      GROUP BY h.id
+      ORDER BY rank, alias
+    """, (match,)) if match else []
+    rows = [dict(r, fuzzy=False) for r in rows]
+
+    if len(rows) < FUZZY_FALLBACK_BELOW:
+        seen = {r["id"] for r in rows}
+        for hid, title, lang, _score in fuzzy.index.search(q):
+            if hid not in seen:
+                rows.append({"id": hid, "canonical_title": title, "lang": lang, "snip": "", "alias": 0,
+                             "fuzzy": True})
 
     if not rows:
         body = f"""
@@ -636,8 +425,9 @@ def search(q: str = Query(...)):
               <div>
                 <div style="font-weight:650;">{esc(r['canonical_title'])}</div>
                 <div class="muted" style="font-size:12px;">язык: {esc(r['lang'])}</div>
+                {snippet_html(r['snip'])}
               </div>
-              <span class="tag">найдено</span>
+              <span class="tag">{'похоже' if r['fuzzy'] else 'перевод' if r['alias'] else 'найдено'}</span>
             </li>
             """
         )
@@ -0,0 +1,93 @@
+import logging
+import threading
+
+from webapp import fuzzy, rules
+from webapp.db import db_fingerprint, pool
+
+CHECK_INTERVAL = 2.0  # секунд между проверками файла базы
+
+log = logging.getLogger(__name__)
+
+
+def read_build_id(con) -> str | None:
+    try:
+        row = con.execute("SELECT value FROM meta WHERE key = 'build_id'").fetchone()
+    except Exception:
+        return None
+    return row[0] if row else None
+
+
+class Reloader:
+    """
+    Следит за файлом базы и переключает приложение на новую сборку без рестарта.
+
+    load_and_dedupe.py подменяет файл атомарным rename, поэтому новая сборка
+    появляется целиком. Прежде чем переключиться, Reloader прогревает её
+    отдельным соединением (страницы date_summary, нечёткий индекс,
+    правила повторения) — и только
+    потом переводит пул соединений и кэши на неё. Запросы, начатые до
+    переключения, дочитывают старый файл.
+    """
+
+    def __init__(self, interval: float = CHECK_INTERVAL):
+        self.interval = interval
+        self.fingerprint = None
+        self.build_id = None
+        self.reloads = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        fp = db_fingerprint()
+        if fp is None:
+            # Файл появится после первой сборки: на него переключит поток проверки.
+            log.warning("database %s not found yet, serving an empty one", pool.path)
+        else:
+            self.switch(fp)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="db-reloader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                log.exception("reload failed, keeping build %s", self.build_id)
+
+    def check(self) -> bool:
+        fp = db_fingerprint()
+        if fp is None or fp == self.fingerprint:
+            return False
+        self.switch(fp)
+        return True
+
+    def switch(self, fp):
+        with self._lock:
+            con = pool.open_detached()
+            try:
+                build_id = read_build_id(con)
+                con.execute("SELECT count(*), max(title) FROM date_summary").fetchone()
+                fetchall = lambda sql, params=(): con.execute(sql, params).fetchall()
+                fuzzy.load(fetchall)
+                rules.load(fetchall)
+            finally:
+                con.close()
+
+            first = self.fingerprint is None
+            pool.reload()
+            self.fingerprint = fp
+            self.build_id = build_id
+            if not first:
+                self.reloads += 1
+                log.info("switched to database build %s", build_id)
+
+
+reloader = Reloader()
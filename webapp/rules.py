@@ -0,0 +1,76 @@
+from collections import defaultdict
+from datetime import date
+from functools import lru_cache
+
+from common.recurrence import YEARS, describe, expand
+
+YEAR_CACHE = 64   # развёрнутых лет в памяти
+
+
+class RuleIndex:
+    """
+    Праздники с правилом повторения (holiday_rules) для /date.
+
+    Правила разворачиваются в даты лениво, целым годом за раз: первый запрос
+    к году проходит по всем правилам, дальше год берётся из памяти. Так любой
+    год из YEARS отвечает сразу, хотя в базе лежат только годы, которые
+    действительно собирали.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.rules = {}
+        self.year = lru_cache(maxsize=YEAR_CACHE)(self._expand_year)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def build(self, rows):
+        """rows: (holiday_id, rule, occ_id, canonical_title, lang, has_desc)"""
+        self.entries = [tuple(r) for r in rows]
+        self.rules = {r[0]: r[1] for r in self.entries}
+        self.year.cache_clear()
+
+    def _expand_year(self, year: int) -> dict:
+        by_date = defaultdict(list)
+        for hid, rule, occ_id, title, lang, has_desc in self.entries:
+            d = expand(rule, year)
+            if d:
+                by_date[d.isoformat()].append(
+                    {"occ_id": occ_id, "title": title, "lang": lang, "has_desc": has_desc, "rule": True}
+                )
+        return dict(by_date)
+
+    def on(self, d: str) -> list:
+        """Праздники, которые по своим правилам приходятся на дату d (YYYY-MM-DD)."""
+        try:
+            year = date.fromisoformat(d).year
+        except ValueError:
+            return []
+        if year not in YEARS:
+            return []
+        return self.year(year).get(d, [])
+
+    def describe(self, holiday_id: int) -> str | None:
+        rule = self.rules.get(holiday_id)
+        return describe(rule) if rule else None
+
+
+index = RuleIndex()
+
+
+def load(fetchall):
+    """Строит новый индекс и подменяет им текущий одним присваиванием."""
+    global index
+    fresh = RuleIndex()
+    try:
+        rows = fetchall("""
+            SELECT r.holiday_id, r.rule, r.occ_id, h.canonical_title, h.lang, o.best_description_id IS NOT NULL
+            FROM holiday_rules r
+            JOIN holidays h ON h.id = r.holiday_id
+            JOIN occurrences o ON o.id = r.occ_id
+        """)
+    except Exception:
+        rows = []   # база собрана до появления holiday_rules
+    fresh.build(rows)
+    index = fresh
@@ -0,0 +1,29 @@
+(function() {
+  const season = document.body.getAttribute("data-season") || "neutral";
+  const layer = document.getElementById("particles");
+  if (!layer) return;
+
+  let glyphs = ["•"];
+  let count = 0;
+
+  if (season === "winter") { glyphs = ["❄","❅","✻"]; count = 26; }
+  else if (season === "spring") { glyphs = ["🌸","💮","🌼"]; count = 20; }
+  else if (season === "summer") { glyphs = ["✨","⭐","🌟"]; count = 18; }
+  else if (season === "autumn") { glyphs = ["🍂","🍁","🍃"]; count = 20; }
+  else { glyphs = ["•"]; count = 0; }
+
+  function rnd(a,b) { return a + Math.random()*(b-a); }
+
+  for (let i=0; i<count; i++) {
+    const el = document.createElement("div");
+    el.className = "p";
+    el.textContent = glyphs[Math.floor(Math.random()*glyphs.length)];
+    el.style.left = rnd(0, 100) + "vw";
+    el.style.fontSize = rnd(12, 26) + "px";
+    el.style.animationDuration = rnd(8, 18) + "s";
+    el.style.animationDelay = rnd(0, 6) + "s";
+    el.style.setProperty("--drift", (rnd(-12, 12)) + "vw");
+    el.style.opacity = rnd(0.45, 0.9);
+    layer.appendChild(el);
+  }
+})();